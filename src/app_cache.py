@@ -4,14 +4,19 @@
 # Created on: 2017-04
 
 """
-Handles caching different data from application forms.   
+Handles caching different data from application forms.
+
+The cache is kept in a JSON file (a snapshot of all items) and a log file next to it, to which only the items
+modified since the last save are appended (one JSON object per line). The log is replayed over the snapshot
+on loading and is merged into a new snapshot (written to a temporary file and atomically renamed) when it
+grows large and when the application finishes.
 """
-import copy
 import json
+import os
 import threading
 import time
 import logging
-from typing import Optional
+from typing import Optional, Dict, Any
 
 from PyQt5.QtWidgets import QSplitter, QDialog
 from PyQt5.QtCore import Qt
@@ -20,6 +25,9 @@ from wnd_utils import WndUtils
 
 log = logging.getLogger('cmt.app_cache')
 
+SAVE_INTERVAL_SECONDS = 2
+LOG_MAX_SIZE = 256 * 1024  # the size of the log file above which it is merged into the snapshot file
+
 
 class AppCache(object):
     def __init__(self, app_version: str):
@@ -28,13 +36,21 @@ class AppCache(object):
         self.finishing = False
         self.last_data_change_time = 0
         self.save_event = threading.Event()
-        self.__data = {}
+        self.lock = threading.RLock()
+        self.__data: Dict[str, Any] = {}
+        self.__texts: Dict[str, str] = {}  # JSON representation of the items, computed when an item is set
+        self.__dirty: Dict[str, str] = {}  # JSON representation of the items modified since the last save
+        self.compaction_needed = False
         self.thread = None
 
+    @property
+    def log_file_name(self):
+        return self.cache_file_name + '.log'
+
     def set_file_name(self, cache_file_name: str):
         if cache_file_name != self.cache_file_name:
-            if self.last_data_change_time > 0:
-                self.save_data()
+            if self.cache_file_name:
+                self.save_data(compact=True)
             self.cache_file_name = cache_file_name
             self.load_data()
 
@@ -46,32 +62,96 @@ class AppCache(object):
     def finish(self):
         self.finishing = True
         self.save_event.set()
-
-    def save_data(self):
-        try:
-            self.__data['app_version'] = self.app_version
-            json.dump(self.__data, open(self.cache_file_name, 'w'))
-            self.last_data_change_time = 0
-        except Exception as e:
-            log.error('Error writing cache: ' + str(e))
+        self.save_data(compact=True)
+
+    def get_item_text(self, symbol: str) -> Optional[str]:
+        return self.__texts.get(symbol)
+
+    def save_data(self, compact: bool = False):
+        """
+        Writes the modified items to the log file. If the log has grown large (or if compact is True), all items
+        are written to a new snapshot file replacing the old one, and the log is cleared.
+        """
+        with self.lock:
+            if not self.cache_file_name:
+                return
+            try:
+                if self.__data.get('app_version') != self.app_version:
+                    self.__data['app_version'] = self.app_version
+                    self.__texts['app_version'] = self.__dirty['app_version'] = json.dumps(self.app_version)
+
+                if self.__dirty:
+                    with open(self.log_file_name, 'a') as f:
+                        f.write(self.format_log_record(self.__dirty))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self.__dirty.clear()
+                    if os.path.getsize(self.log_file_name) > LOG_MAX_SIZE:
+                        self.compaction_needed = True
+
+                if (compact or self.compaction_needed) and \
+                        (os.path.exists(self.log_file_name) or not os.path.exists(self.cache_file_name)):
+                    self.write_snapshot()
+                self.last_data_change_time = 0
+            except Exception as e:
+                log.error('Error writing cache: ' + str(e))
+
+    @staticmethod
+    def format_log_record(items: Dict[str, str]) -> str:
+        return '{' + ','.join(json.dumps(k) + ':' + t for k, t in items.items()) + '}\n'
+
+    def write_snapshot(self):
+        tmp_file_name = self.cache_file_name + '.tmp'
+        with open(tmp_file_name, 'w') as f:
+            f.write('{' + ', '.join(json.dumps(k) + ': ' + self.get_item_text(k) for k in self.__data) + '}')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file_name, self.cache_file_name)
+        if os.path.exists(self.log_file_name):
+            os.remove(self.log_file_name)
+        self.compaction_needed = False
 
     def load_data(self):
-        try:
-            j = json.load(open(self.cache_file_name))
-            if j:
-                self.__data = j
-        except:
-            pass
+        with self.lock:
+            self.__data = {}
+            self.__texts = {}
+            self.__dirty = {}
+            try:
+                j = json.load(open(self.cache_file_name))
+                if isinstance(j, dict):
+                    self.__data = j
+            except:
+                pass
+
+            if os.path.exists(self.log_file_name):
+                try:
+                    with open(self.log_file_name) as f:
+                        for line in f:
+                            try:
+                                self.__data.update(json.loads(line))
+                            except ValueError:
+                                # the last record can be incomplete if the app was interrupted while writing it
+                                log.warning('Skipping an invalid record of the cache log file')
+                    self.compaction_needed = True
+                except Exception as e:
+                    log.error('Error reading the cache log file: ' + str(e))
+
+            self.__texts = {k: json.dumps(v) for k, v in self.__data.items()}
 
     def data_changed(self):
         self.last_data_change_time = time.time()
 
     def set_value(self, symbol, value):
         if isinstance(value, (int, float, str, list, tuple, dict)):
-            modified = self.__data.get(symbol, None) != value
-            if modified:
-                self.__data[symbol] = copy.deepcopy(value)
-                self.data_changed()
+            # the JSON text of the value serves both to detect modifications (also of objects returned by get_value
+            # and mutated in place) and as the snapshot of the value to be saved, so the value isn't copied
+            text = json.dumps(value)
+            with self.lock:
+                if self.get_item_text(symbol) != text:
+                    self.__data[symbol] = value
+                    self.__texts[symbol] = text
+                    self.__dirty[symbol] = text
+                    self.data_changed()
         elif value is not None:
             raise ValueError('Invalid type of value for cache item ' + symbol)
 
@@ -83,14 +163,14 @@ class AppCache(object):
             return default_value
 
     def save_data_thread(self, ctrl):
-        last_save_date = 0
         while not self.finishing:
-            self.save_event.wait(2)
+            self.save_event.wait(SAVE_INTERVAL_SECONDS)
             if self.save_event.is_set():
                 self.save_event.clear()
-            if self.last_data_change_time > 0 and last_save_date < self.last_data_change_time:
+            if self.finishing:
+                break
+            if self.__dirty or self.compaction_needed or self.last_data_change_time > 0:
                 self.save_data()
-                last_save_date = time.time()
         self.thread = None
 
 
@@ -51,11 +51,17 @@ from db_intf import DBCache
 from encrypted_files import read_file_encrypted, write_file_encrypted, NotConnectedToHardwareWallet
 from hw_common import HwSessionInfo
 from wnd_utils import WndUtils
+import vote_aggregates
 
 
 CURRENT_CFG_FILE_VERSION = 5
 CACHE_ITEM_LOGGERS_LOGLEVEL = 'LoggersLogLevel'
 CACHE_ITEM_LOG_FORMAT = 'LogFormat'
+CACHE_ITEM_CONN_HEALTH = 'ConnHealth_%NETWORK%'
+
+# how many seconds of the round-trip time a node lagging one block behind the best one is "worth" when ranking
+# connections
+CONN_HEALTH_LAG_PENALTY_SECONDS = 0.5
 
 
 DMN_ROLE_OWNER = 0x1
@@ -138,6 +144,13 @@ class AppConfig(QObject):
         # connections
         self.defective_net_configs = []
 
+        # health statistics of connections gathered by the background prober and by the RPC calls, used to rank
+        # the enabled connections; persisted in the app cache to keep the ranking across restarts
+        # conn id -> {'rtt': <seconds>, 'lag': <blocks behind the best node>, 'synced': bool, 'failures': int}
+        self.conn_health: Dict[str, Dict] = {}
+        self.conn_health_network = None  # the network for which conn_health has been loaded
+        self.conn_health_lock = threading.RLock()  # conn_health is also modified by the prober thread
+
         # the contents of the app-params.json configuration file read from the project GitHub repository
         self._remote_app_params = {}
         self._crown_blockchain_info = {}
@@ -172,6 +185,10 @@ class AppConfig(QObject):
                                                         # external sources
         self.dont_use_file_dialogs = False
         self.confirm_when_voting = True
+        self.hedge_rpc_calls = False  # if True, slow read-only RPC calls are repeated to a second node
+        self.background_governance_sync = True  # if True, proposals and votes are synchronized in the background
+                                                # (only for the configurations with masternodes)
+        self.ssh_tunnel_compression = False
         self.add_random_offset_to_vote_time = True  # To avoid identifying one user's masternodes by vote time
         self.sig_time_offset_min = -1800
         self.sig_time_offset_max = 1800
@@ -187,6 +204,7 @@ class AppConfig(QObject):
         self.log_file = ''
         self.log_level_str = ''
         self.db_intf = None
+        self.startup_benchmark = False
         self.db_cache_file_name = ''
         self.cfg_backup_dir = ''
         self.app_last_version = ''
@@ -248,8 +266,12 @@ class AppConfig(QObject):
                             help="Number of seconds relative to the current time being the upper bound of the "
                                  "time range from which a random sig_time offset is drawn (default 1800)",
                             dest='sig_time_offset_max', default=1800)
+        parser.add_argument('--startup-benchmark', action='store_true',
+                            help="Print the startup phases timing and exit after the application has started",
+                            dest='startup_benchmark')
 
         args = parser.parse_args()
+        self.startup_benchmark = args.startup_benchmark
         self.trezor_webusb = args.trezor_webusb
         self.trezor_bridge = args.trezor_bridge
         self.trezor_udp = args.trezor_udp
@@ -438,6 +460,7 @@ class AppConfig(QObject):
         self.save_loggers_config()
         app_cache.finish()
         self.db_intf.close()
+        app_utils.wipe_derived_keys()
 
     def save_cache_settings(self):
         if self.feature_register_dmn_automatic.get_value() is not None:
@@ -479,6 +502,9 @@ class AppConfig(QObject):
         self.read_proposals_external_attributes = src_config.read_proposals_external_attributes
         self.dont_use_file_dialogs = src_config.dont_use_file_dialogs
         self.confirm_when_voting = src_config.confirm_when_voting
+        self.hedge_rpc_calls = src_config.hedge_rpc_calls
+        self.background_governance_sync = src_config.background_governance_sync
+        self.ssh_tunnel_compression = src_config.ssh_tunnel_compression
         self.add_random_offset_to_vote_time = src_config.add_random_offset_to_vote_time
         self.csv_delimiter = src_config.csv_delimiter
         if self.initialized:
@@ -519,6 +545,12 @@ class AppConfig(QObject):
             self.db_intf.open(new_db_cache_file_name)
             self.db_cache_file_name = new_db_cache_file_name
 
+        self.check_db_cache_consistency()
+
+        self.restore_cache_settings()
+
+    def check_db_cache_consistency(self):
+        """ Scans the cache database for the known data inconsistencies and clears the affected data. """
         try:
             cur = self.db_intf.get_cursor()
 
@@ -526,11 +558,10 @@ class AppConfig(QObject):
             cur.execute('select voting_time from VOTING_RESULTS where id=(select min(id) from VOTING_RESULTS)')
             row = cur.fetchone()
             if row and row[0]:
-                d = datetime.datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S')
-                vts = d.timestamp()
-                if vts < 1554246129:  # timestamp of the block (1047200) that activated spork 15
+                if row[0] < 1554246129:  # timestamp of the block (1047200) that activated spork 15
                     logging.info('Cleared the cached votes because of the spork 15 activation')
                     cur.execute('delete from VOTING_RESULTS')
+                    vote_aggregates.clear(cur)
                     cur.execute('delete from LIVE_CONFIG')
                     cur.execute('update proposals set cmt_voting_last_read_time=0')
                     self.db_intf.commit()
@@ -559,7 +590,6 @@ class AppConfig(QObject):
         finally:
             self.db_intf.release_cursor()
 
-        self.restore_cache_settings()
 
     def clear_configuration(self):
         """
@@ -614,8 +644,10 @@ class AppConfig(QObject):
                     mem_file = ''
                     ret_info = {}
                     try:
+                        data = bytearray()
                         for data_chunk in read_file_encrypted(file_name, ret_info, hw_session):
-                            mem_file += data_chunk.decode('utf-8')
+                            data.extend(data_chunk)
+                        mem_file = data.decode('utf-8')
                         break
                     except NotConnectedToHardwareWallet as e:
                         ret = WndUtils.queryDlg(
@@ -703,6 +735,11 @@ class AppConfig(QObject):
                                                                           fallback='1'))
                 self.add_random_offset_to_vote_time = \
                     self.value_to_bool(config.get(section, 'add_random_offset_to_vote_time', fallback='1'))
+                self.hedge_rpc_calls = self.value_to_bool(config.get(section, 'hedge_rpc_calls', fallback='0'))
+                self.background_governance_sync = \
+                    self.value_to_bool(config.get(section, 'background_governance_sync', fallback='1'))
+                self.ssh_tunnel_compression = self.value_to_bool(config.get(section, 'ssh_tunnel_compression',
+                                                                           fallback='0'))
                 self.encrypt_config_file = \
                     self.value_to_bool(config.get(section, 'encrypt_config_file', fallback='0'))
 
@@ -970,6 +1007,9 @@ class AppConfig(QObject):
                    '1' if self.read_proposals_external_attributes else '0')
         config.set(section, 'confirm_when_voting', '1' if self.confirm_when_voting else '0')
         config.set(section, 'add_random_offset_to_vote_time', '1' if self.add_random_offset_to_vote_time else '0')
+        config.set(section, 'hedge_rpc_calls', '1' if self.hedge_rpc_calls else '0')
+        config.set(section, 'background_governance_sync', '1' if self.background_governance_sync else '0')
+        config.set(section, 'ssh_tunnel_compression', '1' if self.ssh_tunnel_compression else '0')
         config.set(section, 'encrypt_config_file', '1' if self.encrypt_config_file else '0')
 
         # save mn configuration
@@ -1027,18 +1067,7 @@ class AppConfig(QObject):
         if self.encrypt_config_file:
             f_ptr = StringIO()
             config.write(f_ptr)
-            f_ptr.seek(0)
-            mem_data = bytes()
-            while True:
-                data_chunk = f_ptr.read(1000)
-                if not data_chunk:
-                    break
-                if isinstance(data_chunk, str):
-                    mem_data += bytes(data_chunk, 'utf-8')
-                else:
-                    mem_data += data_chunk
-
-            write_file_encrypted(file_name, hw_session, mem_data)
+            write_file_encrypted(file_name, hw_session, f_ptr.getvalue().encode('utf-8'))
             encrypted = True
         else:
             config.write(codecs.open(file_name, 'w', 'utf-8'))
@@ -1203,6 +1232,65 @@ class AppConfig(QObject):
         else:
             self.active_crown_net_configs = tmp_list
 
+    def get_conn_health(self, cfg: 'CrownNetworkConnectionCfg') -> Dict:
+        """ The returned dict is to be modified only with conn_health_lock acquired. """
+        with self.conn_health_lock:
+            if self.conn_health_network != self.crown_network:
+                # the copy is modified in place, so it mustn't be the object kept by the cache
+                self.conn_health = copy.deepcopy(app_cache.get_value(
+                    CACHE_ITEM_CONN_HEALTH.replace('%NETWORK%', self.crown_network), {}, dict))
+                self.conn_health_network = self.crown_network
+            return self.conn_health.setdefault(cfg.get_conn_id(), {})
+
+    def save_conn_health(self):
+        with self.conn_health_lock:
+            if self.conn_health_network:
+                app_cache.set_value(CACHE_ITEM_CONN_HEALTH.replace('%NETWORK%', self.conn_health_network),
+                                    copy.deepcopy(self.conn_health))
+
+    def set_conn_health(self, cfg: 'CrownNetworkConnectionCfg', rtt: float, lag: int, synced: bool):
+        with self.conn_health_lock:
+            health = self.get_conn_health(cfg)
+            health['rtt'] = rtt
+            health['lag'] = lag
+            health['synced'] = synced
+            health['failures'] = 0
+
+    def add_conn_health_failure(self, cfg: 'CrownNetworkConnectionCfg'):
+        with self.conn_health_lock:
+            health = self.get_conn_health(cfg)
+            health['failures'] = health.get('failures', 0) + 1
+
+    def get_conn_health_rank(self, cfg: 'CrownNetworkConnectionCfg') -> Tuple[int, float]:
+        """
+        :return: Tuple[int <0: healthy, 1: not probed yet, 2: failing or not synchronized>, float <score: the lower
+            the better>]
+        """
+        with self.conn_health_lock:
+            health = self.get_conn_health(cfg)
+            if health.get('failures') or health.get('synced') is False:
+                return 2, health.get('failures', 0)
+            rtt = health.get('rtt')
+            if rtt is None:
+                return 1, 0.0
+            return 0, rtt + health.get('lag', 0) * CONN_HEALTH_LAG_PENALTY_SECONDS
+
+    @staticmethod
+    def is_conn_health_probed(cfg: 'CrownNetworkConnectionCfg') -> bool:
+        """ Connections through an SSH tunnel aren't probed, so they have no health info to compare. """
+        return not cfg.use_ssh_tunnel
+
+    def order_conn_list_by_health(self):
+        """
+        Sorts the probed active connections by their health, within the positions they occupy in the list; the
+        connections which are not probed keep their (configured or random) positions.
+        """
+        conns = self.active_crown_net_configs
+        positions = [idx for idx, cfg in enumerate(conns) if self.is_conn_health_probed(cfg)]
+        probed = sorted((conns[idx] for idx in positions), key=self.get_conn_health_rank)
+        for idx, cfg in zip(positions, probed):
+            conns[idx] = cfg
+
     def get_ordered_conn_list(self):
         if not self.active_crown_net_configs:
             self.prepare_conn_list()
@@ -1220,6 +1308,10 @@ class AppConfig(QObject):
         :return: 
         """
         self.defective_net_configs.append(cfg)
+        if self.is_conn_health_probed(cfg):
+            # only a successful probe or call clears the failure, and unprobed connections are never probed
+            self.add_conn_health_failure(cfg)
+            self.save_conn_health()
 
     def decode_connections(self, raw_conn_list) -> List['CrownNetworkConnectionCfg']:
         """
@@ -1367,6 +1459,11 @@ class AppConfig(QObject):
             # remove config from list of defective config
             idx = self.defective_net_configs.index(cfg)
             self.defective_net_configs.pop(idx)
+        with self.conn_health_lock:
+            health = self.get_conn_health(cfg)
+            if health.get('failures'):
+                health['failures'] = 0
+                self.save_conn_health()
 
     def get_mn_by_name(self, name):
         for mn in self.masternodes:
@@ -1496,6 +1593,7 @@ class MasternodeConfig:
         self.new = False
         self.modified = False
         self.lock_modified_change = False
+        self.__voting_key_material: Optional[crown_utils.DecodedPrivateKey] = None
 
     def set_modified(self):
         if not self.lock_modified_change:
@@ -1686,6 +1784,7 @@ class MasternodeConfig:
         if dmn_voting_private_key is None:
             dmn_voting_private_key = ''
         self.__dmn_voting_private_key = dmn_voting_private_key.strip()
+        self.wipe_voting_key_material()
 
     @property
     def dmn_voting_address(self):
@@ -1728,6 +1827,25 @@ class MasternodeConfig:
     def get_current_key_for_voting(self, app_config: AppConfig, crownd_intf):
         return self.dmn_voting_private_key
 
+    def get_voting_key_material(self, app_config: AppConfig, crownd_intf) -> crown_utils.DecodedPrivateKey:
+        """
+        Returns the voting private key decoded, together with its public key and public key hash. The decoded
+        key is kept until the voting key changes or wipe_voting_key_material is called, so signing many votes
+        requires one decoding per masternode.
+        """
+        wif = self.get_current_key_for_voting(app_config, crownd_intf)
+        km = self.__voting_key_material
+        if km is None or km.wif_priv_key != wif or km.crown_network != app_config.crown_network:
+            self.wipe_voting_key_material()
+            km = crown_utils.DecodedPrivateKey(wif, app_config.crown_network)
+            self.__voting_key_material = km
+        return km
+
+    def wipe_voting_key_material(self):
+        if self.__voting_key_material:
+            self.__voting_key_material.wipe()
+            self.__voting_key_material = None
+
     def get_dmn_owner_public_address(self, crown_network) -> Optional[str]:
         if self.__dmn_owner_key_type == InputKeyType.PRIVATE:
             if self.__dmn_owner_private_key:
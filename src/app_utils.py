@@ -12,7 +12,8 @@ import re
 import base64
 import binascii
 import datetime
-from typing import Optional, List, Tuple, ByteString, BinaryIO, Callable
+import threading
+from typing import Optional, List, Tuple, ByteString, BinaryIO, Callable, Dict
 from PyQt5.QtCore import QLocale
 from PyQt5.QtWidgets import QMessageBox, QMenu, QAction
 from cryptography.fernet import Fernet
@@ -165,42 +166,56 @@ def read_int_list_from_file(fptr: BinaryIO) -> List[int]:
     return elems
 
 
+ENCRYPTION_SALT = b'D9\x82\xbfSibW(\xb1q\xeb\xd1\x84\x118'
+
+# keys derived from passwords by encrypt/decrypt, cached for the application session, because the key stretching
+# (PBKDF2) is deliberately slow; {(sha256 of the password, iterations): derived key}
+derived_keys: Dict[Tuple[bytes, int], bytearray] = {}
+derived_keys_lock = threading.Lock()
+
+
+def get_derived_key(key: str, iterations: int) -> bytes:
+    key_bin = key.encode('utf-8')
+    cache_key = (hashlib.sha256(key_bin).digest(), iterations)
+    with derived_keys_lock:
+        derived = derived_keys.get(cache_key)
+        if derived is None:
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=ENCRYPTION_SALT,
+                iterations=iterations,
+                backend=default_backend()
+            )
+            derived = bytearray(kdf.derive(key_bin))
+            derived_keys[cache_key] = derived
+        return base64.urlsafe_b64encode(derived)
+
+
+def wipe_derived_keys():
+    """ Overwrites and forgets the keys cached by encrypt/decrypt; to be called when closing the application. """
+    with derived_keys_lock:
+        for derived in derived_keys.values():
+            for idx in range(len(derived)):
+                derived[idx] = 0
+        derived_keys.clear()
+
+
 def encrypt(input_str, key, iterations=100000):
     """Basic encryption with a predefined key. Its purpose is to protect not very important data, just to avoid
     saving them as plaintext."""
 
-    salt = b'D9\x82\xbfSibW(\xb1q\xeb\xd1\x84\x118'
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=iterations,
-        backend=default_backend()
-    )
-    key = base64.urlsafe_b64encode(kdf.derive(key.encode('utf-8')))
-    fer = Fernet(key)
+    fer = Fernet(get_derived_key(key, iterations))
     h = fer.encrypt(input_str.encode('utf-8'))
     h = h.hex()
     return h
 
 
 def decrypt(input_str, key, iterations=100000):
-    try:
-        input_str = binascii.unhexlify(input_str)
-        salt = b'D9\x82\xbfSibW(\xb1q\xeb\xd1\x84\x118'
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=iterations,
-            backend=default_backend()
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(key.encode('utf-8')))
-        fer = Fernet(key)
-        h = fer.decrypt(input_str)
-        h = h.decode('utf-8')
-    except:
-        raise
+    input_str = binascii.unhexlify(input_str)
+    fer = Fernet(get_derived_key(key, iterations))
+    h = fer.decrypt(input_str)
+    h = h.decode('utf-8')
     return h
 
 
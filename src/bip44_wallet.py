@@ -15,7 +15,7 @@ import app_utils
 import hw_intf
 from common import CancelException
 from crown_utils import bip32_path_string_to_n, pubkey_to_address, bip32_path_n_to_string, bip32_path_string_append_elem
-from crownd_intf import CrowndInterface
+from crownd_intf import CrowndInterface, MEMPOOL_TX_ADDED, MEMPOOL_TX_CONFIRMED, MEMPOOL_TX_EVICTED
 from hw_common import HwSessionInfo, HWNotConnectedException
 from db_intf import DBCache
 from thread_fun_dlg import CtrlObject
@@ -34,6 +34,13 @@ UNCONFIRMED_TX_BLOCK_HEIGHT = 99999999
 DEFAULT_TX_FETCH_PRIORITY = 1  # the higher the number to higher the priority
 ADDR_BALANCE_CONSISTENCY_CHECK_SECONDS = 3600
 
+# address history is fetched in block range windows; the window size is adapted to keep the number of entries
+# returned by a single getaddressdeltas call close to TX_FETCH_WINDOW_TARGET_ENTRIES
+TX_FETCH_WINDOW_INITIAL_BLOCKS = 20000
+TX_FETCH_WINDOW_MIN_BLOCKS = 100
+TX_FETCH_WINDOW_MAX_BLOCKS = 1000000
+TX_FETCH_WINDOW_TARGET_ENTRIES = 500
+
 log = logging.getLogger('cmt.bip44_wallet')
 
 
@@ -70,6 +77,7 @@ class Bip44Wallet(QObject):
         self.__cur_tx_fetch_prioriry = None
         self.__waiting_tx_fetch_priority = None
         self.__tx_fetch_end_event = threading.Event()
+        self.__tx_fetch_window_blocks = TX_FETCH_WINDOW_INITIAL_BLOCKS
 
         # list of accounts retrieved while calling self.list_accounts
         self.account_by_id: Dict[int, Bip44AccountType] = {}
@@ -105,9 +113,11 @@ class Bip44Wallet(QObject):
         # ... the same for accounts:
         self.__txes_subscribed_accounts: Dict[int, int] = {}
 
-        # dict of txids fetched from mempool; used to avoid processing multiple times
-        # before they get confirmed
-        self.__txs_in_mempool: Dict[str, str] = {}
+        # mempool events (event type, txid, tx json) published by the mempool watcher; they are applied to the
+        # db cache by the thread fetching transactions
+        self.__mempool_events: List[Tuple[int, str, Optional[Dict]]] = []
+        self.__mempool_events_lock = threading.Lock()
+        self.mempool_watcher = crownd_intf.get_mempool_watcher()
 
         self.subscribed_addrs_lock = EnhRLock()
 
@@ -120,6 +130,7 @@ class Bip44Wallet(QObject):
         self.on_address_data_changed_callback: Callable[[Bip44AccountType, Bip44AddressType], None] = None
         self.on_address_loaded_callback: Callable[[Bip44AddressType], None] = None
         self.on_fetch_account_txs_feedback: Callable[[int], None] = None  # args: number of txses fetched each call
+        self.on_mempool_event_callback: Callable[[], None] = None  # called when new mempool events are waiting
 
     def signal_account_added(self, account: Bip44AccountType):
         if self.on_account_added_callback and account and self.__tree_id == account.tree_id and \
@@ -162,11 +173,61 @@ class Bip44Wallet(QObject):
         self.addresses_by_id.clear()
         self.addresses_by_address.clear()
         self.utxos_by_id.clear()
-        self.__txs_in_mempool.clear()
+        self.mempool_watcher.clear_addresses(self._on_mempool_event)
+        with self.__mempool_events_lock:
+            self.__mempool_events.clear()
         with self.subscribed_addrs_lock:
             self.__txes_subscribed_addrs.clear()
         self.reset_tx_diffs()
 
+    def start_mempool_watching(self):
+        self.mempool_watcher.subscribe(self._on_mempool_event)
+        self.mempool_watcher.watch_addresses(self._on_mempool_event, list(self.addresses_by_address.keys()))
+
+    def stop_mempool_watching(self):
+        self.mempool_watcher.unsubscribe(self._on_mempool_event)
+
+    def _on_mempool_event(self, event: int, txid: str, tx_json: Optional[Dict]):
+        """ Called from the mempool watcher thread, so here we only queue events. """
+        with self.__mempool_events_lock:
+            self.__mempool_events.append((event, txid, tx_json))
+        if self.on_mempool_event_callback:
+            self.on_mempool_event_callback()
+
+    def mempool_events_pending(self) -> bool:
+        return len(self.__mempool_events) > 0
+
+    def process_mempool_events(self):
+        db_cursor = self.db_intf.get_cursor()
+        try:
+            self._process_mempool_events(db_cursor)
+        finally:
+            if db_cursor.connection.total_changes > 0:
+                self.db_intf.commit()
+            self.db_intf.release_cursor()
+
+    def _process_mempool_events(self, db_cursor):
+        with self.__mempool_events_lock:
+            events = self.__mempool_events
+            self.__mempool_events = []
+        if not events:
+            return
+
+        log.debug('Processing %s mempool events', len(events))
+        for event, txid, tx_json in events:
+            if event in (MEMPOOL_TX_ADDED, MEMPOOL_TX_CONFIRMED):
+                self._process_tx(db_cursor, txid, tx_json)
+            elif event == MEMPOOL_TX_EVICTED:
+                db_cursor.execute('select id from tx where tx_hash=? and block_height=?',
+                                  (self._wrap_txid(txid), UNCONFIRMED_TX_BLOCK_HEIGHT))
+                row = db_cursor.fetchone()
+                if row:
+                    self.purge_transaction(row[0], db_cursor)
+
+        if self.addr_bal_updated:
+            self._update_addr_balances(account=None, addr_ids=list(self.addr_bal_updated.keys()),
+                                       db_cursor=db_cursor)
+
     def get_hd_identity_info(self) -> Tuple[int, str]:
         """
         :return: Tuple[int <tree id>, str <tree label>]
@@ -372,6 +433,8 @@ class Bip44Wallet(QObject):
     def _address_loaded(self, addr: Bip44AddressType):
         self.addresses_by_id[addr.id] = addr
         self.addresses_by_address[addr.address] = addr
+        if addr.address:
+            self.mempool_watcher.watch_addresses(self._on_mempool_event, (addr.address,))
         self.signal_address_loaded(addr)
 
     def _get_address_from_dict(self, address_dict) -> Bip44AddressType:
@@ -781,7 +844,8 @@ class Bip44Wallet(QObject):
     def _process_addresses_txs(self, addr_info_list: List[Bip44AddressType], max_block_height: int,
                                check_break_process_fun: Callable = None):
 
-        def process_txes(txids: List[Dict]):
+        def process_txes(txids: List[Dict]) -> bool:
+            """ :return: True if all the transactions have been processed """
             log.debug('starting process_txes - tx count: %s', len(txids))
             last_time_checked = time.time()
             last_nr = 0
@@ -789,12 +853,20 @@ class Bip44Wallet(QObject):
                 self._process_tx(db_cursor, tx_entry.get('txid'))
                 if time.time() - last_time_checked > 1:  # feedback every 1s
                     if check_break_process_fun and check_break_process_fun():
-                        break
+                        return False
                     if self.on_fetch_account_txs_feedback:
                         self.on_fetch_account_txs_feedback(nr - last_nr)
                         last_time_checked = time.time()
                         last_nr = nr
             log.debug('finished process_txes')
+            return True
+
+        def next_window_size(window: int, entries_count: int) -> int:
+            if entries_count:
+                factor = min(max(TX_FETCH_WINDOW_TARGET_ENTRIES / entries_count, 0.25), 4)
+            else:
+                factor = 4
+            return int(min(max(window * factor, TX_FETCH_WINDOW_MIN_BLOCKS), TX_FETCH_WINDOW_MAX_BLOCKS))
 
         log.debug('_process_addresses_txs, addr count: %s', len(addr_info_list))
         tm_begin = time.time()
@@ -802,6 +874,7 @@ class Bip44Wallet(QObject):
         addresses = []
         addr_ids = []
         last_block_height = max_block_height
+        fetch_interrupted = False
 
         for addr_info in addr_info_list:
             if addr_info.address:
@@ -818,48 +891,58 @@ class Bip44Wallet(QObject):
                 if row[0] is not None:
                     last_block_height = row[0]
 
-            if last_block_height < max_block_height:
-                log.debug(f'getaddressdeltas for {addresses}, start: {last_block_height + 1}, end: {max_block_height}')
+            # fetch the address history window by window; after each window is processed, the scan height of
+            # the addresses is committed, so an interrupted fetch resumes from the last completed window
+            while last_block_height < max_block_height:
+                window_start = last_block_height + 1
+                window_end = min(last_block_height + self.__tx_fetch_window_blocks, max_block_height)
+                log.debug(f'getaddressdeltas for {addresses}, start: {window_start}, end: {window_end}')
                 txids = self.crownd_intf.getaddressdeltas({'addresses': addresses,
-                                                         'start': last_block_height + 1,
-                                                         'end': max_block_height})
-            else:
-                txids = []
+                                                         'start': window_start,
+                                                         'end': window_end})
+                self.__tx_fetch_window_blocks = next_window_size(window_end - window_start + 1, len(txids))
 
-            try:
-                mempool_entries = self.crownd_intf.getaddressmempool(addresses)
-                mempool_entries_verified = []
-                for me_tx in mempool_entries:
-                    me_txid = me_tx.get('txid')
-                    if me_txid not in self.__txs_in_mempool:
-                        mempool_entries_verified.append(me_tx)
-                        self.__txs_in_mempool[me_txid] = me_txid
-                if mempool_entries_verified:
-                    txids.extend(mempool_entries_verified)
-            except Exception as e:
-                log.warning('Error querying mempool: ' + str(e))
-
-            if txids:
-                process_txes(txids)
-
-                # update the last scan block height info for each of the addresses
-                if last_block_height != max_block_height:
-                    for addr_info in addr_info_list:
-                        db_cursor.execute('update address set last_scan_block_height=? where id=?',
-                                          (max_block_height, addr_info.id))
+                if txids and not process_txes(txids):
+                    fetch_interrupted = True
+                    break
 
-                    for addr_info in addr_info_list:
-                        if addr_info.address:
-                            addr_info.last_scan_block_height = max_block_height
+                db_cursor.executemany('update address set last_scan_block_height=? where id=? and '
+                                      'ifnull(last_scan_block_height, 0)<?',
+                                      [(window_end, addr_info.id, window_end) for addr_info in addr_info_list])
+                for addr_info in addr_info_list:
+                    if addr_info.address and (addr_info.last_scan_block_height or 0) < window_end:
+                        addr_info.last_scan_block_height = window_end
 
                 # update balances of the all addresses affected by processing transactions
                 addr_ids_to_update_balance = [a.id for a in addr_info_list if a.id in self.addr_bal_updated]
                 if addr_ids_to_update_balance:
-                    self._update_addr_balances(account=None, addr_ids=addr_ids_to_update_balance)
+                    self._update_addr_balances(account=None, addr_ids=addr_ids_to_update_balance,
+                                               db_cursor=db_cursor)
+                self.db_intf.commit()
+                last_block_height = window_end
+
+                if check_break_process_fun and check_break_process_fun():
+                    fetch_interrupted = True
+                    break
+
+            # the mempool watcher delivers unconfirmed transactions only to the subscribed wallets (the wallet
+            # view) and only after its next check, so the mempool is also queried here for the transactions
+            # not yet in the db cache
+            self.mempool_watcher.watch_addresses(self._on_mempool_event, addresses)
+            self._process_mempool_events(db_cursor)
+            try:
+                for me_tx in self.crownd_intf.getaddressmempool(addresses):
+                    me_txid = me_tx.get('txid')
+                    if me_txid:
+                        self._process_tx(db_cursor, me_txid)
+            except Exception as e:
+                log.warning('Error querying mempool: ' + str(e))
 
-            # verify whether the address balances from the db cache match the balances maintained by network
+            # verify whether the address balances from the db cache match the balances maintained by network;
+            # skipped if the fetch has been interrupted, since the balance of a partly scanned address always
+            # differs and the check would refetch its whole history in a single call
             addr_ids_to_update_balance = []
-            for a in addr_info_list:
+            for a in (addr_info_list if not fetch_interrupted else []):
                 if time.time() - a.last_balance_verify_ts >= ADDR_BALANCE_CONSISTENCY_CHECK_SECONDS:
                     log.debug('Verifying address balance consistency. Id: %s', a.id)
                     try:
@@ -895,16 +978,9 @@ class Bip44Wallet(QObject):
         self._get_tx_db_id(db_cursor, txhash, tx_json)
 
     def _getrawtransaction(self, txhash, refetch_from_network: bool = False):
-        if txhash in self.__txs_in_mempool:
-            in_mempool = True
-        else:
-            in_mempool = False
-
-        tx = self.crownd_intf.getrawtransaction(txhash, 1)
-
-        if in_mempool and tx.get('height'):
-            del self.__txs_in_mempool[txhash]
-        return tx
+        # the copy held by the mempool watcher isn't used here, because the transaction could have been
+        # confirmed since it was resolved
+        return self.crownd_intf.getrawtransaction(txhash, 1)
 
     def _get_tx_db_id(self, db_cursor, txhash: str, tx_json: Dict = None, create=True) -> Tuple[int, Optional[Dict]]:
         """
@@ -1,7 +1,12 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
+import multiprocessing
 import os
 import sys
+import startup_profile
+import import_timer
+if import_timer.is_enabled(sys.argv):
+    import_timer.start()
 import PyQt5.QtWidgets as qwi
 from PyQt5.QtGui import QIcon
 import main_dlg
@@ -9,8 +14,11 @@ import traceback
 import logging
 
 from wnd_utils import WndUtils
+startup_profile.checkpoint('imports')
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # the processes signing governance votes in the frozen app
+
     def my_excepthook(type, value, tback):
         print('=========================')
         traceback.print_tb(tback)
@@ -37,7 +45,10 @@ if __name__ == '__main__':
             app_dir = path
 
     app = qwi.QApplication(sys.argv)
+    startup_profile.checkpoint('qt init')
     ui = main_dlg.MainWindow(app_dir)
+    import_timer.stop()
+    import_timer.log_report()  # visible in debug mode only
     ui.show()
 
     try:
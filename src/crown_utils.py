@@ -13,7 +13,6 @@ from random import randint
 import bitcoin
 from bip32utils import Base58
 import base58
-from bls_py import bls
 
 
 # Bitcoin opcodes used in the application
@@ -217,6 +216,7 @@ def generate_bls_privkey() -> str:
                     continue
 
             try:
+                from bls_py import bls
                 pk = bls.PrivateKey.from_bytes(pk_bytes)
                 pk_bin = pk.serialize()
                 return pk_bin.hex()
@@ -233,6 +233,7 @@ def bls_privkey_to_pubkey(privkey: str) -> str:
     :param privkey: BLS privkey as a hex string
     :return: BLS pubkey as a hex string.
     """
+    from bls_py import bls
     pk = bls.PrivateKey.from_bytes(bytes.fromhex(privkey))
     pubkey = pk.get_public_key()
     pubkey_bin = pubkey.serialize()
@@ -348,32 +349,133 @@ def electrum_sig_hash(message):
     return bitcoin.dbl_sha256(padded)
 
 
-def ecdsa_sign(msg: str, wif_priv_key: str, crown_network: str):
-    """Signs a message with the Elliptic Curve algorithm.
+class DecodedPrivateKey(object):
+    """
+    Private key decoded from the WIF format together with the public key data derived from it, to be kept for
+    the time of signing many messages with the same key.
     """
 
-    v, r, s = bitcoin.ecdsa_raw_sign(electrum_sig_hash(msg), wif_priv_key)
-    sig = bitcoin.encode_sig(v, r, s)
-    pubkey = bitcoin.privkey_to_pubkey(wif_to_privkey(wif_priv_key, crown_network))
+    def __init__(self, wif_priv_key: str, crown_network: str):
+        privkey_hex = wif_to_privkey(wif_priv_key, crown_network)
+        if not privkey_hex:
+            raise Exception('Invalid private key.')
+        self.wif_priv_key = wif_priv_key
+        self.crown_network = crown_network
+        self.privkey: int = int(privkey_hex[:64], 16)
+        self.compressed = len(privkey_hex) > 64  # the compression suffix (01) follows the key
+        self.pubkey: str = get_ecdsa_signer().get_pubkey(self.privkey, self.compressed)
+        self.pubkey_hash: bytes = bitcoin.bin_hash160(bytes.fromhex(self.pubkey))
+
+    def wipe(self):
+        """ Drops the references to the key material. """
+        self.wif_priv_key = ''
+        self.privkey = 0
+        self.pubkey = ''
+        self.pubkey_hash = b''
+
+
+class EcdsaSigner(object):
+    """
+    Backend creating the compact recoverable signatures (base64-encoded, with the recovery id and the key
+    compression flag in the first byte) returned by ecdsa_sign and ecdsa_sign_raw. Every backend has to produce
+    the same signatures as the pure-Python one (deterministic RFC6979 nonces, low-s normalization).
+    """
+    name = ''
 
-    ok = bitcoin.ecdsa_raw_verify(electrum_sig_hash(msg), bitcoin.decode_sig(sig), pubkey)
-    if not ok:
-        raise Exception('Bad signature!')
-    return sig
+    def get_pubkey(self, privkey: int, compressed: bool) -> str:
+        """ :return: the public key (hex) in the format returned by bitcoin.privkey_to_pubkey """
+        raise NotImplementedError
 
+    def sign(self, msg_hash, key: DecodedPrivateKey) -> str:
+        raise NotImplementedError
 
-def ecdsa_sign_raw(msg_raw: bytes, wif_priv_key: str, crown_network: str):
-    """Signs raw bytes (a message hash) with the Elliptic Curve algorithm.
+
+class PythonEcdsaSigner(EcdsaSigner):
+    """ Implementation based on the pure-Python 'bitcoin' package. """
+    name = 'python'
+
+    def get_pubkey(self, privkey: int, compressed: bool) -> str:
+        return bitcoin.privkey_to_pubkey(bitcoin.encode_privkey(privkey, 'hex_compressed' if compressed else 'hex'))
+
+    def sign(self, msg_hash, key: DecodedPrivateKey) -> str:
+        # the hex format is cheaper to decode than WIF and keeps the compression flag used for 'v'
+        v, r, s = bitcoin.ecdsa_raw_sign(msg_hash, bitcoin.encode_privkey(key.privkey, 'hex_compressed'
+                                                                          if key.compressed else 'hex'))
+        sig = bitcoin.encode_sig(v, r, s)
+
+        ok = bitcoin.ecdsa_raw_verify(msg_hash, bitcoin.decode_sig(sig), key.pubkey)
+        if not ok:
+            raise Exception('Bad signature!')
+        return sig
+
+
+class Secp256k1EcdsaSigner(PythonEcdsaSigner):
+    """ Implementation based on the native libsecp256k1 library (through the 'coincurve' package). """
+    name = 'secp256k1'
+
+    def __init__(self):
+        import coincurve
+        self.coincurve = coincurve
+
+    def get_pubkey(self, privkey: int, compressed: bool) -> str:
+        return self.coincurve.PrivateKey(privkey.to_bytes(32, byteorder='big')).public_key.format(
+            compressed=compressed).hex()
+
+    def sign(self, msg_hash, key: DecodedPrivateKey) -> str:
+        z = bitcoin.hash_to_int(msg_hash)
+        if z >> 256:
+            return super().sign(msg_hash, key)
+        msg32 = z.to_bytes(32, byteorder='big')
+        privkey = self.coincurve.PrivateKey(key.privkey.to_bytes(32, byteorder='big'))
+        sig_rec = privkey.sign_recoverable(msg32, hasher=None)  # r (32) + s (32) + recovery id (1)
+        recid = sig_rec[64]
+        v = 27 + (recid & 1)  # the 'bitcoin' package ignores the r overflow bit of the recovery id
+        if key.compressed:
+            v += 4
+        sig = base64.b64encode(bytes([v]) + sig_rec[:64]).decode('utf-8')
+
+        pubkey_rec = self.coincurve.PublicKey.from_signature_and_message(sig_rec, msg32, hasher=None)
+        if pubkey_rec.format(compressed=key.compressed).hex() != key.pubkey:
+            raise Exception('Bad signature!')
+        return sig
+
+
+ecdsa_signer: typing.Optional[EcdsaSigner] = None
+
+
+def get_ecdsa_signer() -> EcdsaSigner:
+    """ Returns the signing backend: the native one if the library is available, otherwise the pure-Python one. """
+    global ecdsa_signer
+    if ecdsa_signer is None:
+        try:
+            ecdsa_signer = Secp256k1EcdsaSigner()
+        except ImportError:
+            logging.info('The coincurve package is not available; using the pure-Python ECDSA signing.')
+            ecdsa_signer = PythonEcdsaSigner()
+    return ecdsa_signer
+
+
+def set_ecdsa_signer(signer: typing.Optional[EcdsaSigner]):
+    """ Sets the signing backend; None restores the default one. """
+    global ecdsa_signer
+    ecdsa_signer = signer
+
+
+def ecdsa_sign(msg: str, wif_priv_key: typing.Union[str, DecodedPrivateKey], crown_network: str):
+    """Signs a message with the Elliptic Curve algorithm.
+    :param wif_priv_key: private key in the WIF format or already decoded (when signing many messages)
     """
+    if not isinstance(wif_priv_key, DecodedPrivateKey):
+        wif_priv_key = DecodedPrivateKey(wif_priv_key, crown_network)
+    return get_ecdsa_signer().sign(electrum_sig_hash(msg), wif_priv_key)
 
-    v, r, s = bitcoin.ecdsa_raw_sign(msg_raw, wif_priv_key)
-    sig = bitcoin.encode_sig(v, r, s)
-    pubkey = bitcoin.privkey_to_pubkey(wif_to_privkey(wif_priv_key, crown_network))
 
-    ok = bitcoin.ecdsa_raw_verify(msg_raw, bitcoin.decode_sig(sig), pubkey)
-    if not ok:
-        raise Exception('Bad signature!')
-    return sig
+def ecdsa_sign_raw(msg_raw: bytes, wif_priv_key: typing.Union[str, DecodedPrivateKey], crown_network: str):
+    """Signs raw bytes (a message hash) with the Elliptic Curve algorithm.
+    """
+    if not isinstance(wif_priv_key, DecodedPrivateKey):
+        wif_priv_key = DecodedPrivateKey(wif_priv_key, crown_network)
+    return get_ecdsa_signer().sign(msg_raw, wif_priv_key)
 
 
 def serialize_input_str(tx, prevout_n, sequence, script_sig):
@@ -5,30 +5,32 @@
 import decimal
 import functools
 import json
+import queue
 
 import os
 import re
 import socket
 import ssl
+import sys
 import threading
 import time
-import datetime
 import logging
+import weakref
+from collections import deque
 from PyQt5.QtCore import QThread
 from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException, EncodeDecimal
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
-from paramiko import AuthenticationException, PasswordRequiredException, SSHException
-from paramiko.ssh_exception import NoValidConnectionsError, BadAuthenticationType
-from typing import List, Dict, Union, Callable, Optional
+from typing import List, Dict, Union, Callable, Optional, Set, Iterable, Tuple, Any
 import app_cache
 from app_config import AppConfig
 from random import randint
 from wnd_utils import WndUtils
 import socketserver
-import select
+import selectors
 from psw_cache import SshPassCache
 from common import AttrsProtected, CancelException
+from rpc_stream import StreamingAuthServiceProxy
 
 
 log = logging.getLogger('cmt.crownd_intf')
@@ -44,6 +46,57 @@ except ImportError:
 # features
 MASTERNODES_CACHE_VALID_SECONDS = 60 * 60  # 60 minutes
 PROTX_CACHE_VALID_SECONDS = 3 * 60 * 60  # 60 minutes
+# maximum time get_masternodelist waits for the masternode data to be loaded from the db cache in the background
+MASTERNODES_DB_CACHE_WAIT_SECONDS = 60
+
+# how often the mempool watcher compares the node's mempool with its previous snapshot
+MEMPOOL_WATCH_INTERVAL_SECONDS = 10
+
+# how often the enabled RPC connections are probed for latency, block height and synchronization status
+CONN_HEALTH_PROBE_INTERVAL_SECONDS = 120
+CONN_HEALTH_PROBE_TIMEOUT_SECONDS = 5
+# the current connection is switched to a healthier one only if the other connection's score is better by the given
+# margin (the larger of the two) in the given number of consecutive probes, so that noisy RTTs don't cause reconnecting
+CONN_SWITCH_MIN_GAIN_RATIO = 0.3
+CONN_SWITCH_MIN_GAIN_SECONDS = 0.05
+CONN_SWITCH_MIN_PROBES = 3
+
+# hedging of the read-only RPC calls: if the current node hasn't answered within the given percentile of the
+# recent call durations, the call is repeated to a second node and the first answer is used
+RPC_HEDGE_LATENCY_PERCENTILE = 95
+RPC_HEDGE_LATENCY_SAMPLES = 100
+RPC_HEDGE_MIN_SAMPLES = 10
+RPC_HEDGE_DEFAULT_DELAY_SECONDS = 2.0
+RPC_HEDGE_MIN_DELAY_SECONDS = 0.2
+
+# RPC calls that are safe to repeat to another node: (command, subcommand or None)
+HEDGEABLE_RPC_CALLS = {
+    ('getblockcount', None), ('getblockhash', None), ('getblockheader', None), ('getblockchaininfo', None),
+    ('getrawtransaction', None), ('decoderawtransaction', None),
+    ('validateaddress', None), ('getaddressbalance', None), ('getaddressutxos', None),
+    ('getaddressmempool', None), ('getaddresstxids', None), ('listaddressbalances', None),
+    ('getcurrentvotes', None), ('getgovernanceinfo', None), ('getsuperblockbudget', None),
+    ('gobject', 'list'), ('gobject', 'get'), ('gobject', 'getcurrentvotes'), ('gobject', 'getvotes'),
+    ('gobject', 'count'), ('masternodelist', None)
+}
+
+# calls changing the state of the network, which must never be sent twice
+NON_HEDGEABLE_RPC_CALLS = {'sendrawtransaction', 'voteraw', 'masternodebroadcast'}
+
+# SSH tunnel forwarding: size of the data chunks moved in one go and the minimum interval between transfer stats
+SSH_TUNNEL_BUFFER_SIZE = 256 * 1024
+SSH_TUNNEL_LOG_INTERVAL_SECONDS = 10
+
+# the http connection is kept open between the RPC calls (HTTP/1.1 keep-alive); it's reopened before a call if it
+# has been idle for longer than crownd keeps idle connections open (-rpcservertimeout, 30 s by default)
+HTTP_CONN_MAX_IDLE_SECONDS = 25
+SSH_KEEPALIVE_INTERVAL_SECONDS = 15
+CONN_STATS_LOG_INTERVAL_CALLS = 200
+
+# mempool events published to the MempoolWatcher subscribers
+MEMPOOL_TX_ADDED = 1
+MEMPOOL_TX_CONFIRMED = 2
+MEMPOOL_TX_EVICTED = 3
 
 
 class ForwardServer (socketserver.ThreadingTCPServer):
@@ -68,27 +121,43 @@ class Handler(socketserver.BaseRequestHandler):
         if chan is None:
             return
 
+        sel = selectors.DefaultSelector()
+        buffer = bytearray(SSH_TUNNEL_BUFFER_SIZE)
+        buffer_view = memoryview(buffer)
+        bytes_sent = 0
+        bytes_received = 0
+        last_log_time = time.time()
         try:
-            while True:
-                r, w, x = select.select([self.request, chan], [], [], 10)
-                if self.request in r:
-                    data = self.request.recv(1024)
-                    if len(data) == 0:
-                        break
-                    chan.send(data)
-                    log.debug(f'SSH tunnel - sent {len(data)} bytes')
-                if chan in r:
-                    data = chan.recv(1024)
-                    if len(data) == 0:
-                        break
-                    self.request.send(data)
-                    log.debug(f'SSH tunnel - received {len(data)} bytes')
-            log.debug('Finishing Handler.handle')
+            sel.register(self.request, selectors.EVENT_READ)
+            sel.register(chan, selectors.EVENT_READ)
+            finished = False
+            while not finished:
+                for key, _ in sel.select(timeout=10):
+                    if key.fileobj is self.request:
+                        size = self.request.recv_into(buffer)
+                        if not size:
+                            finished = True
+                            break
+                        chan.sendall(buffer_view[:size])
+                        bytes_sent += size
+                    else:
+                        data = chan.recv(SSH_TUNNEL_BUFFER_SIZE)
+                        if not data:
+                            finished = True
+                            break
+                        self.request.sendall(data)
+                        bytes_received += len(data)
+
+                if time.time() - last_log_time >= SSH_TUNNEL_LOG_INTERVAL_SECONDS:
+                    log.debug(f'SSH tunnel - sent {bytes_sent} bytes, received {bytes_received} bytes so far')
+                    last_log_time = time.time()
+            log.debug(f'Finishing Handler.handle, sent {bytes_sent} bytes, received {bytes_received} bytes')
         except socket.error as e:
             log.error('Handler socker.error occurred: ' + str(e))
         except Exception as e:
             log.error('Handler exception occurred: ' + str(e))
         finally:
+            sel.close()
             chan.close()
             self.request.close()
 
@@ -153,9 +222,20 @@ class CrowndConnectionError(Exception):
         self.org_exception = org_exception
 
 
+class CrowndRequestSentError(Exception):
+    """
+    Raised when the connection fails after a non-repeatable request has been sent to the node, so it's unknown
+    whether the node has executed it.
+    """
+    def __init__(self, org_exception):
+        Exception.__init__(self, 'Connection error after the request has been sent (its result is unknown): ' +
+                           str(org_exception))
+        self.org_exception = org_exception
+
+
 class CrowndSSH(object):
     def __init__(self, host, port, username, on_connection_broken_callback=None, auth_method: str = 'password',
-                 private_key_path: str = ''):
+                 private_key_path: str = '', compress: bool = False):
         self.host = host
         self.port = port
         self.username = username
@@ -167,6 +247,7 @@ class CrowndSSH(object):
         self.ssh_thread = None
         self.auth_method = auth_method  #  'any', 'password', 'key_pair', 'ssh_agent'
         self.private_key_path = private_key_path
+        self.compress = compress  # SSH transport compression; pays off for large responses over slow links
         self.on_connection_broken_callback = on_connection_broken_callback
 
     def __del__(self):
@@ -205,6 +286,8 @@ class CrowndSSH(object):
 
     def connect(self) -> bool:
         import paramiko
+        from paramiko import AuthenticationException, PasswordRequiredException, SSHException
+        from paramiko.ssh_exception import BadAuthenticationType
         if self.ssh is None:
             self.ssh = paramiko.SSHClient()
             self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -214,21 +297,25 @@ class CrowndSSH(object):
         while True:
             try:
                 if self.auth_method == 'any':
-                    self.ssh.connect(self.host, port=int(self.port), username=self.username, password=password)
+                    self.ssh.connect(self.host, port=int(self.port), username=self.username, password=password,
+                                     compress=self.compress)
                 elif self.auth_method == 'password':
                     self.ssh.connect(self.host, port=int(self.port), username=self.username, password=password,
-                                     look_for_keys=False, allow_agent=False)
+                                     look_for_keys=False, allow_agent=False, compress=self.compress)
                 elif self.auth_method == 'key_pair':
                     if not self.private_key_path:
                         raise Exception('No RSA private key path was provided.')
 
                     self.ssh.connect(self.host, port=int(self.port), username=self.username, password=password,
-                                     key_filename=self.private_key_path, look_for_keys=False, allow_agent=False)
+                                     key_filename=self.private_key_path, look_for_keys=False, allow_agent=False,
+                                     compress=self.compress)
                 elif self.auth_method == 'ssh_agent':
                     self.ssh.connect(self.host, port=int(self.port), username=self.username, password=password,
-                                     look_for_keys=False, allow_agent=True)
+                                     look_for_keys=False, allow_agent=True, compress=self.compress)
 
                 self.connected = True
+                # keep the transport (and the tunnel channels) alive through idle periods
+                self.ssh.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL_SECONDS)
                 if password:
                     SshPassCache.save_password(self.username, self.host, password)
                 break
@@ -392,10 +479,88 @@ class CrowndIndexException(JSONRPCException):
                        'Changing these parameters requires to execute crownd with "-reindex" option (linux: ./crownd -reindex)'
 
 
-def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching_conns=True):
+class ConnectionStats(object):
+    """ Counters of the RPC requests and of the connections opened to serve them. """
+    def __init__(self):
+        self.requests = 0
+        self.http_connections = 0
+        self.ssh_tunnels = 0
+
+    def get_reuse_rate(self) -> float:
+        """ :return: the fraction of requests sent over an already open http connection """
+        if not self.requests:
+            return 0.0
+        return max(0, self.requests - self.http_connections) / self.requests
+
+    def __str__(self):
+        return f'requests: {self.requests}, http connections: {self.http_connections}, ' \
+               f'ssh tunnels: {self.ssh_tunnels}, connection reuse rate: {self.get_reuse_rate() * 100:.1f}%'
+
+
+class CountingConnectionMixin(object):
+    """ Counts the connects and requests of http.client connections into a ConnectionStats object. """
+    stats: Optional[ConnectionStats] = None
+
+    def connect(self):
+        super().connect()
+        if self.stats:
+            self.stats.http_connections += 1
+
+    def request(self, *args, **kwargs):
+        if self.stats:
+            self.stats.requests += 1
+        super().request(*args, **kwargs)
+
+
+class CountingHTTPConnection(CountingConnectionMixin, httplib.HTTPConnection):
+    pass
+
+
+class CountingHTTPSConnection(CountingConnectionMixin, httplib.HTTPSConnection):
+    pass
+
+
+def node_connection_errors() -> tuple:
+    """
+    Returns the exception types raised by a not functioning node. paramiko is imported only when an SSH connection
+    is used, so its exception type is included only if it has been loaded.
+    """
+    errors = (socket.gaierror, ConnectionRefusedError, TimeoutError, socket.timeout)
+    ssh_exceptions = sys.modules.get('paramiko.ssh_exception')
+    if ssh_exceptions:
+        errors += (ssh_exceptions.NoValidConnectionsError,)
+    return errors
+
+
+def create_http_conn(use_ssl: bool, host: str, port, timeout: int, stats: Optional[ConnectionStats] = None) -> \
+        httplib.HTTPConnection:
+    if use_ssl:
+        conn = CountingHTTPSConnection(host, port, timeout=timeout, context=ssl._create_unverified_context())
+    else:
+        conn = CountingHTTPConnection(host, port, timeout=timeout)
+    conn.stats = stats
+    return conn
+
+
+def get_rpc_url(cfg: 'CrownNetworkConnectionCfg') -> str:
+    """ Returns the url of a direct (not tunneled) RPC connection. """
+    return ('https://' if cfg.use_ssl else 'http://') + cfg.username + ':' + cfg.password + '@' + cfg.host + ':' + \
+        str(cfg.port)
+
+
+def is_hedgeable_rpc_call(command: str, args) -> bool:
+    if command in NON_HEDGEABLE_RPC_CALLS:
+        return False
+    subcommand = args[0] if args and isinstance(args[0], str) else None
+    return (command, None) in HEDGEABLE_RPC_CALLS or (command, subcommand) in HEDGEABLE_RPC_CALLS
+
+
+def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching_conns=True, allow_hedging=False):
     """
     Decorator dedicated to functions related to RPC calls, taking care of switching an active connection if the
     current one becomes faulty. It also performs argument encryption for configured RPC calls.
+    :param allow_hedging: if True and hedging is enabled in the configuration, read-only calls made through
+        CrowndInterface.hedged_proxy are repeated to a second node when the current one is late with the answer
     """
 
     def control_rpc_call_inner(func):
@@ -408,7 +573,14 @@ def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching
             self.mark_call_begin()
             try:
                 self.http_lock.acquire()
-                last_conn_reset_time = None
+                self.rpc_call_level += 1
+                if self.rpc_call_level == 1:
+                    if self.preferred_conn_def:
+                        self.switch_to_preferred_config()
+                    self.hedging_active = allow_hedging and self.app_config.hedge_rpc_calls and \
+                        not encrypt_rpc_arguments
+                    self.drop_idle_http_conn()
+                conn_reset_count = 0
                 for try_nr in range(1, 5):
                     try:
                         try:
@@ -448,15 +620,17 @@ def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching
                             # this exceptions occur usually when the established connection gets disconnected after
                             # some time of inactivity; try to reconnect within the same connection configuration
                             log.warning('Error while calling of "' + str(func) + ' (1)". Details: ' + str(e))
-                            if last_conn_reset_time:
+                            if conn_reset_count >= 2:
                                 raise CrowndConnectionError(e)  # switch to another config if possible
+                            last_exception = e
+                            conn_reset_count += 1
+                            if conn_reset_count == 1 and self.http_conn:
+                                # first, reopen only the http connection, reusing the SSH tunnel if there is any
+                                self.http_conn.close()
                             else:
-                                last_exception = e
-                                last_conn_reset_time = time.time()
                                 self.reset_connection()  # retry with the same connection
 
-                        except (socket.gaierror, ConnectionRefusedError, TimeoutError, socket.timeout,
-                                NoValidConnectionsError) as e:
+                        except node_connection_errors() as e:
                             # exceptions raised most likely by not functioning crownd node; try to switch to another node
                             # if there is any in the config
                             log.warning('Error while calling of "' + str(func) + ' (3)". Details: ' + str(e))
@@ -465,7 +639,9 @@ def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching
                         except JSONRPCException as e:
                             log.error('Error while calling of "' + str(func) + ' (2)". Details: ' + str(e))
                             err_message = e.error.get('message','').lower()
-                            self.http_conn.close()
+                            if e.code in (-342, -343):
+                                # the http response hasn't been read to the end, so the connection can't be reused
+                                self.http_conn.close()
                             if e.code == -5 and e.message == 'No information available for address':
                                 raise CrowndIndexException(e)
                             elif err_message.find('502 bad gateway') >= 0 or err_message.find('unknown error') >= 0:
@@ -486,6 +662,11 @@ def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching
                     except Exception:
                         raise
             finally:
+                self.rpc_call_level -= 1
+                if self.rpc_call_level == 0:
+                    self.hedging_active = False
+                    self.http_conn_last_use_time = time.time()
+                    self.log_connection_stats()
                 self.http_lock.release()
 
             if last_exception:
@@ -566,6 +747,320 @@ def json_cache_wrapper(func, intf, cache_file_ident, skip_cache=False,
     return json_call_wrapper
 
 
+
+class HedgedProxy(object):
+    """
+    Drop-in replacement of AuthServiceProxy for read-only calls: each call goes through
+    CrowndInterface.hedged_call, which decides whether it can be hedged.
+    """
+    def __init__(self, crownd_intf: 'CrowndInterface'):
+        self.crownd_intf = crownd_intf
+
+    def __getattr__(self, name):
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+        return functools.partial(self.crownd_intf.hedged_call, name)
+
+
+class ConnectionHealthProber(object):
+    """
+    Background service measuring the round-trip time, the block height lag and the synchronization status of
+    each enabled RPC connection, so that the calls go to the healthiest node instead of switching only after
+    a call has failed. Connections using SSH tunnels are not probed, since opening a tunnel can require the user
+    to enter a password - their health is updated by the regular RPC calls.
+    """
+    def __init__(self, crownd_intf: 'CrowndInterface', interval: int = CONN_HEALTH_PROBE_INTERVAL_SECONDS):
+        self.crownd_intf = crownd_intf
+        self.interval = interval
+        self.__thread: Optional[threading.Thread] = None
+        self.__finish_event = threading.Event()
+
+    def start(self):
+        if not self.__thread or not self.__thread.is_alive():
+            self.__finish_event.clear()
+            self.__thread = threading.Thread(target=self.run, name='ConnectionHealthProber', daemon=True)
+            self.__thread.start()
+
+    def stop(self):
+        self.__finish_event.set()
+
+    def run(self):
+        log.debug('Started ConnectionHealthProber')
+        while not self.__finish_event.is_set():
+            try:
+                # there is no choice to make with only one connection configured
+                if len(self.crownd_intf.connections) > 1:
+                    self.probe_connections()
+            except Exception:
+                log.exception('Error while probing connections')
+            self.__finish_event.wait(self.interval)
+        log.debug('Finished ConnectionHealthProber')
+
+    def probe_connection(self, cfg: 'CrownNetworkConnectionCfg') -> Tuple[float, int, bool]:
+        """
+        :return: Tuple[float <round-trip time in seconds>, int <block height>, bool <node synchronized>]
+        """
+        http_conn = create_http_conn(cfg.use_ssl, cfg.host, cfg.port, CONN_HEALTH_PROBE_TIMEOUT_SECONDS)
+        proxy = AuthServiceProxy(get_rpc_url(cfg), timeout=CONN_HEALTH_PROBE_TIMEOUT_SECONDS, connection=http_conn)
+        try:
+            time_begin = time.time()
+            block_height = proxy.getblockcount()
+            rtt = time.time() - time_begin
+            try:
+                synced = proxy.mnsync('status').get('IsSynced', False)
+            except JSONRPCException:
+                synced = True  # mnsync is not exposed by http proxies
+            return rtt, block_height, synced
+        finally:
+            http_conn.close()
+
+    def probe_connections(self):
+        app_config = self.crownd_intf.app_config
+        results = {}
+        for cfg in list(self.crownd_intf.connections):
+            if self.__finish_event.is_set():
+                return
+            if cfg.use_ssh_tunnel:
+                continue
+            try:
+                results[cfg] = self.probe_connection(cfg)
+                log.debug('Probed connection %s: rtt: %.3fs, block height: %s, synced: %s', cfg.get_description(),
+                          *results[cfg])
+            except Exception as e:
+                log.info('Connection %s failed the health probe: %s', cfg.get_description(), str(e))
+                app_config.add_conn_health_failure(cfg)
+
+        if results:
+            best_height = max(height for _, height, _ in results.values())
+            for cfg, (rtt, height, synced) in results.items():
+                app_config.set_conn_health(cfg, rtt, best_height - height, synced)
+        app_config.save_conn_health()
+        self.crownd_intf.apply_connection_ranking()
+
+
+class MempoolWatcher(object):
+    """
+    Background service tracking the mempool of the currently connected RPC node. Each iteration compares
+    the current getrawmempool snapshot with the previous one, so only transactions that have just entered or
+    left the mempool are resolved. Transactions related to any of the addresses watched by a subscriber are
+    published to that subscriber as MEMPOOL_TX_ADDED/MEMPOOL_TX_CONFIRMED/MEMPOOL_TX_EVICTED events.
+    """
+    def __init__(self, crownd_intf: 'CrowndInterface', interval: int = MEMPOOL_WATCH_INTERVAL_SECONDS):
+        self.crownd_intf = crownd_intf
+        self.interval = interval
+        self.lock = threading.RLock()
+        self.last_snapshot: Set[str] = set()
+        # connection the last snapshot has been taken from; the snapshots of different nodes aren't comparable
+        self.snapshot_conn_def = None
+
+        # subscribers: weak reference to the callback method and the set of addresses watched by the subscriber;
+        # weak references let short-lived wallet objects go without explicit unsubscribing
+        self.__subscribers: List[Tuple[weakref.WeakMethod, Set[str]]] = []
+
+        # addresses involved in the mempool transactions resolved so far -> set of related txids
+        self.__txids_by_address: Dict[str, Set[str]] = {}
+        self.__addresses_by_txid: Dict[str, List[str]] = {}
+
+        self.__thread: Optional[threading.Thread] = None
+        self.__finish_event = threading.Event()
+
+    def subscribe(self, callback: Callable[[int, str, Optional[Dict]], None]):
+        with self.lock:
+            if self.get_watched_addresses(callback) is None:
+                self.__subscribers.append((weakref.WeakMethod(callback), set()))
+        self.start()
+
+    def unsubscribe(self, callback: Callable[[int, str, Optional[Dict]], None]):
+        with self.lock:
+            self.__subscribers = [(cb_ref, watched) for cb_ref, watched in self.__subscribers
+                                  if cb_ref() is not None and cb_ref() != callback]
+            if not self.__subscribers:
+                self.reset_snapshot()
+
+    def get_watched_addresses(self, callback: Callable[[int, str, Optional[Dict]], None]) -> Optional[Set[str]]:
+        for cb_ref, watched in self.__subscribers:
+            if cb_ref() == callback:
+                return watched
+        return None
+
+    def watch_addresses(self, callback: Callable[[int, str, Optional[Dict]], None], addresses: Iterable[str]):
+        """
+        Adds addresses to the set watched by a subscriber. Mempool transactions already resolved for the newly
+        added addresses are published to the subscriber immediately.
+        """
+        with self.lock:
+            watched = self.get_watched_addresses(callback)
+            if watched is None:
+                return
+            txids = set()
+            for address in addresses:
+                if address and address not in watched:
+                    watched.add(address)
+                    txids.update(self.__txids_by_address.get(address, ()))
+            for txid in txids:
+                tx_json = self.crownd_intf.mempool_txes.get(txid)
+                if tx_json:
+                    self.publish(MEMPOOL_TX_ADDED, txid, tx_json, [callback])
+
+    def clear_addresses(self, callback: Callable[[int, str, Optional[Dict]], None]):
+        with self.lock:
+            watched = self.get_watched_addresses(callback)
+            if watched is not None:
+                watched.clear()
+
+    def reset_snapshot(self):
+        """
+        Forgets the last mempool snapshot, so that the next check doesn't report as gone transactions which
+        have left the mempool while nobody was watching.
+        """
+        with self.lock:
+            for txid in self.last_snapshot:
+                self.forget_tx(txid)
+            self.last_snapshot = set()
+            self.snapshot_conn_def = None
+
+    def start(self):
+        """ Starts the watcher thread if there is anyone to publish the mempool events to. """
+        with self.lock:
+            if not self.__subscribers:
+                return
+            self.__finish_event.clear()
+            if not self.__thread:
+                self.__thread = threading.Thread(target=self.run, name='MempoolWatcher', daemon=True)
+                self.__thread.start()
+
+    def stop(self):
+        with self.lock:
+            self.__finish_event.set()
+            self.reset_snapshot()
+
+    def run(self):
+        log.debug('Started MempoolWatcher')
+        while True:
+            with self.lock:
+                self.__subscribers = [(cb_ref, watched) for cb_ref, watched in self.__subscribers
+                                      if cb_ref() is not None]
+                # the decision to finish is made under the lock, so start() can't miss the thread exiting
+                if self.__finish_event.is_set() or not self.__subscribers:
+                    self.reset_snapshot()
+                    self.__thread = None
+                    break
+
+            # don't initiate a new connection from the background - wait for the app to do it
+            if self.crownd_intf.active:
+                try:
+                    self.check_mempool()
+                except Exception as e:
+                    log.warning('Error while checking mempool: ' + str(e))
+            self.__finish_event.wait(self.interval)
+        log.debug('Finished MempoolWatcher')
+
+    def get_tx_addresses(self, tx_json: Dict) -> List[str]:
+        addresses = []
+        for vout in tx_json.get('vout', []):
+            addresses.extend(vout.get('scriptPubKey', {}).get('addresses', []))
+        for vin in tx_json.get('vin', []):
+            addr = vin.get('address')
+            if addr:
+                addresses.append(addr)
+        return addresses
+
+    def get_subscribers_for_addresses(self, addresses: List[str]) -> List[Callable]:
+        subscribers = []
+        for cb_ref, watched in self.__subscribers:
+            callback = cb_ref()
+            if callback is not None and not watched.isdisjoint(addresses):
+                subscribers.append(callback)
+        return subscribers
+
+    def publish(self, event: int, txid: str, tx_json: Optional[Dict], subscribers: List[Callable]):
+        for callback in subscribers:
+            try:
+                callback(event, txid, tx_json)
+            except Exception:
+                log.exception('Exception in mempool subscriber callback')
+
+    def forget_tx(self, txid: str) -> List[str]:
+        """ Removes a transaction from the address mappings; returns the addresses the transaction involved. """
+        with self.lock:
+            addresses = self.__addresses_by_txid.pop(txid, [])
+            for address in addresses:
+                txids = self.__txids_by_address.get(address)
+                if txids is not None:
+                    txids.discard(txid)
+                    if not txids:
+                        del self.__txids_by_address[address]
+            self.crownd_intf.mempool_txes.pop(txid, None)
+            return addresses
+
+    def check_mempool(self):
+        conn_def = self.crownd_intf.cur_conn_def
+        snapshot = set(self.crownd_intf.getrawmempool())
+        if self.crownd_intf.cur_conn_def != conn_def:
+            # the connection has been switched during the call; it's unknown which node the snapshot comes from
+            return
+
+        with self.lock:
+            new_txids = snapshot - self.last_snapshot
+            if conn_def == self.snapshot_conn_def:
+                gone_txids = self.last_snapshot - snapshot
+            else:
+                # the previous snapshot comes from another node: the transactions missing in the current node's
+                # mempool haven't necessarily left the network's mempool, so just start over from the new snapshot
+                for txid in self.last_snapshot - snapshot:
+                    self.forget_tx(txid)
+                gone_txids = set()
+                self.snapshot_conn_def = conn_def
+            self.last_snapshot = snapshot
+
+        for txid in new_txids:
+            if self.__finish_event.is_set():
+                break
+            try:
+                tx_json = self.crownd_intf.mempool_txes.get(txid)
+                if not tx_json:
+                    tx_json = self.crownd_intf.getrawtransaction(txid, 1, skip_cache=True)
+            except Exception as e:
+                # the transaction could have been removed from mempool in the meantime
+                log.debug('Cannot resolve mempool transaction %s: %s', txid, str(e))
+                with self.lock:
+                    self.last_snapshot.discard(txid)
+                continue
+
+            addresses = self.get_tx_addresses(tx_json)
+            with self.lock:
+                self.crownd_intf.mempool_txes[txid] = tx_json
+                self.__addresses_by_txid[txid] = addresses
+                for address in addresses:
+                    self.__txids_by_address.setdefault(address, set()).add(txid)
+                subscribers = self.get_subscribers_for_addresses(addresses)
+            if subscribers:
+                self.publish(MEMPOOL_TX_ADDED, txid, tx_json, subscribers)
+
+        for txid in gone_txids:
+            with self.lock:
+                addresses = self.forget_tx(txid)
+                subscribers = self.get_subscribers_for_addresses(addresses)
+
+            if subscribers:
+                # the transaction left the mempool: it has been either included in a block or evicted; the
+                # eviction is reported only if the node doesn't know the transaction at all, since a hedged
+                # call can be answered by a node which still has it in its mempool
+                try:
+                    tx_json = self.crownd_intf.getrawtransaction(txid, 1, skip_cache=True)
+                except JSONRPCException as e:
+                    if e.code == -5:  # no such mempool or blockchain transaction
+                        self.publish(MEMPOOL_TX_EVICTED, txid, None, subscribers)
+                    else:
+                        log.debug('Cannot check the state of transaction %s: %s', txid, str(e))
+                    continue
+                except Exception as e:
+                    log.debug('Cannot check the state of transaction %s: %s', txid, str(e))
+                    continue
+                if tx_json and tx_json.get('height'):
+                    self.publish(MEMPOOL_TX_CONFIRMED, txid, tx_json, subscribers)
+
+
 class CrowndInterface(WndUtils):
     def __init__(self, window,
                  on_connection_initiated_callback=None,
@@ -594,6 +1089,7 @@ class CrowndInterface(WndUtils):
         self.active = False
         self.rpc_url = None
         self.proxy = None
+        self.proxy_stream: Optional[StreamingAuthServiceProxy] = None  # for calls with large responses
         self.http_conn = None  # HTTPConnection object passed to the AuthServiceProxy (for convinient connection reset)
         self.on_connection_initiated_callback = on_connection_initiated_callback
         self.on_connection_failed_callback = on_connection_failed_callback
@@ -601,9 +1097,26 @@ class CrowndInterface(WndUtils):
         self.on_connection_disconnected_callback = on_connection_disconnected_callback
         self.last_error_message = None
         self.mempool_txes:Dict[str, Dict] = {}
+        self.mempool_watcher: Optional[MempoolWatcher] = None
+        self.health_prober = ConnectionHealthProber(self)
+        self.preferred_conn_def: Optional['CrownNetworkConnectionCfg'] = None  # healthier conn to switch to
+        self.switch_candidate: Optional['CrownNetworkConnectionCfg'] = None  # conn found healthier by the last probes
+        self.switch_candidate_probes = 0  # number of consecutive probes in which switch_candidate was healthier
+        self.rpc_call_level = 0  # nesting level of the RPC calls being executed
+        self.hedged_proxy = HedgedProxy(self)
+        self.hedging_active = False
+        self.rpc_latencies: Dict[str, deque] = {}  # recent durations of the read-only calls, by command
+        self.rpc_conn_params = None  # (use_ssl, host, port) of the current http connection
+        self.http_conn_last_use_time = 0.0
+        self.conn_stats = ConnectionStats()
+        self.conn_stats_logged_requests = 0
         self.http_lock = threading.RLock()
+        # cleared while the masternode data are being loaded from the db cache
+        self.db_cache_loaded = threading.Event()
+        self.db_cache_loaded.set()
 
-    def initialize(self, config: AppConfig, connection=None, for_testing_connections_only=False):
+    def initialize(self, config: AppConfig, connection=None, for_testing_connections_only=False,
+                   load_db_cache=True):
         self.app_config = config
         self.app_config = config
         self.app_config = config
@@ -624,12 +1137,21 @@ class CrowndInterface(WndUtils):
             self.cur_conn_def = None
 
         if not for_testing_connections_only:
-            self.load_data_from_db_cache()
+            if load_db_cache:
+                self.load_data_from_db_cache()
+            else:
+                # the caller loads the cache later on (in the background); until then get_masternodelist waits
+                # for it, so that the data read from the network aren't overwritten by the cached ones
+                self.db_cache_loaded.clear()
+            self.health_prober.start()
 
     def load_data_from_db_cache(self):
-        self.masternodes.clear()
-        self.masternodes_by_ident.clear()
-        self.masternodes_by_ip_port.clear()
+        # the data are loaded into new containers, replacing the current ones at the end, so this method can run
+        # in a background thread
+        masternodes = []
+        masternodes_by_ident = {}
+        masternodes_by_ip_port = {}
+        self.db_cache_loaded.clear()
         cur = self.db_intf.get_cursor()
         cur2 = self.db_intf.get_cursor()
         db_modified = False
@@ -644,7 +1166,7 @@ class CrowndInterface(WndUtils):
                 ident = row[1]
 
                 # correct duplicated masternodes issue
-                mn_first = self.masternodes_by_ident.get(ident)
+                mn_first = masternodes_by_ident.get(ident)
                 if mn_first is not None:
                     continue
 
@@ -666,10 +1188,13 @@ class CrowndInterface(WndUtils):
                 mn.lastpaidblock = row[7]
                 mn.ip = row[8]
                 mn.queue_position = row[9]
-                self.masternodes.append(mn)
-                self.masternodes_by_ident[mn.ident] = mn
-                self.masternodes_by_ip_port[mn.ip] = mn
+                masternodes.append(mn)
+                masternodes_by_ident[mn.ident] = mn
+                masternodes_by_ip_port[mn.ip] = mn
 
+            self.masternodes = masternodes
+            self.masternodes_by_ident = masternodes_by_ident
+            self.masternodes_by_ip_port = masternodes_by_ip_port
             tm_diff = time.time() - tm_start
             log.info('DB read time of %d MASTERNODES: %s s, db fix time: %s' %
                          (len(self.masternodes), str(tm_diff), str(db_correction_duration)))
@@ -680,6 +1205,7 @@ class CrowndInterface(WndUtils):
                 self.db_intf.commit()
             self.db_intf.release_cursor()
             self.db_intf.release_cursor()
+            self.db_cache_loaded.set()
 
     def reload_configuration(self):
         """Called after modification of connections' configuration or changes having impact on the file name
@@ -698,6 +1224,9 @@ class CrowndInterface(WndUtils):
     def disconnect(self):
         if self.active:
             log.debug('Disconnecting')
+            log.info('RPC connection stats: %s', str(self.conn_stats))
+            if self.http_conn:
+                self.http_conn.close()
             if self.ssh:
                 self.ssh.disconnect()
                 del self.ssh
@@ -705,6 +1234,14 @@ class CrowndInterface(WndUtils):
             self.active = False
             if self.on_connection_disconnected_callback:
                 self.on_connection_disconnected_callback()
+        if self.mempool_watcher:
+            # the watcher is restarted for its subscribers after reconnecting, starting from a fresh snapshot
+            self.mempool_watcher.stop()
+
+    def get_mempool_watcher(self) -> MempoolWatcher:
+        if not self.mempool_watcher:
+            self.mempool_watcher = MempoolWatcher(self)
+        return self.mempool_watcher
 
     def mark_call_begin(self):
         self.starting_conn = self.cur_conn_def
@@ -736,6 +1273,175 @@ class CrowndInterface(WndUtils):
             log.warning('Failed to connect: no another connection configurations.')
             return False
 
+    def apply_connection_ranking(self):
+        """
+        Orders the probed connections by their health; if a connection has been healthier than the current one
+        for CONN_SWITCH_MIN_PROBES probes, the next RPC call will switch to it. A current connection that isn't
+        probed (SSH tunnel) can't be compared with the others, so it's never switched away from by the ranking.
+        """
+        with self.http_lock:
+            if self.connections is not self.app_config.active_crown_net_configs:
+                return  # connection being tested
+            self.app_config.order_conn_list_by_health()
+            if self.cur_conn_def in self.connections:
+                self.cur_conn_index = self.connections.index(self.cur_conn_def)
+
+            # the healthiest probed connection comes first among the probed ones
+            best = next((cfg for cfg in self.connections if self.app_config.is_conn_health_probed(cfg)), None)
+            candidate = None
+            if best and self.cur_conn_def and best != self.cur_conn_def and \
+                    self.app_config.is_conn_health_probed(self.cur_conn_def):
+                cur_rank = self.app_config.get_conn_health_rank(self.cur_conn_def)
+                cand_rank = self.app_config.get_conn_health_rank(best)
+                if cand_rank[0] == 0:
+                    if cur_rank[0] == 2:
+                        candidate = best
+                    elif cur_rank[0] == 0 and cur_rank[1] - cand_rank[1] > \
+                            max(CONN_SWITCH_MIN_GAIN_SECONDS, cur_rank[1] * CONN_SWITCH_MIN_GAIN_RATIO):
+                        candidate = best
+
+            if candidate and candidate == self.switch_candidate:
+                self.switch_candidate_probes += 1
+            else:
+                self.switch_candidate = candidate
+                self.switch_candidate_probes = 1 if candidate else 0
+            if candidate and self.switch_candidate_probes >= CONN_SWITCH_MIN_PROBES:
+                self.preferred_conn_def = candidate
+                self.switch_candidate = None
+                self.switch_candidate_probes = 0
+
+    def switch_to_preferred_config(self):
+        """ Switches to the connection found as healthier by the prober; called outside any RPC call. """
+        conn = self.preferred_conn_def
+        self.preferred_conn_def = None
+        if conn and conn != self.cur_conn_def and conn in self.connections:
+            log.info('Switching to a healthier connection: %s', conn.get_description())
+            self.disconnect()
+            self.cur_conn_index = self.connections.index(conn)
+            self.cur_conn_def = conn
+
+    def drop_idle_http_conn(self):
+        """
+        Closes the http connection if it has been idle for so long that the node has probably closed it on its side;
+        it's reopened (within the existing SSH tunnel, if any) by the next request.
+        """
+        if self.http_conn and self.http_conn.sock and \
+                time.time() - self.http_conn_last_use_time > HTTP_CONN_MAX_IDLE_SECONDS:
+            log.debug('Closing idle http connection')
+            self.http_conn.close()
+
+    def log_connection_stats(self):
+        if self.conn_stats.requests - self.conn_stats_logged_requests >= CONN_STATS_LOG_INTERVAL_CALLS:
+            self.conn_stats_logged_requests = self.conn_stats.requests
+            log.debug('RPC connection stats: %s', str(self.conn_stats))
+
+    def get_hedge_delay(self, command: str) -> float:
+        latencies = self.rpc_latencies.get(command)
+        if not latencies or len(latencies) < RPC_HEDGE_MIN_SAMPLES:
+            return RPC_HEDGE_DEFAULT_DELAY_SECONDS
+        latencies = sorted(latencies)
+        idx = min(len(latencies) - 1, int(len(latencies) * RPC_HEDGE_LATENCY_PERCENTILE / 100))
+        return max(RPC_HEDGE_MIN_DELAY_SECONDS, latencies[idx])
+
+    def add_rpc_latency(self, command: str, duration: float):
+        latencies = self.rpc_latencies.get(command)
+        if latencies is None:
+            latencies = deque(maxlen=RPC_HEDGE_LATENCY_SAMPLES)
+            self.rpc_latencies[command] = latencies
+        latencies.append(duration)
+
+    def get_hedge_conn_cfg(self) -> Optional['CrownNetworkConnectionCfg']:
+        """ Returns the healthiest connection, other than the current one, to which a call can be hedged. """
+        if self.connections is not self.app_config.active_crown_net_configs:
+            return None
+        for cfg in self.connections:
+            if cfg != self.cur_conn_def and not cfg.use_ssh_tunnel and \
+                    self.app_config.get_conn_health_rank(cfg)[0] < 2:
+                return cfg
+        return None
+
+    def renew_http_conn(self):
+        """
+        Replaces the http connection object with a new one to the same node, when the current one is still being
+        used by an abandoned call.
+        """
+        use_ssl, host, port = self.rpc_conn_params
+        self.http_conn = create_http_conn(use_ssl, host, port, 20, self.conn_stats)
+        self.proxy = AuthServiceProxy(self.rpc_url, timeout=1000, connection=self.http_conn)
+        self.proxy_stream = StreamingAuthServiceProxy(self.rpc_url, connection=self.http_conn, timeout=1000)
+
+    def hedged_call(self, command: str, *args):
+        """
+        Executes a read-only RPC call on the current node; if the node hasn't answered within the usual time
+        (the configured percentile of the recent durations of this call), the same call is sent to a second node
+        and the first successful answer is returned.
+        """
+        hedgeable = is_hedgeable_rpc_call(command, args)
+        hedge_cfg = self.get_hedge_conn_cfg() if hedgeable and self.hedging_active else None
+        if not hedge_cfg:
+            time_begin = time.time()
+            ret = self.proxy.__getattr__(command)(*args)
+            if hedgeable:
+                self.add_rpc_latency(command, time.time() - time_begin)
+            return ret
+
+        results = queue.Queue()
+        primary_conn = self.http_conn
+        primary_abandoned = threading.Event()
+
+        def call_primary():
+            time_begin = time.time()
+            try:
+                results.put(('primary', True, self.proxy.__getattr__(command)(*args), time.time() - time_begin))
+            except Exception as e:
+                results.put(('primary', False, e, 0))
+            if primary_abandoned.is_set():
+                primary_conn.close()
+
+        def call_hedge():
+            http_conn = create_http_conn(hedge_cfg.use_ssl, hedge_cfg.host, hedge_cfg.port, 20)
+            try:
+                proxy = AuthServiceProxy(get_rpc_url(hedge_cfg), timeout=1000, connection=http_conn)
+                results.put(('hedge', True, proxy.__getattr__(command)(*args), 0))
+            except Exception as e:
+                results.put(('hedge', False, e, 0))
+            finally:
+                http_conn.close()
+
+        threading.Thread(target=call_primary, name='RPCPrimaryCall', daemon=True).start()
+        hedge_started = False
+        pending = 1
+        primary_exception = None
+        while True:
+            try:
+                source, success, value, duration = \
+                    results.get(timeout=None if hedge_started else self.get_hedge_delay(command))
+            except queue.Empty:
+                log.info('The "%s" call is late, repeating it to %s', command, hedge_cfg.get_description())
+                threading.Thread(target=call_hedge, name='RPCHedgedCall', daemon=True).start()
+                hedge_started = True
+                pending += 1
+                continue
+
+            pending -= 1
+            if success:
+                if source == 'primary':
+                    self.add_rpc_latency(command, duration)
+                else:
+                    log.info('The "%s" call answered by %s', command, hedge_cfg.get_description())
+                    if pending:
+                        # the current connection object is still in use by the abandoned call
+                        primary_abandoned.set()
+                        self.renew_http_conn()
+                return value
+
+            if source == 'primary':
+                primary_exception = value
+            else:
+                log.warning('Hedged "%s" call failed: %s', command, str(value))
+            if not pending or (source == 'primary' and not hedge_started):
+                raise primary_exception if primary_exception else value
+
     def mark_cur_conn_cfg_is_ok(self):
         if self.cur_conn_def:
             self.app_config.conn_cfg_success(self.cur_conn_def)
@@ -759,8 +1465,7 @@ class CrowndInterface(WndUtils):
                             return False
                 except CancelException:
                     return False
-                except (socket.gaierror, ConnectionRefusedError, TimeoutError, socket.timeout,
-                        NoValidConnectionsError) as e:
+                except node_connection_errors() as e:
                     # exceptions raised by not likely functioning crownd node; try to switch to another node
                     # if there is any in the config
                     if not self.switch_to_next_config():
@@ -807,7 +1512,8 @@ class CrowndInterface(WndUtils):
                     self.ssh = CrowndSSH(self.cur_conn_def.ssh_conn_cfg.host, self.cur_conn_def.ssh_conn_cfg.port,
                                         self.cur_conn_def.ssh_conn_cfg.username,
                                         auth_method=self.cur_conn_def.ssh_conn_cfg.auth_method,
-                                        private_key_path=self.cur_conn_def.ssh_conn_cfg.private_key_path)
+                                        private_key_path=self.cur_conn_def.ssh_conn_cfg.private_key_path,
+                                        compress=self.app_config.ssh_tunnel_compression)
                 try:
                     log.debug('starting ssh.connect')
                     self.ssh.connect()
@@ -833,6 +1539,7 @@ class CrowndInterface(WndUtils):
                         self.ssh.open_tunnel(local_port,
                                              self.cur_conn_def.host,
                                              int(self.cur_conn_def.port))
+                        self.conn_stats.ssh_tunnels += 1
                         success = True
                         break
                     except Exception as e:
@@ -853,16 +1560,13 @@ class CrowndInterface(WndUtils):
                 rpc_user = self.cur_conn_def.username
                 rpc_password = self.cur_conn_def.password
 
-            if self.cur_conn_def.use_ssl:
-                self.rpc_url = 'https://'
-                self.http_conn = httplib.HTTPSConnection(rpc_host, rpc_port, timeout=5, context=ssl._create_unverified_context())
-            else:
-                self.rpc_url = 'http://'
-                self.http_conn = httplib.HTTPConnection(rpc_host, rpc_port, timeout=5)
-
+            self.rpc_conn_params = (self.cur_conn_def.use_ssl, rpc_host, rpc_port)
+            self.http_conn = create_http_conn(self.cur_conn_def.use_ssl, rpc_host, rpc_port, 5, self.conn_stats)
+            self.rpc_url = 'https://' if self.cur_conn_def.use_ssl else 'http://'
             self.rpc_url += rpc_user + ':' + rpc_password + '@' + rpc_host + ':' + str(rpc_port)
             log.debug('AuthServiceProxy configured to: %s' % self.rpc_url)
             self.proxy = AuthServiceProxy(self.rpc_url, timeout=1000, connection=self.http_conn)
+            self.proxy_stream = StreamingAuthServiceProxy(self.rpc_url, connection=self.http_conn, timeout=1000)
 
             try:
                 # check the connection
@@ -891,12 +1595,16 @@ class CrowndInterface(WndUtils):
                     log.exception('on_connection_try_fail_callback call exception')
                 raise
             finally:
-                log.debug('http_conn.close()')
-                self.http_conn.close()
-                # timeout hase been initially set to 5 seconds to perform 'quick' connection test
+                # timeout hase been initially set to 5 seconds to perform 'quick' connection test; the tested
+                # connection is left open for the following calls
                 self.http_conn.timeout = 20
+                if self.http_conn.sock:
+                    self.http_conn.sock.settimeout(20)
+                self.http_conn_last_use_time = time.time()
 
             self.active = True
+            if self.mempool_watcher:
+                self.mempool_watcher.start()
         return self.active
 
     def get_active_conn_description(self):
@@ -905,10 +1613,10 @@ class CrowndInterface(WndUtils):
         else:
             return '???'
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getblockcount(self):
         if self.open():
-            return self.proxy.getblockcount()
+            return self.hedged_proxy.getblockcount()
         else:
             raise Exception('Not connected')
 
@@ -967,8 +1675,7 @@ class CrowndInterface(WndUtils):
         if not self.protx_by_mn_ident or (int(time.time()) - last_read_time) >= PROTX_CACHE_VALID_SECONDS:
 
             self.protx_by_mn_ident.clear()
-            protx_list = self.proxy.protx('list', 'registered', True)
-            for protx in protx_list:
+            for _, protx in self.proxy_stream.iter_result('protx', 'list', 'registered', True):
                 ident = protx.get('collateralHash') + '-' + str(protx.get('collateralIndex'))
                 s = protx.get('state',{})
                 p = {
@@ -1015,7 +1722,6 @@ class CrowndInterface(WndUtils):
             if mn.status == 'ENABLED':
                 mn.queue_position = payment_queue.index(mn)
 
-    @control_rpc_call
     def get_masternodelist(self, *args, data_max_age=MASTERNODES_CACHE_VALID_SECONDS,
                            protx_data_max_age=PROTX_CACHE_VALID_SECONDS) -> List[Masternode]:
         """
@@ -1026,16 +1732,24 @@ class CrowndInterface(WndUtils):
             value of 0 forces reading of the new data from the network
         :return: list of Masternode objects, matching the 'args' arguments
         """
-        def parse_mns(mns: Dict[str, Dict]) -> List[Masternode]:
+        # the masternode data being loaded from the db cache in the background mustn't overwrite the data read
+        # from the network; waiting is done before acquiring http_lock, so other RPC calls aren't held up
+        if not self.db_cache_loaded.wait(MASTERNODES_DB_CACHE_WAIT_SECONDS):
+            log.warning('Timeout while waiting for the masternode data to be loaded from the db cache')
+        return self._get_masternodelist(*args, data_max_age=data_max_age, protx_data_max_age=protx_data_max_age)
+
+    @control_rpc_call
+    def _get_masternodelist(self, *args, data_max_age, protx_data_max_age) -> List[Masternode]:
+        def parse_mns(mns: Iterable[Tuple[str, Dict]]) -> List[Masternode]:
             """
-            Parses dictionary of strings returned from the RPC to Masternode object list.
-            :param mns: Dict of masternodes in format of RPC masternodelist command
+            Parses masternode entries returned from the RPC to Masternode object list.
+            :param mns: (ident, masternode json) pairs in format of RPC masternodelist command; entries are
+                converted one by one while the response is being decoded
             :return: list of Masternode object
             """
             self.read_protx_list()
             ret_list = []
-            for mn_id in mns.keys():
-                mn_json = mns.get(mn_id)
+            for mn_id, mn_json in mns:
                 mn = Masternode()
                 mn.status = mn_json.get('status')
                 mn.payee = mn_json.get('payee')
@@ -1063,8 +1777,7 @@ class CrowndInterface(WndUtils):
                    int(time.time()) - last_read_time < data_max_age:
                     return self.masternodes
                 else:
-                    mns = self.proxy.masternodelist(*args)
-                    mns = parse_mns(mns)
+                    mns = parse_mns(self.proxy_stream.iter_result('masternodelist', *args))
                     self.update_mn_queue_values(mns)
 
                     # mark already cached masternodes to identify those to delete
@@ -1095,7 +1808,7 @@ class CrowndInterface(WndUtils):
                                         "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
                                         (mn.ident, mn.status, mn.payee, mn.lastseen,
                                          mn.activeseconds, mn.lastpaidtime, mn.lastpaidblock, mn.ip, mn.protx_hash,
-                                         mn.registered_height, 1, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                         mn.registered_height, 1, int(time.time()),
                                          mn.queue_position))
                                     mn.db_id = cur.lastrowid
                                     db_modified = True
@@ -1134,7 +1847,7 @@ class CrowndInterface(WndUtils):
                                 if self.db_intf.db_active:
                                     cur.execute("UPDATE MASTERNODES set cmt_active=0, cmt_deactivation_time=?"
                                                 "WHERE ID=?",
-                                                (datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), mn.db_id))
+                                                (int(time.time()), mn.db_id))
                                     db_modified = True
                                 self.masternodes_by_ident.pop(mn.ident,0)
                                 del self.masternodes[mn_index]
@@ -1154,29 +1867,31 @@ class CrowndInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getaddressbalance(self, addresses):
         if self.open():
-            return self.proxy.getaddressbalance({'addresses': addresses})
+            return self.hedged_proxy.getaddressbalance({'addresses': addresses})
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getaddressutxos(self, addresses):
         if self.open():
-            return self.proxy.getaddressutxos({'addresses': addresses})
+            return self.hedged_proxy.getaddressutxos({'addresses': addresses})
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getaddressmempool(self, addresses):
         if self.open():
-            return self.proxy.getaddressmempool({'addresses': addresses})
+            return self.hedged_proxy.getaddressmempool({'addresses': addresses})
         else:
             raise Exception('Not connected')
 
     @control_rpc_call
     def getrawmempool(self):
+        # not hedged: the mempool snapshots of different nodes differ, so a snapshot from another node would
+        # make the transactions it's missing look as if they have left the mempool
         if self.open():
             cur_mempool_txes = self.proxy.getrawmempool()
 
@@ -1192,7 +1907,7 @@ class CrowndInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getrawtransaction(self, txid, verbose, skip_cache=False):
 
         def check_if_tx_confirmed(tx_json):
@@ -1202,41 +1917,41 @@ class CrowndInterface(WndUtils):
             return False
 
         if self.open():
-            tx_json = json_cache_wrapper(self.proxy.getrawtransaction, self, 'tx-' + str(verbose) + '-' + txid,
-                                         skip_cache=skip_cache, accept_cache_data_fun=check_if_tx_confirmed)\
-                (txid, verbose)
+            tx_json = json_cache_wrapper(self.hedged_proxy.getrawtransaction, self,
+                                         'tx-' + str(verbose) + '-' + txid, skip_cache=skip_cache,
+                                         accept_cache_data_fun=check_if_tx_confirmed)(txid, verbose)
 
             return tx_json
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getblockhash(self, blockid, skip_cache=False):
         if self.open():
-            return json_cache_wrapper(self.proxy.getblockhash, self, 'blockhash-' + str(blockid),
+            return json_cache_wrapper(self.hedged_proxy.getblockhash, self, 'blockhash-' + str(blockid),
                                       skip_cache=skip_cache)(blockid)
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getblockheader(self, blockhash, skip_cache=False):
         if self.open():
-            return json_cache_wrapper(self.proxy.getblockheader, self, 'blockheader-' + str(blockhash),
+            return json_cache_wrapper(self.hedged_proxy.getblockheader, self, 'blockheader-' + str(blockhash),
                                       skip_cache=skip_cache)(blockhash)
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def validateaddress(self, address):
         if self.open():
-            return self.proxy.validateaddress(address)
+            return self.hedged_proxy.validateaddress(address)
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def decoderawtransaction(self, rawtx):
         if self.open():
-            return self.proxy.decoderawtransaction(rawtx)
+            return self.hedged_proxy.decoderawtransaction(rawtx)
         else:
             raise Exception('Not connected')
 
@@ -1247,17 +1962,17 @@ class CrowndInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getcurrentvotes(self, hash):
         if self.open():
-            return self.proxy.getcurrentvotes(hash)
+            return self.hedged_proxy.getcurrentvotes(hash)
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def gobject(self, *args):
         if self.open():
-            return self.proxy.gobject(*args)
+            return self.hedged_proxy.gobject(*args)
         else:
             raise Exception('Not connected')
 
@@ -1268,17 +1983,17 @@ class CrowndInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getgovernanceinfo(self):
         if self.open():
-            return self.proxy.getgovernanceinfo()
+            return self.hedged_proxy.getgovernanceinfo()
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getsuperblockbudget(self, block_index):
         if self.open():
-            return self.proxy.getsuperblockbudget(block_index)
+            return self.hedged_proxy.getsuperblockbudget(block_index)
         else:
             raise Exception('Not connected')
 
@@ -1290,17 +2005,42 @@ class CrowndInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
+    @control_rpc_call(allow_switching_conns=False)
+    def voteraw_batch(self, votes: List[Tuple]) -> List[Tuple[Any, Optional[str]]]:
+        """
+        Sends many votes in a single JSON-RPC batch request. The request isn't repeated automatically once it has
+        been sent, because the node could have already applied the votes.
+        :param votes: list of tuples with the voteraw arguments (masternode_tx_hash, masternode_tx_index,
+            governance_hash, vote_signal, vote, sig_time, vote_sig)
+        :return: list of tuples (result, error message), in the order of 'votes'; the error message is None if
+            the call succeeded
+        :raises JSONRPCException: the node (or a proxy in front of it) has rejected the batch request as a whole
+        :raises CrowndRequestSentError: the connection failed after the request had been sent
+        """
+        if self.open():
+            try:
+                return self.proxy_stream.batch([('voteraw', args) for args in votes])
+            except JSONRPCException:
+                raise
+            except Exception as e:
+                if self.proxy_stream.request_sent:
+                    # not a connection error for control_rpc_call, so it doesn't retry the request
+                    raise CrowndRequestSentError(e)
+                raise
+        else:
+            raise Exception('Not connected')
+
     @control_rpc_call
     def getaddressdeltas(self, *args):
         if self.open():
-            return self.proxy.getaddressdeltas(*args)
+            return [delta for _, delta in self.proxy_stream.iter_result('getaddressdeltas', *args)]
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getaddresstxids(self, *args):
         if self.open():
-            return self.proxy.getaddresstxids(*args)
+            return self.hedged_proxy.getaddresstxids(*args)
         else:
             raise Exception('Not connected')
 
@@ -1317,31 +2057,46 @@ class CrowndInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
+    @control_rpc_call
+    def rpc_call_stream(self, record_fun: Callable[[Any, Any], None], command: str, *args,
+                        parse_float: Callable[[str], Any] = decimal.Decimal):
+        """
+        Calls an RPC command with a large response, which is decoded incrementally: 'record_fun' is called with
+        (key, value) for each member of the result object (or (index, value) for a result array) as soon as it
+        arrives. If the call is repeated after a connection error, 'record_fun' can get the same records again.
+        :param parse_float: use rpc_stream.parse_amount_satoshis to get amounts as integer satoshis
+        """
+        if self.open():
+            for key, value in self.proxy_stream.iter_result(command, *args, parse_float=parse_float):
+                record_fun(key, value)
+        else:
+            raise Exception('Not connected')
+
     def rpc_call(self, encrypt_rpc_arguments: bool, allow_switching_conns: bool, command: str, *args):
         def call_command(self, *args):
-            c = self.proxy.__getattr__(command)
+            c = self.hedged_proxy.__getattr__(command)
             return c(*args)
 
         if self.open():
             call_command.__setattr__('__name__', command)
             fun = control_rpc_call(call_command, encrypt_rpc_arguments=encrypt_rpc_arguments,
-                                   allow_switching_conns=allow_switching_conns)
+                                   allow_switching_conns=allow_switching_conns, allow_hedging=True)
             c = fun(self, *args)
             return c
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def listaddressbalances(self, minfee):
         if self.open():
-            return self.proxy.listaddressbalances(minfee)
+            return self.hedged_proxy.listaddressbalances(minfee)
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(allow_hedging=True)
     def getblockchaininfo(self):
         if self.open():
-            return self.proxy.getblockchaininfo()
+            return self.hedged_proxy.getblockchaininfo()
         else:
             raise Exception('Not connected')
 
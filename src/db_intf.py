@@ -7,7 +7,7 @@ import os
 import sqlite3
 import logging
 import threading
-from typing import List
+from typing import List, Callable, Tuple
 import thread_utils
 
 
@@ -128,156 +128,290 @@ class DBCache(object):
         else:
             log.warning('Cannot commit if db_active is False.')
 
-    def create_structures(self):
-        try:
+    def create_structures(self, force: bool = False):
+        """
+        Brings the database schema up to date. The schema version is kept in the 'user_version' pragma of each
+        database file, so opening a current database costs just reading it; each pending migration is executed once,
+        in its own transaction.
+        :param force: execute all the migrations regardless of the schema version (used after dropping some of
+            the cache tables to recreate them); all migrations must therefore be safe to repeat
+        """
+        for schema, migrations in (('main', self.get_migrations()), ('labels', self.get_labels_migrations())):
             cur = self.db_conn.cursor()
-            # create structires for masternodes data:
-            cur.execute("CREATE TABLE IF NOT EXISTS masternodes(id INTEGER PRIMARY KEY, ident TEXT, status TEXT,"
-                        " protocol TEXT, payee TEXT, last_seen INTEGER, active_seconds INTEGER,"
-                        " last_paid_time INTEGER, last_paid_block INTEGER, ip TEXT,"
-                        " cmt_active INTEGER, cmt_create_time TEXT, cmt_deactivation_time TEXT)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_CMT_ACTIVE ON masternodes(cmt_active)")
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_IDENT ON masternodes(ident)")
-
-            if not self.table_columns_exist('masternodes', ['protx_hash']):
-                cur.execute("ALTER TABLE masternodes ADD COLUMN protx_hash TEXT")
-
-            if not self.table_columns_exist('masternodes', ['registered_height']):
-                cur.execute("ALTER TABLE masternodes ADD COLUMN registered_height INTEGER")
-
-            if not self.table_columns_exist('masternodes', ['queue_position']):
-                cur.execute("ALTER TABLE masternodes ADD COLUMN queue_position INTEGER")
-
-            # create structures for proposals:
-            cur.execute("CREATE TABLE IF NOT EXISTS proposals(id INTEGER PRIMARY KEY, name TEXT, payment_start TEXT,"
-                        " payment_end TEXT, payment_amount REAL, yes_count INTEGER, absolute_yes_count INTEGER,"
-                        " no_count INTEGER, abstain_count INTEGER, creation_time TEXT, url TEXT, payment_address TEXT,"
-                        " type INTEGER, hash TEXT,  collateral_hash TEXT, f_blockchain_validity INTEGER,"
-                        " f_cached_valid INTEGER, f_cached_delete INTEGER, f_cached_funding INTEGER, "
-                        " f_cached_endorsed INTEGER, object_type INTEGER, is_valid_reason TEXT, cmt_active INTEGER, "
-                        " cmt_create_time TEXT, cmt_deactivation_time TEXT, cmt_voting_last_read_time INTEGER,"
-                        " ext_attributes_loaded INTEGER, owner TEXT, title TEXT, ext_attributes_load_time INTEGER)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_PROPOSALS_HASH ON PROPOSALS(hash)")
-
-            # upgrade schema do v 0.9.11:
-            cur.execute("PRAGMA table_info(PROPOSALS)")
-            columns = cur.fetchall()
-            prop_owner_exists = False
-            prop_title_exists = False
-            ext_attributes_loaded_exists = False
-            ext_attributes_load_time_exists = False
-            for col in columns:
-                if col[1] == 'owner':
-                    prop_owner_exists = True
-                elif col[1] == 'title':
-                    prop_title_exists = True
-                elif col[1] == 'ext_attributes_loaded':
-                    ext_attributes_loaded_exists = True
-                elif col[1] == 'ext_attributes_load_time':
-                    ext_attributes_load_time_exists = True
-                if prop_owner_exists and prop_title_exists and ext_attributes_loaded_exists and \
-                        ext_attributes_load_time_exists:
-                    break
-
-            if not ext_attributes_loaded_exists:
-                # column for saving information whether additional attributes has been read from external sources
-                # like CrownCentral.net (1: yes, 0: no)
-                cur.execute("ALTER TABLE PROPOSALS ADD COLUMN ext_attributes_loaded INTEGER")
-            if not prop_owner_exists:
-                # proposal's owner from an external source like CrownCentral.net
-                cur.execute("ALTER TABLE PROPOSALS ADD COLUMN owner TEXT")
-            if not prop_title_exists:
-                # proposal's title from an external source like CrownCentral.net
-                cur.execute("ALTER TABLE PROPOSALS ADD COLUMN title TEXT")
-            if not ext_attributes_load_time_exists:
-                # proposal's title from an external source like CrownCentral.net
-                cur.execute("ALTER TABLE PROPOSALS ADD COLUMN ext_attributes_load_time INTEGER")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS VOTING_RESULTS(id INTEGER PRIMARY KEY, proposal_id INTEGER,"
-                        " masternode_ident TEXT, voting_time TEXT, voting_result TEXT,"
-                        "hash TEXT)")
-
-            cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_HASH ON VOTING_RESULTS(hash)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_1 ON VOTING_RESULTS(proposal_id)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_2 ON VOTING_RESULTS(masternode_ident)")
-
-            # Create table for storing live data for example last read time of proposals
-            cur.execute("CREATE TABLE IF NOT EXISTS LIVE_CONFIG(symbol text PRIMARY KEY, value TEXT)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_LIVE_CONFIG_SYMBOL ON LIVE_CONFIG(symbol)")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS hd_tree(id INTEGER PRIMARY KEY, ident TEXT, label TEXT)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_hd_tree_1 ON hd_tree(ident)")
-
-            if not self.table_columns_exist('address', ['parent_id', 'xpub_hash', 'balance', 'address_index',
-                                                        'last_scan_block_height', 'tree_id']):
-                cur.execute("drop table if exists address")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS address(id INTEGER PRIMARY KEY,"
-                        "xpub_hash TEXT, parent_id INTEGER, address_index INTEGER, address TEXT, path TEXT, "
-                        "tree_id INTEGER, balance INTEGER DEFAULT 0 NOT NULL, received INTEGER DEFAULT 0 NOT NULL, "
-                        "is_change INTEGER, last_scan_block_height INTEGER DEFAULT 0 NOT NULL, label TEXT,"
-                        "status INTEGER DEFAULT 0)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_1 ON address(xpub_hash)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_2 ON address(parent_id, address_index)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_3 ON address(address)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_4 ON address(tree_id)")
-
-            # if tx.block_height == 0, the transaction has not yet been confirmed (it may be the transaction that
-            # has just been sent from cmt wallet or the transaction which appeared in the mempool); in this case
-            # tx.block_timestamp indicates the moment when the transaction was added to the cache (it will be purged
-            # if will not appear on the blockchain after a defined amount of time)
-            cur.execute("CREATE TABLE IF NOT EXISTS tx(id INTEGER PRIMARY KEY, tx_hash TEXT, block_height INTEGER,"
-                        "block_timestamp INTEGER, coinbase INTEGER)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_1 ON tx(tx_hash)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_1 ON tx(block_height)")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS tx_output(id INTEGER PRIMARY KEY, address_id INTEGER, "
-                        "address TEXT, tx_id INTEGER NOT NULL, output_index INTEGER NOT NULL, "
-                        "satoshis INTEGER NOT NULL, spent_tx_id INTEGER, spent_input_index INTEGER, "
-                        "script_type TEXT)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_output_1 ON tx_output(tx_id, output_index)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_output_2 ON tx_output(address_id)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_output_3 ON tx_output(address)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_output_4 ON tx_output(spent_tx_id)")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS tx_input(id INTEGER PRIMARY KEY, src_address TEXT, "
-                        "src_address_id INTEGER, tx_id INTEGER NOT NULL, input_index INTEGER NOT NULL, "
-                        "satoshis INTEGER DEFAULT 0, src_tx_hash TEXT, src_tx_id INTEGER, src_tx_output_index INTEGER, "
-                        "coinbase INTEGER DEFAULT 0 NOT NULL)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_1 ON tx_input(tx_id, input_index)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_2 ON tx_input(src_address_id)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_3 ON tx_input(src_address)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_4 ON tx_input(src_tx_hash)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_5 ON tx_input(src_tx_id)")
-
-            cur.execute('create table if not exists labels.address_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
-                        'timestamp INTEGER)')
-            cur.execute('create index if not exists labels.address_label_1 on address_label(key)')
-
-            cur.execute('create table if not exists labels.tx_out_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
-                        'timestamp INTEGER)')  # key: tx hash + '-' + output_index
-            cur.execute('create index if not exists labels.tx_out_label_1 on address_label(key)')
-
-        except Exception:
-            log.exception('Exception while initializing database.')
-            raise
-
-    def table_columns_exist(self, table_name, column_names: List[str]):
-        cur = self.db_conn.cursor()
+            try:
+                cur.execute(f'PRAGMA {schema}.user_version')
+                version = 0 if force else cur.fetchone()[0]
+                if version > len(migrations):
+                    log.warning('The %s database schema (version %d) is newer than supported by this application '
+                                'version (%d)', schema, version, len(migrations))
+                for version in range(version, len(migrations)):
+                    log.info('Upgrading the %s database schema to version %d', schema, version + 1)
+                    if self.db_conn.in_transaction:
+                        self.db_conn.commit()
+                    cur.execute('BEGIN')
+                    try:
+                        migrations[version](cur)
+                        cur.execute(f'PRAGMA {schema}.user_version = {version + 1}')
+                        self.db_conn.commit()
+                    except Exception:
+                        self.db_conn.rollback()
+                        log.exception('Exception while upgrading the %s database schema to version %d', schema,
+                                      version + 1)
+                        raise
+            finally:
+                cur.close()
+
+    def get_migrations(self) -> List[Callable[[sqlite3.Cursor], None]]:
+        """
+        :return: the list of migrations of the main database; the schema version after executing the migration
+            is its index + 1. New migrations are appended at the end, the existing ones must not be modified.
+        """
+        return [self.migrate_v1, self.migrate_v2, self.migrate_v3, self.migrate_v4, self.migrate_v5,
+                self.migrate_v6]
+
+    def get_labels_migrations(self) -> List[Callable[[sqlite3.Cursor], None]]:
+        return [self.migrate_labels_v1]
+
+    def migrate_v1(self, cur: sqlite3.Cursor):
+        """
+        The schema of the versions not using the 'user_version' pragma. For the databases created by these versions
+        it only adds the missing columns, keeping the cached data.
+        """
+        # create structires for masternodes data:
+        cur.execute("CREATE TABLE IF NOT EXISTS masternodes(id INTEGER PRIMARY KEY, ident TEXT, status TEXT,"
+                    " protocol TEXT, payee TEXT, last_seen INTEGER, active_seconds INTEGER,"
+                    " last_paid_time INTEGER, last_paid_block INTEGER, ip TEXT,"
+                    " cmt_active INTEGER, cmt_create_time TEXT, cmt_deactivation_time TEXT, protx_hash TEXT,"
+                    " registered_height INTEGER, queue_position INTEGER)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_CMT_ACTIVE ON masternodes(cmt_active)")
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_IDENT ON masternodes(ident)")
+
+        self.add_missing_columns(cur, 'masternodes', [('protx_hash', 'TEXT'), ('registered_height', 'INTEGER'),
+                                                      ('queue_position', 'INTEGER')])
+
+        # create structures for proposals:
+        cur.execute("CREATE TABLE IF NOT EXISTS proposals(id INTEGER PRIMARY KEY, name TEXT, payment_start TEXT,"
+                    " payment_end TEXT, payment_amount REAL, yes_count INTEGER, absolute_yes_count INTEGER,"
+                    " no_count INTEGER, abstain_count INTEGER, creation_time TEXT, url TEXT, payment_address TEXT,"
+                    " type INTEGER, hash TEXT,  collateral_hash TEXT, f_blockchain_validity INTEGER,"
+                    " f_cached_valid INTEGER, f_cached_delete INTEGER, f_cached_funding INTEGER, "
+                    " f_cached_endorsed INTEGER, object_type INTEGER, is_valid_reason TEXT, cmt_active INTEGER, "
+                    " cmt_create_time TEXT, cmt_deactivation_time TEXT, cmt_voting_last_read_time INTEGER,"
+                    " ext_attributes_loaded INTEGER, owner TEXT, title TEXT, ext_attributes_load_time INTEGER)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_PROPOSALS_HASH ON PROPOSALS(hash)")
+
+        # columns added in v 0.9.11; owner and title come from an external source like CrownCentral.net,
+        # ext_attributes_loaded tells whether they have been read (1: yes, 0: no)
+        self.add_missing_columns(cur, 'proposals', [('ext_attributes_loaded', 'INTEGER'), ('owner', 'TEXT'),
+                                                    ('title', 'TEXT'), ('ext_attributes_load_time', 'INTEGER')])
+
+        cur.execute("CREATE TABLE IF NOT EXISTS VOTING_RESULTS(id INTEGER PRIMARY KEY, proposal_id INTEGER,"
+                    " masternode_ident TEXT, voting_time TEXT, voting_result TEXT,"
+                    "hash TEXT)")
+
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_HASH ON VOTING_RESULTS(hash)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_1 ON VOTING_RESULTS(proposal_id)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_2 ON VOTING_RESULTS(masternode_ident)")
+
+        # Create table for storing live data for example last read time of proposals
+        cur.execute("CREATE TABLE IF NOT EXISTS LIVE_CONFIG(symbol text PRIMARY KEY, value TEXT)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_LIVE_CONFIG_SYMBOL ON LIVE_CONFIG(symbol)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS hd_tree(id INTEGER PRIMARY KEY, ident TEXT, label TEXT)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_hd_tree_1 ON hd_tree(ident)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS address(id INTEGER PRIMARY KEY,"
+                    "xpub_hash TEXT, parent_id INTEGER, address_index INTEGER, address TEXT, path TEXT, "
+                    "tree_id INTEGER, balance INTEGER DEFAULT 0 NOT NULL, received INTEGER DEFAULT 0 NOT NULL, "
+                    "is_change INTEGER, last_scan_block_height INTEGER DEFAULT 0 NOT NULL, label TEXT,"
+                    "status INTEGER DEFAULT 0)")
+
+        # the address table of the older versions is upgraded in place instead of being dropped; the addresses
+        # without the scan height will be rescanned
+        self.add_missing_columns(cur, 'address', [
+            ('xpub_hash', 'TEXT'), ('parent_id', 'INTEGER'), ('address_index', 'INTEGER'), ('path', 'TEXT'),
+            ('tree_id', 'INTEGER'), ('balance', 'INTEGER DEFAULT 0 NOT NULL'),
+            ('received', 'INTEGER DEFAULT 0 NOT NULL'), ('is_change', 'INTEGER'),
+            ('last_scan_block_height', 'INTEGER DEFAULT 0 NOT NULL'), ('label', 'TEXT'),
+            ('status', 'INTEGER DEFAULT 0')])
+
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_1 ON address(xpub_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_2 ON address(parent_id, address_index)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_3 ON address(address)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_4 ON address(tree_id)")
+
+        # if tx.block_height == 0, the transaction has not yet been confirmed (it may be the transaction that
+        # has just been sent from cmt wallet or the transaction which appeared in the mempool); in this case
+        # tx.block_timestamp indicates the moment when the transaction was added to the cache (it will be purged
+        # if will not appear on the blockchain after a defined amount of time)
+        cur.execute("CREATE TABLE IF NOT EXISTS tx(id INTEGER PRIMARY KEY, tx_hash TEXT, block_height INTEGER,"
+                    "block_timestamp INTEGER, coinbase INTEGER)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_1 ON tx(tx_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_1 ON tx(block_height)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS tx_output(id INTEGER PRIMARY KEY, address_id INTEGER, "
+                    "address TEXT, tx_id INTEGER NOT NULL, output_index INTEGER NOT NULL, "
+                    "satoshis INTEGER NOT NULL, spent_tx_id INTEGER, spent_input_index INTEGER, "
+                    "script_type TEXT)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_1 ON tx_output(tx_id, output_index)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_2 ON tx_output(address_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_3 ON tx_output(address)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_4 ON tx_output(spent_tx_id)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS tx_input(id INTEGER PRIMARY KEY, src_address TEXT, "
+                    "src_address_id INTEGER, tx_id INTEGER NOT NULL, input_index INTEGER NOT NULL, "
+                    "satoshis INTEGER DEFAULT 0, src_tx_hash TEXT, src_tx_id INTEGER, src_tx_output_index INTEGER, "
+                    "coinbase INTEGER DEFAULT 0 NOT NULL)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_1 ON tx_input(tx_id, input_index)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_2 ON tx_input(src_address_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_3 ON tx_input(src_address)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_4 ON tx_input(src_tx_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_5 ON tx_input(src_tx_id)")
+
+    def migrate_v2(self, cur: sqlite3.Cursor):
+        """
+        The time columns of the proposals, votes and masternodes, stored so far as local time strings
+        ('%Y-%m-%d %H:%M:%S'), are converted to epoch seconds in INTEGER columns.
+        """
+        self.convert_time_columns(cur, 'masternodes', ['cmt_create_time', 'cmt_deactivation_time'])
+        self.convert_time_columns(cur, 'proposals', ['payment_start', 'payment_end', 'creation_time',
+                                                     'cmt_create_time', 'cmt_deactivation_time'])
+        self.convert_time_columns(cur, 'VOTING_RESULTS', ['voting_time'])
+
+        # the votes of a proposal are read in the voting time order
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_3 ON VOTING_RESULTS(proposal_id, voting_time)")
+
+    def migrate_v3(self, cur: sqlite3.Cursor):
+        """
+        Index for reading the last votes per proposal of a set of masternodes in one query; it replaces the index
+        on masternode_ident alone.
+        """
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_VOTING_RESULTS_4 ON VOTING_RESULTS(masternode_ident, proposal_id,"
+                    " voting_time)")
+        cur.execute("DROP INDEX IF EXISTS IDX_VOTING_RESULTS_2")
+
+    def migrate_v4(self, cur: sqlite3.Cursor):
+        """
+        Daily aggregates of the proposal votes for the vote charts (see vote_aggregates); the aggregates of
+        the proposals existing in the cache will be computed when first needed.
+        """
+        cur.execute("CREATE TABLE IF NOT EXISTS VOTES_DAILY(id INTEGER PRIMARY KEY, proposal_id INTEGER NOT NULL,"
+                    " day INTEGER NOT NULL, yes_delta INTEGER DEFAULT 0 NOT NULL,"
+                    " no_delta INTEGER DEFAULT 0 NOT NULL, abstain_delta INTEGER DEFAULT 0 NOT NULL,"
+                    " changes_no_yes INTEGER DEFAULT 0 NOT NULL, changes_abstain_yes INTEGER DEFAULT 0 NOT NULL,"
+                    " changes_no_abstain INTEGER DEFAULT 0 NOT NULL, changes_yes_abstain INTEGER DEFAULT 0 NOT NULL,"
+                    " changes_yes_no INTEGER DEFAULT 0 NOT NULL, changes_abstain_no INTEGER DEFAULT 0 NOT NULL)")
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS IDX_VOTES_DAILY_1 ON VOTES_DAILY(proposal_id, day)")
+        self.add_missing_columns(cur, 'proposals', [('cmt_votes_daily_valid', 'INTEGER DEFAULT 0')])
+
+    def migrate_v5(self, cur: sqlite3.Cursor):
+        """
+        Removes the duplicated proposals (rows with the same hash), which some of the older versions could create,
+        and makes the proposal hash unique. Of the duplicates, the active row with the lowest id is kept (or the row
+        with the lowest id, if none is active) and the votes of the other rows are moved to it. Adds the columns
+        for the superblocks of the beginning and the end of the proposal payments.
+        """
+        cur.execute("CREATE TEMP TABLE proposals_dup(id INTEGER PRIMARY KEY, target_id INTEGER)")
         try:
-            cur.execute(f"PRAGMA table_info({table_name})")
-            cols_existing = [col[1] for col in cur.fetchall()]
-            for c in column_names:
-                if c not in cols_existing:
-                    return False
+            cur.execute("INSERT INTO proposals_dup(id, target_id) "
+                        "SELECT p.id, (SELECT t.id FROM PROPOSALS t WHERE t.hash=p.hash "
+                        "ORDER BY ifnull(t.cmt_active, 0) DESC, t.id LIMIT 1) target_id "
+                        "FROM PROPOSALS p WHERE p.hash IN (SELECT hash FROM PROPOSALS WHERE hash IS NOT NULL "
+                        "GROUP BY hash HAVING count(*) > 1)")
+            cur.execute("DELETE FROM proposals_dup WHERE id=target_id")
+            cur.execute("SELECT count(*) FROM proposals_dup")
+            dup_count = cur.fetchone()[0]
+            if dup_count:
+                log.warning('Removing %d duplicated proposals from the cache', dup_count)
+                cur.execute("UPDATE VOTING_RESULTS SET proposal_id=(SELECT d.target_id FROM proposals_dup d "
+                            "WHERE d.id=VOTING_RESULTS.proposal_id) WHERE proposal_id IN (SELECT id FROM proposals_dup)")
+                cur.execute("UPDATE PROPOSALS SET cmt_votes_daily_valid=0 WHERE id IN "
+                            "(SELECT target_id FROM proposals_dup)")
+                cur.execute("DELETE FROM VOTES_DAILY WHERE proposal_id IN (SELECT id FROM proposals_dup)")
+                cur.execute("DELETE FROM PROPOSALS WHERE id IN (SELECT id FROM proposals_dup)")
         finally:
-            cur.close()
-        return True
\ No newline at end of file
+            cur.execute("DROP TABLE temp.proposals_dup")
+
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS IDX_PROPOSALS_HASH_UNIQUE ON PROPOSALS(hash)")
+        cur.execute("DROP INDEX IF EXISTS IDX_PROPOSALS_HASH")
+
+        self.add_missing_columns(cur, 'proposals', [('cmt_start_superblock', 'INTEGER'),
+                                                    ('cmt_end_superblock', 'INTEGER')])
+
+    def migrate_v6(self, cur: sqlite3.Cursor):
+        """
+        Adds the fingerprint of the governance object fields changing during the life of a proposal (see
+        governance_sync); proposals without the fingerprint are written again at the next synchronization.
+        """
+        self.add_missing_columns(cur, 'proposals', [('cmt_fingerprint', 'TEXT')])
+
+    def migrate_labels_v1(self, cur: sqlite3.Cursor):
+        cur.execute('create table if not exists labels.address_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
+                    'timestamp INTEGER)')
+        cur.execute('create index if not exists labels.address_label_1 on address_label(key)')
+
+        cur.execute('create table if not exists labels.tx_out_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
+                    'timestamp INTEGER)')  # key: tx hash + '-' + output_index
+        cur.execute('create index if not exists labels.tx_out_label_1 on address_label(key)')
+
+    def add_missing_columns(self, cur: sqlite3.Cursor, table_name: str, columns: List[Tuple[str, str]]):
+        """
+        :param columns: list of (column name, column definition) to be added to the table if they don't exist
+        """
+        cur.execute(f"PRAGMA table_info({table_name})")
+        cols_existing = [col[1].lower() for col in cur.fetchall()]
+        for col_name, col_def in columns:
+            if col_name.lower() not in cols_existing:
+                log.info('Adding column %s to table %s', col_name, table_name)
+                cur.execute(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_def}")
+
+    def convert_time_columns(self, cur: sqlite3.Cursor, table_name: str, columns: List[str]):
+        """
+        Changes the type of the time columns of a table to INTEGER, converting the local time strings stored in
+        them to epoch seconds. SQLite cannot change the type of a column, so the table is rebuilt (along with its
+        indexes); if all the columns are already of type INTEGER, nothing is done.
+        """
+        cur.execute(f"PRAGMA table_info({table_name})")
+        table_cols = cur.fetchall()  # cid, name, type, notnull, default value, pk
+        columns = [c.lower() for c in columns]
+        if all(col[2].upper() == 'INTEGER' for col in table_cols if col[1].lower() in columns):
+            return
+
+        log.info('Converting the time columns of table %s to integers', table_name)
+        cur.execute("SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name=? COLLATE NOCASE AND "
+                    "sql IS NOT NULL", (table_name,))
+        indexes_sql = [row[0] for row in cur.fetchall()]
+
+        col_defs = []
+        col_values = []
+        for _, name, col_type, notnull, default, pk in table_cols:
+            if name.lower() in columns:
+                col_type = 'INTEGER'
+                # the 'utc' modifier treats the string as local time, the way it was written
+                col_values.append(f"CASE WHEN typeof({name})='text' THEN "
+                                  f"CAST(strftime('%s', {name}, 'utc') AS INTEGER) ELSE {name} END")
+            else:
+                col_values.append(name)
+            col_def = f'{name} {col_type}'
+            if pk:
+                col_def += ' PRIMARY KEY'
+            if default is not None:
+                col_def += f' DEFAULT {default}'
+            if notnull:
+                col_def += ' NOT NULL'
+            col_defs.append(col_def)
+
+        cur.execute(f"CREATE TABLE {table_name}_new({', '.join(col_defs)})")
+        cur.execute(f"INSERT INTO {table_name}_new({', '.join(col[1] for col in table_cols)}) "
+                    f"SELECT {', '.join(col_values)} FROM {table_name}")
+        cur.execute(f"DROP TABLE {table_name}")
+        cur.execute(f"ALTER TABLE {table_name}_new RENAME TO {table_name}")
+        for sql in indexes_sql:
+            cur.execute(sql)
@@ -4,10 +4,20 @@
 # Created on: 2017-04
 
 import base64
+import collections
+import mmap
 import os
-from typing import ByteString, List, Tuple
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import ByteString, List, Tuple, Generator, Union
 from PyQt5.QtWidgets import QMessageBox
+from cryptography.exceptions import InvalidSignature
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.hmac import HMAC
 from app_defs import HWType, get_note_url
 from app_utils import SHA256, write_bytes_buf, write_int_list_buf, read_bytes_from_file, read_int_list_from_file
 from common import CancelException
@@ -20,6 +30,10 @@ from wnd_utils import WndUtils
 
 CMT_ENCRYPTED_DATA_PREFIX = b'CMTEF'
 ENC_FILE_BLOCK_SIZE = 1000000
+ENC_FILE_WORKERS = min(4, os.cpu_count() or 1)  # number of data blocks encrypted/decrypted simultaneously
+FERNET_VERSION = 0x80
+FERNET_HEADER_SIZE = 25  # version (1) + timestamp (8) + IV (16)
+FERNET_HMAC_SIZE = 32
 
 
 class NotConnectedToHardwareWallet (Exception):
@@ -27,6 +41,52 @@ class NotConnectedToHardwareWallet (Exception):
         Exception.__init__(self, *args, *kwargs)
 
 
+class BinaryFernet(object):
+    """
+    Fernet encryption operating on the binary form of the tokens (the file format stores the tokens without
+    the base64 encoding). The tokens are the same as those of cryptography's Fernet class after base64-decoding,
+    so the files remain compatible in both directions.
+    """
+
+    def __init__(self, key: bytes):
+        key = base64.urlsafe_b64decode(key)
+        if len(key) != 32:
+            raise ValueError('Fernet key must be 32 url-safe base64-encoded bytes.')
+        self.signing_key = key[:16]
+        self.encryption_key = key[16:]
+        self.backend = default_backend()
+
+    def encrypt(self, data: ByteString) -> bytes:
+        iv = os.urandom(16)
+        encryptor = Cipher(algorithms.AES(self.encryption_key), modes.CBC(iv), self.backend).encryptor()
+        pad_len = 16 - len(data) % 16  # PKCS7
+        ciphertext = encryptor.update(data) + encryptor.update(bytes([pad_len]) * pad_len) + encryptor.finalize()
+        token = bytes([FERNET_VERSION]) + struct.pack('>Q', int(time.time())) + iv + ciphertext
+        h = HMAC(self.signing_key, hashes.SHA256(), self.backend)
+        h.update(token)
+        return token + h.finalize()
+
+    def decrypt(self, token: Union[bytes, memoryview]) -> bytes:
+        if len(token) < FERNET_HEADER_SIZE + FERNET_HMAC_SIZE + 16 or token[0] != FERNET_VERSION:
+            raise InvalidToken
+        h = HMAC(self.signing_key, hashes.SHA256(), self.backend)
+        h.update(token[:-FERNET_HMAC_SIZE])
+        try:
+            h.verify(bytes(token[-FERNET_HMAC_SIZE:]))
+        except InvalidSignature:
+            raise InvalidToken
+        iv = bytes(token[9:FERNET_HEADER_SIZE])
+        decryptor = Cipher(algorithms.AES(self.encryption_key), modes.CBC(iv), self.backend).decryptor()
+        try:
+            data = decryptor.update(token[FERNET_HEADER_SIZE:-FERNET_HMAC_SIZE]) + decryptor.finalize()
+        except ValueError:
+            raise InvalidToken
+        pad_len = data[-1]
+        if not 1 <= pad_len <= 16 or data[-pad_len:] != bytes([pad_len]) * pad_len:
+            raise InvalidToken
+        return data[:-pad_len]
+
+
 def prepare_hw_encryption_attrs(hw_session: HwSessionInfo, label: str) -> \
         Tuple[int, int, List[int], ByteString, ByteString, ByteString]:
     """
@@ -75,190 +135,295 @@ def prepare_hw_encryption_attrs(hw_session: HwSessionInfo, label: str) -> \
         return (protocol, hw_type_bin, bip32_path_n, enc_key_hash, key_bin, pub_key_hash)
 
 
-def write_file_encrypted(file_name: str, hw_session: HwSessionInfo, data: bytes):
-    label = os.path.basename(file_name)
+class EncryptedFileWriter(object):
+    """
+    Writes data to an encrypted file as it arrives. The data is sliced into ENC_FILE_BLOCK_SIZE-byte blocks, which
+    are encrypted on a thread pool and written to the file in order, each preceded by the size of the encrypted
+    block; the number of blocks waiting for being written is limited, so the memory usage doesn't depend on the
+    amount of data.
+    """
 
-    if hw_session.app_config.hw_type:
-        if not hw_session.hw_client:
-            if not hw_session.hw_connect():
+    def __init__(self, file_name: str, hw_session: HwSessionInfo):
+        label = os.path.basename(file_name)
+
+        if hw_session.app_config.hw_type:
+            if not hw_session.hw_client:
+                if not hw_session.hw_connect():
+                    raise NotConnectedToHardwareWallet('Hardware wallet not connected.')
+        else:
+            raise Exception('Invalid hardware wallet type in the app configuration.')
+
+        protocol, hw_type_bin, bip32_path_n, encryption_key, encrypted_key_bin, pub_key_hash = \
+            prepare_hw_encryption_attrs(hw_session, label)
+
+        self.fer = BinaryFernet(encryption_key)
+        self.buffer = bytearray()
+        self.pending = collections.deque()
+        self.executor = ThreadPoolExecutor(max_workers=ENC_FILE_WORKERS)
+        self.f_ptr = open(file_name, 'wb')
+        try:
+            header = CMT_ENCRYPTED_DATA_PREFIX + \
+                     num_to_varint(protocol) + num_to_varint(hw_type_bin) + \
+                     write_bytes_buf(bytearray(base64.b64encode(bytearray(label, 'utf-8')))) + \
+                     write_bytes_buf(encrypted_key_bin) + \
+                     write_int_list_buf(bip32_path_n) + \
+                     write_bytes_buf(pub_key_hash)
+            self.f_ptr.write(header)
+        except Exception:
+            self.abort()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write_block(self, data: ByteString):
+        self.pending.append(self.executor.submit(self.fer.encrypt, data))
+        while len(self.pending) > ENC_FILE_WORKERS * 2:
+            self.write_pending_block()
+
+    def write_pending_block(self):
+        data_enc = self.pending.popleft().result()
+        self.f_ptr.write(len(data_enc).to_bytes(8, byteorder='little'))  # the size of the data chunk
+        self.f_ptr.write(data_enc)
+
+    def write(self, data: ByteString):
+        view = memoryview(data)
+        if self.buffer:
+            needed = ENC_FILE_BLOCK_SIZE - len(self.buffer)
+            self.buffer += view[:needed]
+            view = view[needed:]
+            if len(self.buffer) < ENC_FILE_BLOCK_SIZE:
                 return
-    else:
-        raise Exception('Invalid hardware wallet type in the app configuration.')
-
-    protocol, hw_type_bin, bip32_path_n, encryption_key, encrypted_key_bin, pub_key_hash = \
-        prepare_hw_encryption_attrs(hw_session, label)
+            self.write_block(bytes(self.buffer))
+            self.buffer.clear()
+
+        while len(view) >= ENC_FILE_BLOCK_SIZE:
+            block = view[:ENC_FILE_BLOCK_SIZE]
+            # blocks of an immutable object can be encrypted without being copied
+            self.write_block(block if isinstance(data, bytes) else bytes(block))
+            view = view[ENC_FILE_BLOCK_SIZE:]
+        self.buffer += view
+
+    def close(self):
+        try:
+            if self.buffer:
+                self.write_block(bytes(self.buffer))
+                self.buffer.clear()
+            while self.pending:
+                self.write_pending_block()
+        except Exception:
+            self.abort()
+            raise
+        self.executor.shutdown()
+        self.f_ptr.close()
+
+    def abort(self):
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown()
+        self.f_ptr.close()
+
+
+def open_encrypted_writer(file_name: str, hw_session: HwSessionInfo) -> EncryptedFileWriter:
+    """
+    Opens a file for writing encrypted data with the key protected by the hardware wallet; to be used as a context
+    manager: the data is completely written when the 'with' block finishes without an exception.
+    """
+    return EncryptedFileWriter(file_name, hw_session)
 
-    fer = Fernet(encryption_key)
 
-    with open(file_name, 'wb') as f_ptr:
+def write_file_encrypted(file_name: str, hw_session: HwSessionInfo, data: bytes):
+    try:
+        with open_encrypted_writer(file_name, hw_session) as writer:
+            writer.write(data)
+    except NotConnectedToHardwareWallet:
+        return
 
-        header = CMT_ENCRYPTED_DATA_PREFIX + \
-                 num_to_varint(protocol) + num_to_varint(hw_type_bin) + \
-                 write_bytes_buf(bytearray(base64.b64encode(bytearray(label, 'utf-8')))) + \
-                 write_bytes_buf(encrypted_key_bin) + \
-                 write_int_list_buf(bip32_path_n) + \
-                 write_bytes_buf(pub_key_hash)
-        f_ptr.write(header)
 
-        # slice the input data into ENC_FILE_BLOCK_SIZE-byte chunks, encrypt them and
-        # write to file; each block will be preceded with the length of the encrypted
-        # data chunk size
-        begin_idx = 0
+def decrypt_blocks(data: mmap.mmap, fer: BinaryFernet) -> Generator[bytes, None, None]:
+    """
+    Decrypts the data blocks following the current position of the mapped file. The blocks are decrypted on
+    a thread pool straight from the mapped memory and returned in order.
+    """
+    view = memoryview(data)
+    pending = collections.deque()  # (future, view of the encrypted block)
+    executor = ThreadPoolExecutor(max_workers=ENC_FILE_WORKERS)
+    pos = data.tell()
+    try:
         while True:
-            data_left = len(data) - begin_idx
-            if data_left <= 0:
-                break
-            cur_input_chunk_size = min(ENC_FILE_BLOCK_SIZE, data_left)
-
-            data_enc_base64 = fer.encrypt(data[begin_idx : begin_idx+cur_input_chunk_size])
-            data_enc = base64.urlsafe_b64decode(data_enc_base64)
-            cur_chunk_size_bin = len(data_enc).to_bytes(8, byteorder='little')  # write the size of the data chunk
-            f_ptr.write(cur_chunk_size_bin)     # write the data
-            f_ptr.write(data_enc)     # write the data
-            begin_idx += cur_input_chunk_size
+            while pos < len(view) and len(pending) < ENC_FILE_WORKERS * 2:
+                # data is written in blocks; if front of each block there is a block size value
+                if len(view) - pos < 8:
+                    raise ValueError('File end before read completed.')
+                data_chunk_size = int.from_bytes(view[pos:pos + 8], byteorder='little')
+                if data_chunk_size < 0 or data_chunk_size > 2000000000:
+                    raise ValueError('Data corrupted: invalid data chunk size.')
+                pos += 8
+                if pos + data_chunk_size > len(view):
+                    raise ValueError('File end before read completed.')
+                block = view[pos:pos + data_chunk_size]
+                pos += data_chunk_size
+                pending.append((executor.submit(fer.decrypt, block), block))
+
+            if not pending:
+                break  # end of file
+            future, block = pending.popleft()
+            try:
+                data_decr = future.result()
+            except InvalidToken:
+                raise Exception('Couldn\'t decrypt file (IvalidToken error). The file is probably '
+                                'corrupted or is encrypted with a different encryption method.')
+            finally:
+                block.release()
+            yield data_decr
+    finally:
+        for future, _ in pending:
+            future.cancel()
+        executor.shutdown()
+        for _, block in pending:
+            block.release()
+        view.release()
 
 
-def read_file_encrypted(file_name: str, ret_attrs: dict, hw_session: HwSessionInfo):
+def open_encrypted_reader(file_name: str, ret_attrs: dict, hw_session: HwSessionInfo) -> \
+        Generator[bytes, None, None]:
+    """
+    Reads a file written by open_encrypted_writer/write_file_encrypted (or an unencrypted one) through memory
+    mapping and returns the decrypted data in blocks of up to ENC_FILE_BLOCK_SIZE bytes.
+    :param ret_attrs: its 'encrypted' item is set to True if the file is encrypted
+    """
     ret_attrs['encrypted'] = False
 
     hw_client_internal = None
 
     try:
-        with open(file_name, 'rb') as f_ptr:
-
-            data = f_ptr.read(len(CMT_ENCRYPTED_DATA_PREFIX))
-            if data == CMT_ENCRYPTED_DATA_PREFIX:
-                ret_attrs['encrypted'] = True
-
-                protocol = read_varint_from_file(f_ptr)
-                if protocol == 1:  # with Trezor method + Fernet
-
-                    hw_type_bin = read_varint_from_file(f_ptr)
-                    hw_type = {
-                            1: HWType.trezor,
-                            2: HWType.keepkey,
-                            3: HWType.ledger_nano_s
-                        }.get(hw_type_bin)
-
-                    if hw_type:
-                        if hw_session.app_config.hw_type == hw_type:
-                            if not hw_session.hw_client:
-                                if not hw_session.hw_connect():
-                                    raise NotConnectedToHardwareWallet(
-                                        f'This file was encrypted with {HWType.get_desc(hw_type)} hardware wallet, '
-                                        f'which has to be connected to the computer decrypt the file.')
-                        else:
-                            # enctypted file uses other type of hardware wallet than the one currently connected -
-                            # create a separate (temporary) hw session for it
-                            def _get_client():
-                                return hw_client_internal
-
-                            try:
-                                hw_session = HwSessionInfo(get_hw_client_function=_get_client,
-                                                           hw_connect_function=None,
-                                                           hw_disconnect_function=None,
-                                                           app_config=hw_session.app_config,
-                                                           crownd_intf=hw_session.crownd_intf)
-
-                                hw_client_internal = connect_hw(hw_session=hw_session,
-                                                                device_id=None,
-                                                                passphrase_encoding='NFKD',
-                                                                hw_type=hw_type)
-                            except Exception:
-                                raise
-
-                        data_label_bin = read_bytes_from_file(f_ptr)
-                        label = base64.urlsafe_b64decode(data_label_bin).decode('utf-8')
-
-                        encrypted_key_bin = read_bytes_from_file(f_ptr)
-                        bip32_path_n = read_int_list_from_file(f_ptr)
-                        pub_key_hash_hdr = read_bytes_from_file(f_ptr)
-
-                        while True:
-                            if hw_session.hw_type in (HWType.trezor, HWType.keepkey):
-                                key_bin, pub_key = hw_decrypt_value(hw_session, bip32_path_n, label=label,
-                                                                    value=encrypted_key_bin)
-                            elif hw_session.hw_type == HWType.ledger_nano_s:
-
-                                display_label = f'<b>Click the sign message confirmation button on the <br>' \
-                                                f'hardware wallet to decrypt \'{label}\'.</b>'
-                                bip32_path_str = bip32_path_n_to_string(bip32_path_n)
-                                sig = hw_sign_message(hw_session, bip32_path_str, encrypted_key_bin.hex(),
-                                                      display_label=display_label)
-                                adr_pk = get_address_and_pubkey(hw_session, bip32_path_str)
-
-                                pub_key = adr_pk.get('publicKey')
-                                key_bin = SHA256.new(sig.signature).digest()
-
-                            else:
-                                raise Exception('Invalid hardware wallet type.')
-
-                            pub_key_hash = SHA256.new(pub_key).digest()
-
-                            if pub_key_hash_hdr == pub_key_hash:
-                                break
-
-                            url = get_note_url('CMT0003')
-                            if WndUtils.queryDlg(
-                                    message='Inconsistency between encryption and decryption keys.\n\n' 
-                                            'The reason may be using a different passphrase than it was used '
-                                            'for encryption or running another application communicating with the '
-                                            'device simultaneously, like Trezor web wallet (see <a href="{url}">'
-                                            'here</a>).\n\n' 
-                                            'Do you want to try again?',
-                                    buttons=QMessageBox.Yes | QMessageBox.Cancel,
-                                    default_button=QMessageBox.Cancel, icon=QMessageBox.Warning) == QMessageBox.Cancel:
-                                raise CancelException('User cancelled.')
-                            if hw_client_internal:
-                                disconnect_hw(hw_client_internal)
-                                hw_client_internal = connect_hw(hw_session=hw_session,
-                                                                device_id=None,
-                                                                passphrase_encoding='NFKD',
-                                                                hw_type=hw_type)
+        with open(file_name, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as f_ptr:
+
+                data = f_ptr.read(len(CMT_ENCRYPTED_DATA_PREFIX))
+                if data == CMT_ENCRYPTED_DATA_PREFIX:
+                    ret_attrs['encrypted'] = True
+
+                    protocol = read_varint_from_file(f_ptr)
+                    if protocol == 1:  # with Trezor method + Fernet
+
+                        hw_type_bin = read_varint_from_file(f_ptr)
+                        hw_type = {
+                                1: HWType.trezor,
+                                2: HWType.keepkey,
+                                3: HWType.ledger_nano_s
+                            }.get(hw_type_bin)
+
+                        if hw_type:
+                            if hw_session.app_config.hw_type == hw_type:
+                                if not hw_session.hw_client:
+                                    if not hw_session.hw_connect():
+                                        raise NotConnectedToHardwareWallet(
+                                            f'This file was encrypted with {HWType.get_desc(hw_type)} hardware wallet, '
+                                            f'which has to be connected to the computer decrypt the file.')
                             else:
-                                hw_session.hw_disconnect()
-
-                        key = base64.urlsafe_b64encode(key_bin)
-                        fer = Fernet(key)
-
-                        while True:
-                            # data is written in blocks; if front of each block there is a block size value
-                            data_bin = f_ptr.read(8)
-                            if len(data_bin) == 0:
-                                break  # end of file
-                            elif len(data_bin) < 8:
-                                raise ValueError('File end before read completed.')
-
-                            data_chunk_size = int.from_bytes(data_bin, byteorder='little')
-                            if data_chunk_size < 0 or data_chunk_size > 2000000000:
-                                raise ValueError('Data corrupted: invalid data chunk size.')
-
-                            data_bin = f_ptr.read(data_chunk_size)
-                            if data_chunk_size != len(data_bin):
-                                raise ValueError('File end before read completed.')
-                            data_base64 = base64.urlsafe_b64encode(data_bin)
-                            try:
-                                data_decr = fer.decrypt(data_base64)
-                            except InvalidToken:
-                                raise Exception('Couldn\'t decrypt file (IvalidToken error). The file is probably '
-                                                'corrupted or is encrypted with a different encryption method.')
-                            yield data_decr
+                                # enctypted file uses other type of hardware wallet than the one currently connected -
+                                # create a separate (temporary) hw session for it
+                                def _get_client():
+                                    return hw_client_internal
+
+                                try:
+                                    hw_session = HwSessionInfo(get_hw_client_function=_get_client,
+                                                               hw_connect_function=None,
+                                                               hw_disconnect_function=None,
+                                                               app_config=hw_session.app_config,
+                                                               crownd_intf=hw_session.crownd_intf)
+
+                                    hw_client_internal = connect_hw(hw_session=hw_session,
+                                                                    device_id=None,
+                                                                    passphrase_encoding='NFKD',
+                                                                    hw_type=hw_type)
+                                except Exception:
+                                    raise
+
+                            data_label_bin = read_bytes_from_file(f_ptr)
+                            label = base64.urlsafe_b64decode(data_label_bin).decode('utf-8')
+
+                            encrypted_key_bin = read_bytes_from_file(f_ptr)
+                            bip32_path_n = read_int_list_from_file(f_ptr)
+                            pub_key_hash_hdr = read_bytes_from_file(f_ptr)
+
+                            while True:
+                                if hw_session.hw_type in (HWType.trezor, HWType.keepkey):
+                                    key_bin, pub_key = hw_decrypt_value(hw_session, bip32_path_n, label=label,
+                                                                        value=encrypted_key_bin)
+                                elif hw_session.hw_type == HWType.ledger_nano_s:
+
+                                    display_label = f'<b>Click the sign message confirmation button on the <br>' \
+                                                    f'hardware wallet to decrypt \'{label}\'.</b>'
+                                    bip32_path_str = bip32_path_n_to_string(bip32_path_n)
+                                    sig = hw_sign_message(hw_session, bip32_path_str, encrypted_key_bin.hex(),
+                                                          display_label=display_label)
+                                    adr_pk = get_address_and_pubkey(hw_session, bip32_path_str)
+
+                                    pub_key = adr_pk.get('publicKey')
+                                    key_bin = SHA256.new(sig.signature).digest()
+
+                                else:
+                                    raise Exception('Invalid hardware wallet type.')
+
+                                pub_key_hash = SHA256.new(pub_key).digest()
+
+                                if pub_key_hash_hdr == pub_key_hash:
+                                    break
+
+                                url = get_note_url('CMT0003')
+                                if WndUtils.queryDlg(
+                                        message='Inconsistency between encryption and decryption keys.\n\n' 
+                                                'The reason may be using a different passphrase than it was used '
+                                                'for encryption or running another application communicating with the '
+                                                'device simultaneously, like Trezor web wallet (see <a href="{url}">'
+                                                'here</a>).\n\n' 
+                                                'Do you want to try again?',
+                                        buttons=QMessageBox.Yes | QMessageBox.Cancel,
+                                        default_button=QMessageBox.Cancel,
+                                        icon=QMessageBox.Warning) == QMessageBox.Cancel:
+                                    raise CancelException('User cancelled.')
+                                if hw_client_internal:
+                                    disconnect_hw(hw_client_internal)
+                                    hw_client_internal = connect_hw(hw_session=hw_session,
+                                                                    device_id=None,
+                                                                    passphrase_encoding='NFKD',
+                                                                    hw_type=hw_type)
+                                else:
+                                    hw_session.hw_disconnect()
+
+                            key = base64.urlsafe_b64encode(key_bin)
+                            fer = BinaryFernet(key)
+                            yield from decrypt_blocks(f_ptr, fer)
+                        else:
+                            raise ValueError('Invalid hardware wallet type value.')
                     else:
-                        raise ValueError('Invalid hardware wallet type value.')
+                        raise ValueError('Invalid protocol value.')
                 else:
-                    raise ValueError('Invalid protocol value.')
-            else:
-                # the data inside the file isn't encrypted
-
-                # read and yield raw data
-                while True:
-                    # data is written in blocks; if front of each block there is a block size value
-                    data += f_ptr.read(ENC_FILE_BLOCK_SIZE)
-                    if not len(data):
-                        break
-                    yield data
-                    data = bytes()
+                    # the data inside the file isn't encrypted
+
+                    # read and yield raw data
+                    f_ptr.seek(0)
+                    while True:
+                        data = f_ptr.read(ENC_FILE_BLOCK_SIZE)
+                        if not data:
+                            break
+                        yield data
 
     finally:
         if hw_client_internal:
             disconnect_hw(hw_client_internal)
+
+
+def read_file_encrypted(file_name: str, ret_attrs: dict, hw_session: HwSessionInfo):
+    return open_encrypted_reader(file_name, ret_attrs, hw_session)
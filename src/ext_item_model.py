@@ -5,7 +5,7 @@
 import logging
 from PyQt5.QtCore import Qt, pyqtSlot, QSortFilterProxyModel, QAbstractTableModel, QVariant
 from PyQt5.QtWidgets import QTableView, QWidget, QAbstractItemView, QTreeView
-from typing import List, Optional, Any, Dict, Generator
+from typing import List, Optional, Any, Dict, Generator, Callable, Tuple
 
 import thread_utils
 from columns_cfg_dlg import ColumnsConfigDlg
@@ -17,6 +17,18 @@ from wnd_utils import WndUtils
 log = logging.getLogger('cmt.ext_item_model')
 
 
+def sort_key_value(value: Any) -> Tuple[int, Any]:
+    """
+    Converts a cell value into a sort key comparable with the keys of other rows: numbers are compared with numbers,
+    strings case-insensitively with strings and all other values are treated as equal.
+    """
+    if isinstance(value, (int, float)):
+        return 0, value
+    elif isinstance(value, str):
+        return 1, value.lower()
+    return 2, 0
+
+
 class TableModelColumn(AttrsProtected):
     def __init__(self, name, caption, visible, initial_width: int = None, additional_attrs: Optional[List[str]] = None):
         AttrsProtected.__init__(self)
@@ -50,10 +62,18 @@ class ColumnedSortFilterProxyModel(QSortFilterProxyModel):
     def lessThan(self, left, right):
         is_less = None
         col_index = left.column()
+        left_row_index = left.row()
+        right_row_index = right.row()
+
+        # use the sort ranks precomputed for the column if the model provides them
+        ranks = self.source_model.get_sort_ranks(col_index)
+        if ranks is not None:
+            if 0 <= left_row_index < len(ranks) and 0 <= right_row_index < len(ranks):
+                return ranks[left_row_index] < ranks[right_row_index]
+            return False
+
         col = self.source_model.col_by_index(col_index)
         if col:
-            left_row_index = left.row()
-            right_row_index = right.row()
             is_less = self.source_model.lessThan(col_index, left_row_index, right_row_index)
         if is_less is None:
             return super().lessThan(left, right)
@@ -67,6 +87,7 @@ class ColumnedItemModelMixin(object):
         self.parent_widget = parent
         self._columns = columns
         self._col_idx_by_name: Dict[str, int] = {}
+        self._sort_ranks: Dict[int, Optional[List[int]]] = {}  # column index -> sort rank of each row
         self._rebuild_column_index()
         self.view: QAbstractItemView = None
         self.columns_movable = columns_movable
@@ -86,6 +107,8 @@ class ColumnedItemModelMixin(object):
         for idx, c in enumerate(self._columns):
             c.visual_index = idx
             self._col_idx_by_name[c.name] = idx
+        # the sort ranks are kept by column index, which may have just changed
+        self.invalidate_sort_ranks()
 
     def insert_column(self, insert_before_index: int, col: TableModelColumn):
         if insert_before_index >= 0:
@@ -232,10 +255,46 @@ class ColumnedItemModelMixin(object):
     def lessThan(self, col_index, left_row_index, right_row_index):
         pass
 
+    def sort_key_fun(self, col_index) -> Optional[Callable[[int], Any]]:
+        """
+        Reimplement in derived classes to sort a column by keys computed once per data change, instead of
+        calling lessThan for each comparison.
+        :return: function returning the sort key of a given row index or None, if the column is to be sorted
+            with lessThan
+        """
+        return None
+
+    def get_sort_ranks(self, col_index) -> Optional[List[int]]:
+        """
+        Returns the position of each row in the column's ascending order; rows with equal keys get the same rank,
+        so their relative order is kept by Qt as it is with lessThan returning False.
+        """
+        if col_index in self._sort_ranks:
+            return self._sort_ranks[col_index]
+
+        ranks = None
+        key_fun = self.sort_key_fun(col_index)
+        if key_fun:
+            keys = [key_fun(row_idx) for row_idx in range(self.rowCount())]
+            ranks = [0] * len(keys)
+            rank = 0
+            last_key = None
+            for pos, row_idx in enumerate(sorted(range(len(keys)), key=keys.__getitem__)):
+                if pos > 0 and keys[row_idx] != last_key:
+                    rank += 1
+                last_key = keys[row_idx]
+                ranks[row_idx] = rank
+        self._sort_ranks[col_index] = ranks
+        return ranks
+
+    def invalidate_sort_ranks(self, *args):
+        self._sort_ranks.clear()
+
     def filterAcceptsRow(self, row_index, source_parent):
         return True
 
     def invalidateFilter(self):
+        self.invalidate_sort_ranks()
         if self.proxy_model:
             self.proxy_model.invalidateFilter()
 
@@ -258,6 +317,14 @@ class ExtSortFilterTableModel(ColumnedItemModelMixin, QAbstractTableModel, Attrs
         ColumnedItemModelMixin.__init__(self, parent, columns, columns_movable)
         QAbstractTableModel.__init__(self, parent)
 
+        # precomputed sort keys are valid until the model data changes; the signals are connected before
+        # the proxy model connects to them, so the keys are invalidated before the proxy re-sorts the rows
+        self.dataChanged.connect(self.invalidate_sort_ranks)
+        self.rowsInserted.connect(self.invalidate_sort_ranks)
+        self.rowsRemoved.connect(self.invalidate_sort_ranks)
+        self.modelReset.connect(self.invalidate_sort_ranks)
+        self.layoutChanged.connect(self.invalidate_sort_ranks)
+
         if filtering_sorting:
             self.enable_filter_proxy_model(self)
         self.data_lock = thread_utils.EnhRLock()
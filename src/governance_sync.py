@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Synchronization of the governance data read from the Crown network with the cache database.
+# Proposals: each cached proposal keeps a fingerprint of the governance object fields which change during the life
+# of a proposal (vote counts and validity flags - the remaining fields are part of the object hash); only the objects
+# returned by 'gobject list' whose fingerprint differs from the cached one are parsed and written to the database,
+# the proposals missing in the network are deactivated with a single statement.
+# Votes: the votes of a proposal returned by 'gobject getcurrentvotes' are compared with the cached ones by the vote
+# hash; the new votes are added and the ones no longer existing in the network are removed.
+# GovernanceSyncScheduler keeps the cache up to date in the background, so the proposals dialog opens with
+# the current data.
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Tuple, Optional, Dict, Any, Callable
+import vote_aggregates
+from common import AttrsProtected
+
+
+log = logging.getLogger('cmt.governance_sync')
+
+# definition of symbols' for DB live configuration (tabel LIVE_CONFIG)
+CFG_PROPOSALS_LAST_READ_TIME = 'proposals_last_read_time'
+CFG_PROPOSALS_VOTES_MAX_DATE = 'prop_votes_max_date'  # maximum date of vote(s), read last time
+
+# (proposal column name, PROPOSALS table column, is the value a boolean)
+PROPOSAL_DB_VALUES = (
+    ('name', 'name', False), ('payment_start', 'payment_start', False), ('payment_end', 'payment_end', False),
+    ('payment_amount', 'payment_amount', False), ('yes_count', 'yes_count', False),
+    ('absolute_yes_count', 'absolute_yes_count', False), ('no_count', 'no_count', False),
+    ('abstain_count', 'abstain_count', False), ('creation_time', 'creation_time', False), ('url', 'url', False),
+    ('payment_address', 'payment_address', False), ('type', 'type', False), ('hash', 'hash', False),
+    ('collateral_hash', 'collateral_hash', False), ('fBlockchainValidity', 'f_blockchain_validity', True),
+    ('fCachedValid', 'f_cached_valid', True), ('fCachedDelete', 'f_cached_delete', True),
+    ('fCachedFunding', 'f_cached_funding', True), ('fCachedEndorsed', 'f_cached_endorsed', True),
+    ('ObjectType', 'object_type', False), ('IsValidReason', 'is_valid_reason', False), ('owner', 'owner', False),
+    ('title', 'title', False))
+
+# values read from the network ('owner' and 'title' come from external sources)
+PROPOSAL_NETWORK_VALUES = tuple(v for v in PROPOSAL_DB_VALUES if v[0] not in ('owner', 'title'))
+
+# intervals (in seconds) of the background synchronization: of the proposal list and of the votes of active (voting
+# in progress) and closed proposals; the shorter ones are used when the voting deadline of the next superblock is near
+PROPOSALS_SYNC_INTERVAL = 3600
+PROPOSALS_SYNC_INTERVAL_NEAR_DEADLINE = 600
+VOTES_SYNC_INTERVAL_ACTIVE = 3600
+VOTES_SYNC_INTERVAL_ACTIVE_NEAR_DEADLINE = 900
+VOTES_SYNC_INTERVAL_CLOSED = 86400 * 7
+DEADLINE_NEAR_SECONDS = 86400 * 2
+SCHEDULER_CHECK_INTERVAL = 600  # maximum time between checking what needs to be synchronized
+BACKGROUND_RPC_CALL_PAUSE = 0.5  # pause after each network call of the background synchronization
+# the votes of at most this number of proposals are synchronized in one cycle and the next cycle begins after the
+# given delay, so a large backlog (as at the first run, when none of the proposals' votes has been read yet) is
+# spread over time
+VOTES_SYNC_MAX_PROPOSALS_PER_CYCLE = 5
+SCHEDULER_BACKLOG_CYCLE_INTERVAL = 300
+
+# governance object fields making up the fingerprint
+FINGERPRINT_FIELDS = ('Hash', 'YesCount', 'AbsoluteYesCount', 'NoCount', 'AbstainCount', 'fBlockchainValidity',
+                      'fCachedValid', 'fCachedDelete', 'fCachedFunding', 'fCachedEndorsed', 'IsValidReason')
+
+
+class ProposalsSyncResult(AttrsProtected):
+    def __init__(self):
+        super().__init__()
+        self.unchanged = 0
+        # lists of tuples: proposal db id, proposal values (key: column name), fingerprint
+        self.added: List[Tuple[int, Dict[str, Any], str]] = []
+        self.updated: List[Tuple[int, Dict[str, Any], str]] = []
+        self.removed: List[int] = []  # db ids of the deactivated proposals
+        self.errors = 0
+        self.set_attr_protection()
+
+    def __str__(self):
+        return f'unchanged: {self.unchanged}, updated: {len(self.updated)}, added: {len(self.added)}, ' \
+               f'removed: {len(self.removed)}'
+
+
+class VotesSyncResult(AttrsProtected):
+    def __init__(self):
+        super().__init__()
+        self.added: List[Tuple[str, int, str]] = []  # masternode ident, voting time, voting result
+        self.removed: List[str] = []  # masternode idents of the removed votes
+        self.max_voting_time = 0
+        self.errors = 0
+        self.set_attr_protection()
+
+
+def get_fingerprint(prop_raw: Dict) -> str:
+    return '|'.join(str(prop_raw.get(field)) for field in FINGERPRINT_FIELDS)
+
+
+def find_prop_data(prop_data, level=1):
+    """ Find proposal dict inside a list extracted from DataString field. """
+    if isinstance(prop_data, list):
+        if len(prop_data) > 2:
+            log.warning('len(prop_data) > 2 [level: %d]. prop_data: %s' % (level, json.dumps(prop_data)))
+
+        if len(prop_data) >= 2 and prop_data[0] == 'proposal' and isinstance(prop_data[1], dict):
+            return prop_data[1]
+        elif len(prop_data) >= 1 and isinstance(prop_data[0], list):
+            return find_prop_data(prop_data[0], level+1)
+    elif isinstance(prop_data, dict):
+        return prop_data
+    return None
+
+
+def clean_float(data_in):
+    # deals with JSON field 'payment_amount' passed as different type for different propsoals  - when it's
+    # a string, then comma (if exists) is replaced wit a dot, otherwise it's converted to a float
+    if isinstance(data_in, str):
+        return float(data_in.replace(',', '.'))
+    elif data_in is None:
+        return data_in
+    else:
+        return float(data_in)  # cast to float regardless of the type
+
+
+def parse_proposal(prop_raw: Dict) -> Optional[Dict[str, Any]]:
+    """
+    :return: values of a proposal (key: column name) read from a governance object returned by 'gobject list' or
+        None if the object does not contain proposal data
+    """
+    prop_data = find_prop_data(json.loads(prop_raw.get("DataString")))
+    if prop_data is None:
+        return None
+    return {
+        'name': prop_data['name'],
+        'payment_start': int(prop_data['start_epoch']),
+        'payment_end': int(prop_data['end_epoch']),
+        'payment_amount': clean_float(prop_data['payment_amount']),
+        'yes_count': int(prop_raw['YesCount']),
+        'absolute_yes_count': int(prop_raw['AbsoluteYesCount']),
+        'no_count': int(prop_raw['NoCount']),
+        'abstain_count': int(prop_raw['AbstainCount']),
+        'creation_time': int(prop_raw["CreationTime"]),
+        'url': prop_data['url'],
+        'payment_address': prop_data["payment_address"],
+        'type': prop_data['type'],
+        'hash': prop_raw['Hash'],
+        'collateral_hash': prop_raw['CollateralHash'],
+        'fBlockchainValidity': prop_raw['fBlockchainValidity'],
+        'fCachedValid': prop_raw['fCachedValid'],
+        'fCachedDelete': prop_raw['fCachedDelete'],
+        'fCachedFunding': prop_raw['fCachedFunding'],
+        'fCachedEndorsed': prop_raw['fCachedEndorsed'],
+        'ObjectType': prop_raw['ObjectType'],
+        'IsValidReason': prop_raw['IsValidReason']
+    }
+
+
+def read_cached_proposals(cur: sqlite3.Cursor) -> Dict[str, Tuple[int, Optional[str]]]:
+    """ :return: dict of the active cached proposals (key: hash, value: tuple: db id, fingerprint) """
+    cur.execute('SELECT hash, id, cmt_fingerprint FROM PROPOSALS WHERE cmt_active=1')
+    return {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+
+def sync_proposals(cur: sqlite3.Cursor, proposals_raw: Dict[str, Dict],
+                   cached: Dict[str, Tuple[int, Optional[str]]]) -> ProposalsSyncResult:
+    """
+    Saves the changes of the proposals read from the network (result of 'gobject list') to the cache database.
+    :param proposals_raw: governance objects returned by 'gobject list'
+    :param cached: the proposals known to the caller (key: hash, value: tuple: db id, fingerprint); the ones missing
+        in proposals_raw are deactivated
+    """
+    result = ProposalsSyncResult()
+    if not proposals_raw:
+        # skip deactivating records because probably some network glitch occured
+        log.warning('No proposals returned from crownd.')
+        return result
+
+    seen_hashes = set()
+    changes = []
+    for prop_raw in proposals_raw.values():
+        hash = prop_raw.get('Hash', '?')
+        try:
+            fingerprint = get_fingerprint(prop_raw)
+            cached_prop = cached.get(hash)
+            if cached_prop and cached_prop[1] == fingerprint:
+                seen_hashes.add(hash)
+                result.unchanged += 1
+                continue
+            values = parse_proposal(prop_raw)
+            if values is None:
+                continue
+            seen_hashes.add(hash)
+            changes.append((hash, values, fingerprint))
+        except Exception:
+            log.exception('Error while processing proposal data. Proposal hash: ' + hash)
+            seen_hashes.add(hash)  # don't deactivate the proposal because of a processing error
+            result.errors += 1
+
+    if result.errors >= len(proposals_raw) / 10:
+        raise Exception('Errors while processing proposals data. Look into the log file for details.')
+
+    cur_time = int(time.time())
+    db_columns = [db_col for _, db_col, _ in PROPOSAL_NETWORK_VALUES]
+    for hash, values, fingerprint in changes:
+        db_values = [values[name] for name, _, _ in PROPOSAL_NETWORK_VALUES]
+        cached_prop = cached.get(hash)
+        if cached_prop:
+            db_id = cached_prop[0]
+        else:
+            # the proposal may exist in the database as inactive, because crownd sometimes does not return some
+            # proposals
+            cur.execute('SELECT id, cmt_active FROM PROPOSALS WHERE hash=?', (hash,))
+            row = cur.fetchone()
+            db_id = row[0] if row else None
+            if row and not row[1]:
+                log.info('Proposal "%s" (db_id: %d) exists int the DB. Re-activating.' % (hash, db_id))
+
+        if db_id is None:
+            log.info('Adding a new proposal to DB. Hash: ' + hash)
+            cur.execute(f"INSERT INTO PROPOSALS ({', '.join(db_columns)}, cmt_active, cmt_create_time, "
+                        f"cmt_deactivation_time, cmt_voting_last_read_time, cmt_fingerprint) "
+                        f"VALUES({','.join('?' * len(db_columns))},1,?,NULL,0,?)",
+                        db_values + [cur_time, fingerprint])
+            result.added.append((cur.lastrowid, values, fingerprint))
+        else:
+            log.debug('Updating proposal in the DB. Hash: %s, DB id: %d' % (hash, db_id))
+            cur.execute(f"UPDATE PROPOSALS SET {', '.join(c + '=?' for c in db_columns)}, cmt_fingerprint=?, "
+                        f"cmt_active=1, cmt_deactivation_time=NULL WHERE id=?",
+                        db_values + [fingerprint, db_id])
+            if cached_prop:
+                result.updated.append((db_id, values, fingerprint))
+            else:
+                result.added.append((db_id, values, fingerprint))
+
+    result.removed = [db_id for hash, (db_id, _) in cached.items() if hash not in seen_hashes]
+    if result.removed:
+        log.info('Deactivating proposals in the cache. DB ids: %s' % str(result.removed))
+        cur.execute(f"UPDATE PROPOSALS SET cmt_active=0, cmt_deactivation_time=? "
+                    f"WHERE id IN ({','.join('?' * len(result.removed))})", [cur_time] + result.removed)
+
+    set_live_config_value(cur, CFG_PROPOSALS_LAST_READ_TIME, cur_time)
+
+    log.info('Proposals synchronized with the network. ' + str(result))
+    return result
+
+
+def get_getvotes_fun_name(crownd_intf) -> str:
+    node_info = crownd_intf.rpc_call(False, False, 'getinfo')
+    if node_info.get('version', 140000) < 140000:
+        return 'getvotes'
+    else:
+        return 'getcurrentvotes'
+
+
+def parse_vote(vote: str) -> Optional[Tuple[str, int, str]]:
+    """ :return: tuple: masternode ident, voting time, voting result or None if the vote couldn't be parsed """
+    match = re.search("CTxIn\(COutPoint\(([A-Fa-f0-9]+)\s*\,\s*(\d+).+\:(\d+)\:(\w+)", vote)  # v12.2
+    if not match or len(match.groups()) != 4:
+        match = re.search("([A-Fa-f0-9]+)\-(\d+)\:(\d+)\:(\w+)", vote)  # v12.3
+
+    if match and len(match.groups()) == 4:
+        voting_result = match.group(4)
+        if voting_result:
+            voting_result = voting_result.upper()
+        return match.group(1) + '-' + match.group(2), int(match.group(3)), voting_result
+    return None
+
+
+def sync_votes(cur: sqlite3.Cursor, proposal_id: int, votes: Dict[str, str]) -> VotesSyncResult:
+    """
+    Saves the changes of the votes of a proposal to the cache database and sets the proposal's last voting read time.
+    :param votes: votes read from the network (result of 'gobject getcurrentvotes'; key: vote hash)
+    """
+    result = VotesSyncResult()
+    cur.execute("SELECT id, hash, masternode_ident from VOTING_RESULTS WHERE proposal_id=?", (proposal_id,))
+    cached_votes = {vote_hash: (vote_id, masternode_ident) for vote_id, vote_hash, masternode_ident in cur.fetchall()}
+
+    votes_added = []
+    for vote_hash, vote in votes.items():
+        vote_data = parse_vote(vote)
+        if not vote_data:
+            log.warning('Proposal %s, parsing unsuccessful for voting: %s' % (proposal_id, vote))
+            result.errors += 1
+            continue
+        if vote_data[1] > result.max_voting_time:
+            result.max_voting_time = vote_data[1]
+        if vote_hash not in cached_votes:
+            votes_added.append((vote_hash,) + vote_data)
+
+    # remove all votes from the db cache that no longer exist on the network
+    votes_removed = [(vote_id, masternode_ident) for vote_hash, (vote_id, masternode_ident) in cached_votes.items()
+                     if vote_hash not in votes]
+    if votes_removed:
+        cur.executemany('DELETE from VOTING_RESULTS where id=?', [(vote_id,) for vote_id, _ in votes_removed])
+        vote_aggregates.invalidate(cur, proposal_id)
+        result.removed = [masternode_ident for _, masternode_ident in votes_removed]
+        log.info('Removed %s old votes from db cache for proposal %s', len(votes_removed), proposal_id)
+
+    # the votes are added in the voting time order, so that the vote aggregates can be updated incrementally
+    votes_added.sort(key=lambda v: v[2])
+    for vote_hash, mn_ident, voting_time, voting_result in votes_added:
+        vote_aggregates.add_vote(cur, proposal_id, mn_ident, voting_time, voting_result)
+        try:
+            cur.execute("INSERT INTO VOTING_RESULTS(proposal_id, masternode_ident, voting_time, voting_result, hash) "
+                        "VALUES(?,?,?,?,?)", (proposal_id, mn_ident, voting_time, voting_result, vote_hash))
+        except sqlite3.IntegrityError as e:
+            if e.args and e.args[0].find('UNIQUE constraint failed') >= 0:
+                # this vote is assigned to the same proposal but inactive one; correct this
+                cur.execute("SELECT proposal_id FROM VOTING_RESULTS WHERE hash=?", (vote_hash,))
+                for row in cur.fetchall():
+                    vote_aggregates.invalidate(cur, row[0])
+                cur.execute("UPDATE VOTING_RESULTS set proposal_id=?, masternode_ident=?, voting_time=?, "
+                            "voting_result=? WHERE hash=?",
+                            (proposal_id, mn_ident, voting_time, voting_result, vote_hash))
+            else:
+                raise
+        result.added.append((mn_ident, voting_time, voting_result))
+
+    cur.execute("UPDATE PROPOSALS set cmt_voting_last_read_time=? where id=?", (int(time.time()), proposal_id))
+    return result
+
+
+def set_live_config_value(cur: sqlite3.Cursor, symbol: str, value):
+    cur.execute("UPDATE LIVE_CONFIG SET value=? WHERE symbol=?", (value, symbol))
+    if cur.rowcount == 0:
+        cur.execute("INSERT INTO LIVE_CONFIG(symbol, value) VALUES(?, ?)", (symbol, value))
+
+
+class GovernanceSyncScheduler(object):
+    """
+    Synchronizes the proposals and votes with the cache database in the background. Each cycle synchronizes
+    the data whose interval has passed since the last synchronization (made by the scheduler or by the proposals
+    dialog) and then waits until the next data becomes due.
+    The synchronization yields to the foreground work: the database cursor is held only for writing the results of
+    a single network call, there is a pause after each network call and no synchronization is done while paused (when
+    the proposals dialog, reading the same data by itself, is open) or when the network is not available.
+    """
+
+    def __init__(self, crownd_intf, db_intf, is_network_available: Callable[[], bool]):
+        self.crownd_intf = crownd_intf
+        self.db_intf = db_intf
+        self.is_network_available = is_network_available
+        self.finishing = False
+        self.pause_count = 0
+        self.pause_lock = threading.Lock()
+        self.wake_event = threading.Event()
+
+    def stop(self):
+        self.finishing = True
+        self.wake_event.set()
+
+    def pause(self):
+        with self.pause_lock:
+            self.pause_count += 1
+
+    def resume(self):
+        with self.pause_lock:
+            self.pause_count -= 1
+        self.wake_event.set()
+
+    def is_interrupted(self):
+        return self.finishing or self.pause_count > 0
+
+    def run(self, ctrl):
+        """ Thread function. """
+        log.info('Background governance synchronization started.')
+        while not self.finishing and not ctrl.finish:
+            delay = SCHEDULER_CHECK_INTERVAL
+            if not self.is_interrupted() and self.is_network_available():
+                try:
+                    delay = min(self.sync_due_data(), SCHEDULER_CHECK_INTERVAL)
+                except Exception:
+                    log.exception('Exception while synchronizing governance data in the background.')
+            self.wake_event.wait(delay)
+            self.wake_event.clear()
+        log.info('Background governance synchronization finished.')
+
+    def get_superblock_times(self) -> Tuple[int, int, bool]:
+        """
+        :return: tuple: the time of the last superblock, the estimated time of the next superblock, True if
+            the voting deadline of the next superblock is near (or has passed and the superblock is not yet mined)
+        """
+        gi = self.crownd_intf.getgovernanceinfo()
+        superblock_cycle = gi.get('superblockcycle', 16616)
+        last_superblock = gi.get('lastsuperblock')
+        next_superblock = gi.get('nextsuperblock')
+        block_height = self.crownd_intf.getblockcount()
+        last_superblock_time = self.crownd_intf.getblockheader(self.crownd_intf.getblockhash(last_superblock))['time']
+        next_superblock_time = int(time.time() + (next_superblock - block_height) * 2.5 * 60)
+        deadline_block = next_superblock - round(superblock_cycle / 10)
+        deadline_near = (deadline_block - block_height) * 2.5 * 60 <= DEADLINE_NEAR_SECONDS and \
+            block_height < next_superblock
+        return last_superblock_time, next_superblock_time, deadline_near
+
+    def sync_due_data(self) -> float:
+        """
+        Synchronizes the data whose synchronization interval has passed.
+        :return: the number of seconds until the next data becomes due
+        """
+        last_superblock_time, next_superblock_time, deadline_near = self.get_superblock_times()
+        proposals_interval = PROPOSALS_SYNC_INTERVAL_NEAR_DEADLINE if deadline_near else PROPOSALS_SYNC_INTERVAL
+
+        cur = self.db_intf.get_cursor()
+        try:
+            cur.execute("SELECT value FROM LIVE_CONFIG WHERE symbol=?", (CFG_PROPOSALS_LAST_READ_TIME,))
+            row = cur.fetchone()
+            proposals_last_read_time = int(row[0]) if row and row[0] else 0
+        finally:
+            self.db_intf.release_cursor()
+
+        if time.time() - proposals_last_read_time >= proposals_interval:
+            self.sync_proposals()
+            proposals_last_read_time = int(time.time())
+        next_due_time = proposals_last_read_time + proposals_interval
+
+        cur = self.db_intf.get_cursor()
+        try:
+            cur.execute("SELECT id, hash, payment_start, payment_end, cmt_voting_last_read_time FROM PROPOSALS "
+                        "WHERE cmt_active=1")
+            proposals = cur.fetchall()
+        finally:
+            self.db_intf.release_cursor()
+
+        due_proposals = []  # (due time, proposal id, hash, interval)
+        for proposal_id, hash, payment_start, payment_end, voting_last_read_time in proposals:
+            voting_in_progress = (payment_start or 0) > last_superblock_time or \
+                                 (payment_end or 0) > next_superblock_time
+            if not voting_in_progress:
+                interval = VOTES_SYNC_INTERVAL_CLOSED
+            elif deadline_near:
+                interval = VOTES_SYNC_INTERVAL_ACTIVE_NEAR_DEADLINE
+            else:
+                interval = VOTES_SYNC_INTERVAL_ACTIVE
+            due_proposals.append(((voting_last_read_time or 0) + interval, proposal_id, hash, interval))
+        due_proposals.sort()
+
+        getvotes_fun_name = None
+        synced_count = 0
+        for due_time, proposal_id, hash, interval in due_proposals:
+            if self.is_interrupted():
+                break
+            if due_time <= time.time():
+                if synced_count >= VOTES_SYNC_MAX_PROPOSALS_PER_CYCLE:
+                    next_due_time = min(next_due_time, time.time() + SCHEDULER_BACKLOG_CYCLE_INTERVAL)
+                    break
+                if not getvotes_fun_name:
+                    getvotes_fun_name = get_getvotes_fun_name(self.crownd_intf)
+                self.sync_proposal_votes(getvotes_fun_name, proposal_id, hash)
+                synced_count += 1
+                due_time = time.time() + interval
+            next_due_time = min(next_due_time, due_time)
+
+        return max(next_due_time - time.time(), 0)
+
+    def sync_proposals(self):
+        proposals_raw = {}
+        self.crownd_intf.rpc_call_stream(proposals_raw.__setitem__, "gobject", "list", "valid", "proposals")
+        cur = self.db_intf.get_cursor()
+        try:
+            sync_proposals(cur, proposals_raw, read_cached_proposals(cur))
+            self.db_intf.commit()
+        except Exception:
+            self.db_intf.rollback()
+            raise
+        finally:
+            self.db_intf.release_cursor()
+        self.wake_event.wait(BACKGROUND_RPC_CALL_PAUSE)
+
+    def sync_proposal_votes(self, getvotes_fun_name: str, proposal_id: int, hash: str):
+        votes = self.crownd_intf.rpc_call(False, False, 'gobject', getvotes_fun_name, hash)
+        cur = self.db_intf.get_cursor()
+        try:
+            result = sync_votes(cur, proposal_id, votes)
+            cur.execute("SELECT value FROM LIVE_CONFIG WHERE symbol=?", (CFG_PROPOSALS_VOTES_MAX_DATE,))
+            row = cur.fetchone()
+            if not row or int(row[0]) < result.max_voting_time:
+                set_live_config_value(cur, CFG_PROPOSALS_VOTES_MAX_DATE, result.max_voting_time)
+            self.db_intf.commit()
+            log.debug('Synchronized the votes of proposal %s in the background, added: %d, removed: %d',
+                      proposal_id, len(result.added), len(result.removed))
+        except Exception:
+            self.db_intf.rollback()
+            raise
+        finally:
+            self.db_intf.release_cursor()
+        self.wake_event.wait(BACKGROUND_RPC_CALL_PAUSE)
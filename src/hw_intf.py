@@ -3,13 +3,13 @@
 # Author: Bertrand256
 # Created on: 2017-03
 import hashlib
+import importlib
 import sqlite3
 import threading
 from functools import partial
 from typing import Optional, Tuple, List, ByteString, Callable, Dict
 import sys
-
-import usb1
+import time
 from PyQt5 import QtWidgets
 
 import crown_utils
@@ -32,6 +32,29 @@ bip32_address_map: Dict[str, Dict[str, Tuple[str, int]]] = {}
 hd_tree_db_map: Dict[str, int] = {}  # Dict[str <hd tree ident>, int <db id>]
 
 
+# vendor backend modules, imported on the first connection to a device of the given type
+HW_BACKEND_MODULES = {
+    HWType.trezor: 'hw_intf_trezor',
+    HWType.keepkey: 'hw_intf_keepkey',
+    HWType.ledger_nano_s: 'hw_intf_ledgernano'
+}
+
+
+def load_hw_backend(hw_type: HWType):
+    """
+    Returns the backend module for the hardware wallet type. The backends (and the client libraries they depend on)
+    are imported only when they are needed for the first time, so they don't slow down the application startup
+    for users not using a hardware wallet.
+    """
+    module_name = HW_BACKEND_MODULES[hw_type]
+    module = sys.modules.get(module_name)
+    if module is None:
+        time_begin = time.time()
+        module = importlib.import_module(module_name)
+        logging.debug('Imported %s in %.3f s', module_name, time.time() - time_begin)
+    return module
+
+
 def control_trezor_keepkey_libs(connecting_to_hw):
     """
     Check if trying to switch between Trezor and Keepkey on Linux. It's not allowed because Trezor/Keepkey's client
@@ -54,6 +77,7 @@ def control_hw_call(func):
     """
     def catch_hw_client(*args, **kwargs):
         hw_session: HwSessionInfo = args[0]
+        import usb1
         client = hw_session.hw_client
         if not client:
             client = hw_session.hw_connect()
@@ -187,7 +211,7 @@ def connect_hw(hw_session: Optional[HwSessionInfo], hw_type: HWType, device_id:
 
     control_trezor_keepkey_libs(hw_type)
     if hw_type == HWType.trezor:
-        import hw_intf_trezor as trezor
+        trezor = load_hw_backend(hw_type)
         import trezorlib.client as client
         from trezorlib import btc, exceptions
         try:
@@ -221,7 +245,7 @@ def connect_hw(hw_session: Optional[HwSessionInfo], hw_type: HWType, device_id:
             raise HardwareWalletPinException(e.args[1])
 
     elif hw_type == HWType.keepkey:
-        import hw_intf_keepkey as keepkey
+        keepkey = load_hw_backend(hw_type)
         import keepkeylib.client as client
         try:
             cli = keepkey.connect_keepkey(passphrase_encoding=passphrase_encoding, device_id=device_id)
@@ -242,7 +266,7 @@ def connect_hw(hw_session: Optional[HwSessionInfo], hw_type: HWType, device_id:
             raise HardwareWalletPinException(e.args[1])
 
     elif hw_type == HWType.ledger_nano_s:
-        import hw_intf_ledgernano as ledger
+        ledger = load_hw_backend(hw_type)
         cli = ledger.connect_ledgernano()
         if cli and hw_session:
             try:
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Measures how long the modules imported during the application startup take to load (similar to the
+# "-X importtime" option of the interpreter). Enabled only for the startup benchmark runs; the report is written
+# to the log file in debug mode.
+
+import builtins
+import logging
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+REPORT_MAX_MODULES = 30
+
+log = logging.getLogger('cmt.import_timer')
+
+org_import = None
+durations: Dict[str, List[float]] = {}  # module name: [cumulative duration, self duration]
+local = threading.local()  # stack: durations of the child imports of the modules being imported by the thread
+
+
+def is_enabled(argv: List[str]) -> bool:
+    """ The configuration isn't read yet when the timer is to be started, so only the command line is checked. """
+    return '--startup-benchmark' in argv
+
+
+def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return org_import(name, globals, locals, fromlist, level)
+
+    stack = getattr(local, 'stack', None)
+    if stack is None:
+        stack = local.stack = []
+    stack.append([0.0])
+    time_begin = time.perf_counter()
+    try:
+        return org_import(name, globals, locals, fromlist, level)
+    finally:
+        duration = time.perf_counter() - time_begin
+        children_duration = stack.pop()[0]
+        if stack:
+            stack[-1][0] += duration
+        durations[name] = [duration, duration - children_duration]
+
+
+def start():
+    """ Starts recording the import times; to be called before importing the application modules. """
+    global org_import
+    if org_import is None:
+        org_import = builtins.__import__
+        builtins.__import__ = timed_import
+
+
+def stop():
+    global org_import
+    if org_import is not None:
+        builtins.__import__ = org_import
+        org_import = None
+
+
+def log_report(max_modules: Optional[int] = REPORT_MAX_MODULES):
+    """ Logs the total import time and the modules which took the longest to import (self time). """
+    if not durations:
+        return
+    total = sum(d[1] for d in durations.values())
+    lines = [f'Import time of {len(durations)} modules: {total:.3f}s; the slowest ones:',
+             '    self [s] | cumulative [s] | module']
+    for name, (cumulative, self_duration) in sorted(durations.items(), key=lambda x: x[1][1],
+                                                    reverse=True)[:max_modules]:
+        lines.append(f'    {self_duration:8.3f} | {cumulative:14.3f} | {name}')
+    log.debug('\n'.join(lines))
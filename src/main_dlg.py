@@ -17,7 +17,7 @@ import logging
 import urllib.request
 from PyQt5 import QtCore
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QSize, pyqtSlot, QEventLoop, QMutex, QWaitCondition, QUrl, Qt, QTimer
+from PyQt5.QtCore import QSize, pyqtSlot, QEventLoop, QMutex, QWaitCondition, QUrl, Qt, QTimer, QThread
 from PyQt5.QtGui import QFont, QIcon, QDesktopServices
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import QFileDialog, QMenu, QMainWindow, QPushButton, QStyle, QInputDialog, QApplication, \
@@ -40,6 +40,8 @@ import hw_pass_dlg
 import hw_pin_dlg
 import wallet_dlg
 import app_utils
+import governance_sync
+import startup_profile
 from initialize_hw_dlg import HwInitializeDlg
 from masternode_details import WdgMasternodeDetails
 from proposals_dlg import ProposalsDlg
@@ -85,6 +87,7 @@ class MainWindow(QMainWindow, WndUtils, ui_main_dlg.Ui_MainWindow):
         self.app_config.init(app_dir)
         self.app_config.sig_display_message.connect(self.add_app_message)
         WndUtils.set_app_config(self, self.app_config)
+        startup_profile.checkpoint('app config init')
 
         self.crownd_intf = CrowndInterface(window=None,
                                          on_connection_initiated_callback=self.show_connection_initiated,
@@ -114,6 +117,7 @@ class MainWindow(QMainWindow, WndUtils, ui_main_dlg.Ui_MainWindow):
                     self.recent_config_files.append(file_name)
 
         self.cmd_console_dlg = None
+        self.background_startup_started = False
         self.setupUi()
         ssl._create_default_https_context = ssl._create_unverified_context
 
@@ -195,19 +199,23 @@ class MainWindow(QMainWindow, WndUtils, ui_main_dlg.Ui_MainWindow):
         self.wdg_masternode.label_width_changed.connect(self.set_mn_labels_width)
 
         self.mns_user_refused_updating = {}
+        startup_profile.checkpoint('main window ui')
 
         # after loading whole configuration, reset 'modified' variable
         try:
             self.app_config.read_from_file(hw_session=self.hw_session, create_config_file=True)
         except Exception as e:
             raise
+        startup_profile.checkpoint('config file')
         self.display_window_title()
-        self.crownd_intf.initialize(self.app_config)
+        self.crownd_intf.initialize(self.app_config, load_db_cache=False)
+        self.governance_sync = governance_sync.GovernanceSyncScheduler(self.crownd_intf, self.app_config.db_intf,
+                                                                       self.is_governance_sync_possible)
+        self.governance_sync_thread = None
+        startup_profile.checkpoint('rpc interface init')
 
         self.update_edit_controls_state()
 
-        self.run_thread(self, self.get_project_config_params_thread, (False,))
-
         if self.app_config.app_config_file_name and os.path.exists(self.app_config.app_config_file_name):
             self.add_item_to_config_files_mru_list(self.app_config.app_config_file_name)
         self.update_config_files_mru_menu_items()
@@ -215,17 +223,59 @@ class MainWindow(QMainWindow, WndUtils, ui_main_dlg.Ui_MainWindow):
         self.inside_setup_ui = False
         self.configuration_to_ui()
         self.display_app_messages()
+        startup_profile.checkpoint('configuration to ui')
         logging.info('Finished setup of the main dialog.')
 
     def showEvent(self, QShowEvent):
         h = self.btnNewMn.height()
         self.btnMoveMnUp.setFixedHeight(h)
+        if not self.background_startup_started:
+            self.background_startup_started = True
+            # the timer fires after the events queued by showing the window (painting) have been processed
+            QTimer.singleShot(0, self.on_first_paint)
+
+    def on_first_paint(self):
+        startup_profile.mark_first_paint()
+        self.run_thread(self, self.background_startup_thread, (), on_thread_finish=self.on_background_startup_finished)
+
+    def background_startup_thread(self, ctrl):
+        """
+        The part of the application startup which is not needed to display the main window.
+        """
+        def run_phase(phase_name, fun, *args):
+            time_begin = time.time()
+            try:
+                fun(*args)
+            except Exception:
+                logging.exception('Exception in the startup phase: ' + phase_name)
+            startup_profile.add_background_phase(phase_name, time.time() - time_begin)
+
+        run_phase('masternodes cache', self.crownd_intf.load_data_from_db_cache)
+        run_phase('project config', self.get_project_config_params_thread, ctrl, False)
+
+    def on_background_startup_finished(self):
+        startup_profile.log_report()
+        if self.app_config.startup_benchmark:
+            print(startup_profile.get_report())
+            self.close()
+        else:
+            self.governance_sync_thread = self.run_thread(self, self.governance_sync.run, ())
+            self.governance_sync_thread.setPriority(QThread.LowestPriority)
+
+    def is_governance_sync_possible(self) -> bool:
+        # the background synchronization uses the connection opened by the user, it doesn't initiate one by itself;
+        # it's of no use for those who don't vote with their masternodes
+        return self.app_config.background_governance_sync and len(self.app_config.masternodes) > 0 and \
+            self.crownd_connection_ok and not self.is_crownd_syncing and not self.connecting_to_crownd
 
     def closeEvent(self, event):
         app_cache.save_window_size(self)
         self.finishing = True
+        self.governance_sync.stop()
         if self.crownd_intf:
             self.crownd_intf.disconnect()
+        if self.governance_sync_thread:
+            self.governance_sync_thread.wait(5000)
 
         if self.app_config.is_modified():
             if self.queryDlg('Configuration modified. Save?',
@@ -518,7 +568,7 @@ class MainWindow(QMainWindow, WndUtils, ui_main_dlg.Ui_MainWindow):
                 db_cursor.execute('drop table tx_input')
                 db_cursor.execute('drop table tx_output')
                 db_cursor.execute('drop table tx')
-                self.app_config.db_intf.create_structures()
+                self.app_config.db_intf.create_structures(force=True)
             finally:
                 self.app_config.db_intf.release_cursor()
             self.infoMsg('Wallet cache cleared.')
@@ -532,7 +582,8 @@ class MainWindow(QMainWindow, WndUtils, ui_main_dlg.Ui_MainWindow):
             try:
                 db_cursor.execute('drop table proposals')
                 db_cursor.execute('drop table voting_results')
-                self.app_config.db_intf.create_structures()
+                db_cursor.execute('drop table if exists votes_daily')
+                self.app_config.db_intf.create_structures(force=True)
             finally:
                 self.app_config.db_intf.release_cursor()
             self.infoMsg('Proposals cache cleared.')
@@ -1951,8 +2002,13 @@ class MainWindow(QMainWindow, WndUtils, ui_main_dlg.Ui_MainWindow):
 
     @pyqtSlot(bool)
     def on_action_open_proposals_window_triggered(self):
-        ui = ProposalsDlg(self, self.crownd_intf)
-        ui.exec_()
+        # the dialog reads the governance data by itself
+        self.governance_sync.pause()
+        try:
+            ui = ProposalsDlg(self, self.crownd_intf)
+            ui.exec_()
+        finally:
+            self.governance_sync.resume()
 
     @pyqtSlot(bool)
     def on_action_about_qt_triggered(self, enabled):
@@ -3,6 +3,7 @@
 # Author: Bertrand256
 # Created on: 2017-05
 
+import array
 import datetime
 import json
 import logging
@@ -11,12 +12,16 @@ from typing import List, Tuple, Optional, Callable, Dict, Any
 from urllib.error import URLError
 import random
 import re
-import sqlite3
 import threading
 import time
 import codecs
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from functools import partial
 import bitcoin
+from bitcoinrpc.authproxy import JSONRPCException
 from PyQt5 import QtWidgets, QtGui
 from PyQt5.QtChart import QChart, QChartView, QLineSeries, QDateTimeAxis, QValueAxis, QBarSet, QBarSeries, \
     QBarCategoryAxis
@@ -33,10 +38,13 @@ import app_utils
 import base58
 import wnd_utils as wnd_utils
 import crown_utils
+import governance_sync
+import vote_aggregates
 from app_config import MasternodeConfig, InputKeyType
 from common import AttrsProtected
 from crownd_intf import CrowndIndexException, Masternode
-from ext_item_model import ExtSortFilterTableModel, TableModelColumn
+from ext_item_model import ExtSortFilterTableModel, TableModelColumn, sort_key_value
+from governance_sync import PROPOSAL_DB_VALUES, CFG_PROPOSALS_LAST_READ_TIME, CFG_PROPOSALS_VOTES_MAX_DATE
 from ui import ui_proposals
 from wnd_utils import WndUtils, CloseDialogException
 
@@ -52,9 +60,20 @@ VOTE_CODE_YES = '1'
 VOTE_CODE_NO = '2'
 VOTE_CODE_ABSTAIN = '3'
 
-# definition of symbols' for DB live configuration (tabel LIVE_CONFIG)
-CFG_PROPOSALS_LAST_READ_TIME = 'proposals_last_read_time'
-CFG_PROPOSALS_VOTES_MAX_DATE = 'prop_votes_max_date'  # maximum date of vote(s), read last time
+# vote results stored in VoteMatrix by their int8 codes
+VOTE_RESULTS_BY_CODE = (None, 'YES', 'NO', 'ABSTAIN')
+VOTE_CODE_BY_RESULT = {result: code for code, result in enumerate(VOTE_RESULTS_BY_CODE) if result}
+
+# minimum number of votes for which the signing is done in parallel processes; used only with the pure-Python
+# signer, because each spawned process re-imports the application, which takes seconds
+VOTE_SIGN_POOL_MIN_VOTES = 500
+VOTE_SIGN_POOL_MAX_WORKERS = 8
+# number of votes sent to the node in a single JSON-RPC batch request
+VOTE_SUBMIT_BATCH_SIZE = 20
+
+# maximum number of masternode identifiers passed to a single query reading votes (SQLite limits the number of
+# query parameters)
+VOTES_QUERY_MAX_MASTERNODES = 500
 
 COLOR_YES = '#2eb82e'
 COLOR_NO = 'red'
@@ -93,6 +112,7 @@ class ProposalColumn(TableModelColumn):
         TableModelColumn.__init__(self, name, caption, visible)
         self.remove_attr_protection()
         self.column_for_vote = column_for_vote
+        self.vote_matrix_col = None  # for the vote columns: index of the masternode's column in VoteMatrix
         self.my_masternode = None  # True, if column for masternode vote relates to user's masternode
         self.initil_order = None  # order by voting-in-progress first, then by payment_start descending
         self.set_attr_protection()
@@ -110,6 +130,74 @@ class Vote(AttrsProtected):
         self.set_attr_protection()
 
 
+class VoteMatrix(AttrsProtected):
+    """
+    Proposals x masternodes matrix of the last votes of the masternodes having a vote column in the proposals grid.
+    Each masternode column consists of two arrays indexed by the proposal row: the vote results as int8 codes
+    (VOTE_RESULTS_BY_CODE, 0: no vote) and the vote timestamps as uint32 epoch seconds, so a column takes five bytes
+    per proposal. Each proposal gets its row when created; rows are never reused or removed, so a row index stays
+    valid for the whole life of the dialog; the same goes for the columns.
+    """
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()  # synchronizes adding rows (worker threads) with adding columns
+        self.col_index_by_mn_ident: Dict[str, int] = {}
+        self.results: List[array.array] = []  # vote result codes of the columns
+        self.timestamps: List[array.array] = []
+        self.row_count = 0
+        self.set_attr_protection()
+
+    def add_column(self, mn_ident: str) -> int:
+        with self.lock:
+            col_idx = self.col_index_by_mn_ident.get(mn_ident)
+            if col_idx is None:
+                col_idx = len(self.results)
+                self.results.append(array.array('b', bytes(self.row_count)))
+                self.timestamps.append(array.array('I', bytes(self.row_count * array.array('I').itemsize)))
+                self.col_index_by_mn_ident[mn_ident] = col_idx
+            return col_idx
+
+    def add_row(self) -> int:
+        with self.lock:
+            for col_idx in self.col_index_by_mn_ident.values():
+                self.results[col_idx].append(0)
+                self.timestamps[col_idx].append(0)
+            self.row_count += 1
+            return self.row_count - 1
+
+    def has_column(self, mn_ident: str) -> bool:
+        return mn_ident in self.col_index_by_mn_ident
+
+    def get_vote(self, row_idx: int, col_idx: int) -> Optional[str]:
+        return VOTE_RESULTS_BY_CODE[self.results[col_idx][row_idx]]
+
+    def get_last_vote(self, row_idx: int, mn_ident: str) -> Optional[Tuple[int, str]]:
+        """
+        :return: Optional[Tuple[int <vote time, epoch seconds>, str <vote>]]
+        """
+        col_idx = self.col_index_by_mn_ident.get(mn_ident)
+        if col_idx is not None:
+            code = self.results[col_idx][row_idx]
+            if code:
+                return self.timestamps[col_idx][row_idx], VOTE_RESULTS_BY_CODE[code]
+        return None
+
+    def apply_vote(self, row_idx: int, mn_ident: str, vote_timestamp: int, vote_result: str):
+        """ Sets the vote of a masternode having a vote column, if it's newer than the vote already set. """
+        col_idx = self.col_index_by_mn_ident.get(mn_ident)
+        code = VOTE_CODE_BY_RESULT.get(vote_result.upper()) if vote_result else None
+        if col_idx is not None and code:
+            if not self.results[col_idx][row_idx] or vote_timestamp > self.timestamps[col_idx][row_idx]:
+                self.results[col_idx][row_idx] = code
+                self.timestamps[col_idx][row_idx] = vote_timestamp
+
+    def remove_vote(self, row_idx: int, mn_ident: str):
+        col_idx = self.col_index_by_mn_ident.get(mn_ident)
+        if col_idx is not None:
+            self.results[col_idx][row_idx] = 0
+            self.timestamps[col_idx][row_idx] = 0
+
+
 class VotingMasternode(AttrsProtected):
     def __init__(self, masternode, masternode_config):
         """ Stores information about masternodes for which user has ability to vote.
@@ -126,8 +214,21 @@ class VotingMasternode(AttrsProtected):
         self.set_attr_protection()
 
 
+class VoteToSend(AttrsProtected):
+    def __init__(self, proposal: 'Proposal', mn_info: VotingMasternode, sig_time: int, message: str):
+        """ A vote being processed by ProposalsDlg.vote_thread. """
+        super().__init__()
+        self.proposal = proposal
+        self.mn_info = mn_info
+        self.sig_time = sig_time
+        self.message = message  # the serialized vote message to be signed
+        self.vote_sig = ''
+        self.error = ''
+        self.set_attr_protection()
+
+
 class Proposal(AttrsProtected):
-    def __init__(self, data_model, vote_columns_by_mn_ident, next_superblock_time,
+    def __init__(self, data_model, vote_matrix: VoteMatrix, next_superblock_time,
                  user_masternodes: List[VotingMasternode],
                  get_governance_info_fun: Callable,
                  find_prev_superblock: Callable,
@@ -141,16 +242,23 @@ class Proposal(AttrsProtected):
         self.data_model: ExtSortFilterTableModel = data_model
         self.values: Dict[ProposalColumn, Any] = {}  # dictionary of proposal values (key: ProposalColumn)
         self.db_id = None
+        self.fingerprint: Optional[str] = None  # see governance_sync
         self.marker = None
         self.modified = False
         self.next_superblock_time = next_superblock_time
         self.voting_last_read_time = 0
         self.voting_in_progress = True
-        self.vote_columns_by_mn_ident = vote_columns_by_mn_ident
-        self.votes_by_masternode_ident = {}  # list of tuples: vote_timestamp, vote_result
+        self.vote_matrix = vote_matrix
+        self.vote_row = vote_matrix.add_row()
         self.ext_attributes_loaded = False
         self.user_masternodes: List[VotingMasternode] = user_masternodes
 
+        # superblocks of the first and the last payment; set only when they are determined by the timestamps of the
+        # existing superblocks (i.e. they won't change) and cached in the PROPOSALS table
+        self.payment_start_superblock: Optional[int] = None
+        self.payment_end_superblock: Optional[int] = None
+        self.payment_superblocks_modified = False  # True, if the above values need to be saved to the cache
+
         # voting_status:
         #   1: voting in progress, funding
         #   2: voting in progress, no funding
@@ -190,42 +298,32 @@ class Proposal(AttrsProtected):
             else:
                 for col in self.data_model.columns():
                     if col.name == column:
+                        if col.column_for_vote:
+                            return self.vote_matrix.get_vote(self.vote_row, col.vote_matrix_col)
                         return self.values.get(col)
             raise AttributeError('Invalid proposal column name: ' + column)
         elif isinstance(column, int):
             # column is a column index
             if column >= 0 and column < self.data_model.col_count():
-                return self.values.get(self.data_model.col_by_index(column))
+                col = self.data_model.col_by_index(column)
+                if col.column_for_vote:
+                    return self.vote_matrix.get_vote(self.vote_row, col.vote_matrix_col)
+                return self.values.get(col)
             raise AttributeError('Invalid proposal column index: ' + str(column))
         raise AttributeError("Invalid 'column' attribute type.")
 
-    def get_last_mn_vote(self, mn_ident: str) -> Optional[Tuple[datetime.datetime, str]]:
+    def get_last_mn_vote(self, mn_ident: str) -> Optional[Tuple[int, str]]:
         """
-        :return: Optional[Tuple[datetime <vote time>, str <vote>]]
+        :return: Optional[Tuple[int <vote time, epoch seconds>, str <vote>]]
         """
-        return self.votes_by_masternode_ident.get(mn_ident)
+        return self.vote_matrix.get_last_vote(self.vote_row, mn_ident)
 
     def apply_vote(self, mn_ident, vote_timestamp, vote_result):
-        """ Apply vote result if a masternode is in the column list or is a user's masternode. """
-        modified = False
-        if mn_ident in self.votes_by_masternode_ident:
-            if vote_timestamp > self.votes_by_masternode_ident[mn_ident][0]:
-                self.votes_by_masternode_ident[mn_ident][0] = vote_timestamp
-                self.votes_by_masternode_ident[mn_ident][1] = vote_result
-                modified = True
-        else:
-            self.votes_by_masternode_ident[mn_ident] = [vote_timestamp, vote_result]
-            modified = True
-
-        if modified and mn_ident in self.vote_columns_by_mn_ident:
-            # this vote shoud be shown in the dynamic column for vote results
-            self.set_value(mn_ident, vote_result)
+        """ Apply vote result if a masternode is in the column list (the user's masternodes always are). """
+        self.vote_matrix.apply_vote(self.vote_row, mn_ident, vote_timestamp, vote_result)
 
     def remove_vote(self, mn_ident):
-        if self.votes_by_masternode_ident.get(mn_ident):
-            del self.votes_by_masternode_ident[mn_ident]
-            if mn_ident in self.vote_columns_by_mn_ident:
-                self.set_value(mn_ident, None)
+        self.vote_matrix.remove_vote(self.vote_row, mn_ident)
 
     def apply_values(self, masternodes, last_superblock_time, next_superblock_datetime):
         """ Calculate auto-calculated columns (eg. voting_in_progress and voting_status values). """
@@ -237,15 +335,7 @@ class Proposal(AttrsProtected):
         self.budget_cycle_hours = round(cycle_blocks * 2.5)
 
         payment_start = self.get_value('payment_start')
-        if payment_start:
-            payment_start = payment_start.timestamp()
-        else:
-            payment_start = None
         payment_end = self.get_value('payment_end')
-        if payment_end:
-            payment_end = payment_end.timestamp()
-        else:
-            payment_end = None
         funding_enabled = self.get_value('fCachedFunding')
 
         if payment_start and payment_end and isinstance(last_superblock_time, (int, float)) \
@@ -255,8 +345,20 @@ class Proposal(AttrsProtected):
         else:
             self.voting_in_progress = False
 
-        start_sb = self.find_next_superblock(payment_start)
-        end_sb = self.find_prev_superblock(payment_end)
+        # for the payment dates preceding the last superblock, finding the superblock may require reading
+        # the timestamps of many superblocks from the network, so the results are cached
+        start_sb = self.payment_start_superblock
+        if start_sb is None:
+            start_sb = self.find_next_superblock(payment_start)
+            if isinstance(last_superblock_time, (int, float)) and payment_start < last_superblock_time:
+                self.payment_start_superblock = start_sb
+                self.payment_superblocks_modified = True
+        end_sb = self.payment_end_superblock
+        if end_sb is None:
+            end_sb = self.find_prev_superblock(payment_end)
+            if isinstance(last_superblock_time, (int, float)) and payment_end < last_superblock_time:
+                self.payment_end_superblock = end_sb
+                self.payment_superblocks_modified = True
 
         payment_cycles = int((end_sb - start_sb) / cycle_blocks) + 1
 
@@ -301,13 +403,13 @@ class Proposal(AttrsProtected):
 
     def not_voted_by_user(self):
         for umn in self.user_masternodes:
-            if self.votes_by_masternode_ident.get(umn.masternode.ident) is None:
+            if self.get_last_mn_vote(umn.masternode.ident) is None:
                 return True
         return False
 
     def voted_by_user(self, vote: str):
         for umn in self.user_masternodes:
-            mnv = self.votes_by_masternode_ident.get(umn.masternode.ident)
+            mnv = self.get_last_mn_vote(umn.masternode.ident)
             if mnv:
                 if mnv[1] == vote:
                     return True
@@ -323,7 +425,7 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
         self.finishing = False  # True if the dialog is closing (all thread operations will be stopped)
         self.crownd_intf = crownd_intf
         self.db_intf = self.app_config.db_intf
-        self.vote_columns_by_mn_ident = {}
+        self.vote_matrix = VoteMatrix()
         self.proposals = []
         self.proposals_by_hash = {}  # dict of Proposal object indexed by proposal hash
         self.proposals_by_db_id = {}
@@ -390,6 +492,8 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
         self.votes_loaded = False
         self.last_chart_type = None
         self.last_chart_proposal = None
+        # daily vote aggregates of the current proposal (see vote_aggregates.read)
+        self.vote_chart_data: List[Tuple] = []
         self.controls_initialized = False
         self.vote_chart = QChart()
         self.vote_chart_view = QChartView(self.vote_chart)
@@ -427,7 +531,7 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
                 self.propsView.verticalHeader().fontMetrics().height() + 6)
 
             # create model serving data to the view
-            self.propsModel = ProposalsModel(self, self.proposals)
+            self.propsModel = ProposalsModel(self, self.proposals, self.vote_matrix)
             self.propsModel.add_filter_column(self.propsModel.col_index_by_name('title'))
             self.propsModel.add_filter_column(self.propsModel.col_index_by_name('name'))
             self.propsModel.add_filter_column(self.propsModel.col_index_by_name('owner'))
@@ -484,6 +588,8 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
         self.refresh_details_event.set()
         self.votesModel.finish()
         self.save_cache_settings()
+        for mn in self.masternodes_cfg:
+            mn.wipe_voting_key_material()
         log.info('Closing the dialog.')
 
     def restore_cache_settings(self):
@@ -679,13 +785,14 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
         col = self.propsModel.col_by_name(mn_ident)
         if col:
             col.column_for_vote = True
+            col.vote_matrix_col = self.vote_matrix.add_column(mn_ident)
         else:
             col = ProposalColumn(mn_ident, mn_label, visible=True, column_for_vote=True)
+            col.vote_matrix_col = self.vote_matrix.add_column(mn_ident)
             if isinstance(insert_before_column, int) and insert_before_column < self.propsModel.col_count():
                 self.propsModel.insert_column(insert_before_column, col)
             else:
                 self.propsModel.insert_column(self.propsModel.col_count(), col)
-            self.vote_columns_by_mn_ident[mn_ident] = col
 
             if my_masternode is None:
                 # check if the specified masternode exists in the user configuration; if so, mark the column
@@ -825,246 +932,71 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
     def read_proposals_from_network(self):
         """ Reads proposals from the Crown network. """
 
-        def find_prop_data(prop_data, level=1):
-            """ Find proposal dict inside a list extracted from DataString field. """
-            if isinstance(prop_data, list):
-                if len(prop_data) > 2:
-                    log.warning('len(prop_data) > 2 [level: %d]. prop_data: %s' % (level, json.dumps(prop_data)))
-
-                if len(prop_data) >= 2 and prop_data[0] == 'proposal' and isinstance(prop_data[1], dict):
-                    return prop_data[1]
-                elif len(prop_data) >= 1 and isinstance(prop_data[0], list):
-                    return find_prop_data(prop_data[0], level+1)
-            elif isinstance(prop_data, dict):
-                return prop_data
-            return None
-
-        def clean_float(data_in):
-            # deals with JSON field 'payment_amount' passed as different type for different propsoals  - when it's
-            # a string, then comma (if exists) is replaced wit a dot, otherwise it's converted to a float
-            if isinstance(data_in, str):
-                return float(data_in.replace(',', '.'))
-            elif data_in is None:
-                return data_in
-            else:
-                return float(data_in)  # cast to float regardless of the type
-
         try:
 
             self.display_message('Reading proposals data, please wait...')
             log.info('Reading proposals from the Crown network.')
             begin_time = time.time()
-            proposals_new = self.crownd_intf.gobject("list", "valid", "proposals")
+            proposals_new = {}
+            self.crownd_intf.rpc_call_stream(proposals_new.__setitem__, "gobject", "list", "valid", "proposals")
             log.info('Read proposals from network (gobject list). Count: %s, operation time: %s' %
                          (str(len(proposals_new)), str(time.time() - begin_time)))
 
-            rows_added = False
-
-            # reset marker value in all existing Proposal object - we'll use it to check which
-            # of prevoiusly read proposals do not exit anymore
-            for prop in self.proposals:
-                prop.marker = False
-                prop.modified = False  # all modified proposals will be saved to DB cache
-
-            errors = 0
-            for pro_key in proposals_new:
-                hash = '?'
-                try:
-                    prop_raw = proposals_new[pro_key]
+            if self.finishing:
+                raise CloseDialogException
 
-                    prop_dstr = prop_raw.get("DataString")
-                    prop_data_json = json.loads(prop_dstr)
-                    prop_data = find_prop_data(prop_data_json)
-                    if prop_data is None:
-                        continue
-                    hash = prop_raw['Hash']
-                    log.debug('Read proposal: ' + hash)
-                    prop = self.proposals_by_hash.get(hash)
-                    if not prop:
-                        is_new = True
-                        prop = Proposal(self.propsModel, self.vote_columns_by_mn_ident, self.next_superblock_time,
-                                        self.users_masternodes, self.get_governance_info,
-                                        self.find_prev_superblock, self.find_next_superblock)
-                    else:
-                        is_new = False
-                    prop.marker = True
-
-                    prop.set_value('name', prop_data['name'])
-                    prop.set_value('payment_start', datetime.datetime.fromtimestamp(int(prop_data['start_epoch'])))
-                    prop.set_value('payment_end', datetime.datetime.fromtimestamp(int(prop_data['end_epoch'])))
-                    prop.set_value('payment_amount', clean_float(prop_data['payment_amount']))
-                    prop.set_value('yes_count', int(prop_raw['YesCount']))
-                    prop.set_value('absolute_yes_count', int(prop_raw['AbsoluteYesCount']))
-                    prop.set_value('no_count', int(prop_raw['NoCount']))
-                    prop.set_value('abstain_count', int(prop_raw['AbstainCount']))
-                    prop.set_value('creation_time', datetime.datetime.fromtimestamp(int(prop_raw["CreationTime"])))
-                    prop.set_value('url', prop_data['url'])
-                    prop.set_value('payment_address', prop_data["payment_address"])
-                    prop.set_value('type', prop_data['type'])
-                    prop.set_value('hash', hash)
-                    prop.set_value('collateral_hash', prop_raw['CollateralHash'])
-                    prop.set_value('fBlockchainValidity', prop_raw['fBlockchainValidity'])
-                    prop.set_value('fCachedValid', prop_raw['fCachedValid'])
-                    prop.set_value('fCachedDelete', prop_raw['fCachedDelete'])
-                    prop.set_value('fCachedFunding', prop_raw['fCachedFunding'])
-                    prop.set_value('fCachedEndorsed', prop_raw['fCachedEndorsed'])
-                    prop.set_value('ObjectType', prop_raw['ObjectType'])
-                    prop.set_value('IsValidReason', prop_raw['IsValidReason'])
+            cached = {prop.get_value('hash'): (prop.db_id, prop.fingerprint) for prop in self.proposals}
+            cur = self.db_intf.get_cursor()
+            try:
+                result = governance_sync.sync_proposals(cur, proposals_new, cached)
+
+                for db_id, values, fingerprint in result.added:
+                    prop = Proposal(self.propsModel, self.vote_matrix, self.next_superblock_time,
+                                    self.users_masternodes, self.get_governance_info,
+                                    self.find_prev_superblock, self.find_next_superblock)
+                    for name, value in values.items():
+                        prop.set_value(name, value)
+                    prop.db_id = db_id
+                    prop.fingerprint = fingerprint
+                    self.proposals.append(prop)
+                    self.proposals_by_hash[prop.get_value('hash')] = prop
+                    self.proposals_by_db_id[db_id] = prop
+
+                for db_id, values, fingerprint in result.updated:
+                    prop = self.proposals_by_db_id.get(db_id)
+                    if prop:
+                        for name, value in values.items():
+                            prop.set_value(name, value)
+                        prop.fingerprint = fingerprint
+
+                # the voting status depends also on the superblock times, so it's calculated for all the proposals
+                for prop in self.proposals:
                     prop.apply_values(self.masternodes, self.last_superblock_time, self.next_superblock_time)
-                    if is_new:
-                        self.proposals.append(prop)
-                        self.proposals_by_hash[prop.get_value('hash')] = prop
-                        rows_added = True
-                except Exception as e:
-                    log.exception('Error while processing proposal data. Proposal hash: ' + hash)
-                    errors += 1
-
-            if len(proposals_new) > 0:
-                if errors < len(proposals_new)/10:
-                    try:
-                        cur = self.db_intf.get_cursor()
-
-                        for prop in self.proposals:
-                            if self.finishing:
-                                raise CloseDialogException
-
-                            if prop.marker:
-                                if not prop.db_id:
-                                    # first, check if there is a proposal with the same hash in the database
-                                    # crownd sometimes does not return some proposals, so they are deactivated id the db
-                                    hash = prop.get_value('hash')
-                                    cur.execute('SELECT id from PROPOSALS where hash=?', (hash,))
-                                    row = cur.fetchone()
-                                    if row:
-                                        prop.db_id = row[0]
-                                        prop.modified = True
-                                        cur.execute('UPDATE PROPOSALS set cmt_active=1, cmt_deactivation_time=NULL '
-                                                    'WHERE id=?', (row[0],))
-                                        log.info('Proposal "%s" (db_id: %d) exists int the DB. Re-activating.' %
-                                                     (hash, row[0]))
-
-                                if not prop.db_id:
-                                    log.info('Adding a new proposal to DB. Hash: ' + prop.get_value('hash'))
-                                    cur.execute("INSERT INTO PROPOSALS (name, payment_start, payment_end, payment_amount,"
-                                                " yes_count, absolute_yes_count, no_count, abstain_count, creation_time,"
-                                                " url, payment_address, type, hash, collateral_hash, f_blockchain_validity,"
-                                                " f_cached_valid, f_cached_delete, f_cached_funding, f_cached_endorsed, "
-                                                " object_type, is_valid_reason, cmt_active, cmt_create_time, "
-                                                " cmt_deactivation_time, cmt_voting_last_read_time)"
-                                                " VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,0)",
-                                                (prop.get_value('name'),
-                                                 prop.get_value('payment_start').strftime('%Y-%m-%d %H:%M:%S'),
-                                                 prop.get_value('payment_end').strftime('%Y-%m-%d %H:%M:%S'),
-                                                 prop.get_value('payment_amount'),
-                                                 prop.get_value('yes_count'),
-                                                 prop.get_value('absolute_yes_count'),
-                                                 prop.get_value('no_count'),
-                                                 prop.get_value('abstain_count'),
-                                                 prop.get_value('creation_time').strftime('%Y-%m-%d %H:%M:%S'),
-                                                 prop.get_value('url'),
-                                                 prop.get_value('payment_address'),
-                                                 prop.get_value('type'),
-                                                 prop.get_value('hash'),
-                                                 prop.get_value('collateral_hash'),
-                                                 prop.get_value('fBlockchainValidity'),
-                                                 prop.get_value('fCachedValid'),
-                                                 prop.get_value('fCachedDelete'),
-                                                 prop.get_value('fCachedFunding'),
-                                                 prop.get_value('fCachedEndorsed'),
-                                                 prop.get_value('ObjectType'),
-                                                 prop.get_value('IsValidReason'),
-                                                 1,
-                                                 datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                                                 None))
-                                    prop.db_id = cur.lastrowid
-                                    self.proposals_by_db_id[prop.db_id] = prop
-                                else:
-                                    # proposal's db record already exists, check if should be updated
-                                    if prop.modified:
-                                        log.debug('Updating proposal in the DB. Hash: %s, DB id: %d' %
-                                                      (prop.get_value('hash'), prop.db_id) )
-                                        cur.execute("UPDATE PROPOSALS set name=?, payment_start=?, payment_end=?, "
-                                                    "payment_amount=?, yes_count=?, absolute_yes_count=?, no_count=?, "
-                                                    "abstain_count=?, creation_time=?, url=?, payment_address=?, type=?,"
-                                                    "hash=?, collateral_hash=?, f_blockchain_validity=?, f_cached_valid=?,"
-                                                    "f_cached_delete=?, f_cached_funding=?, f_cached_endorsed=?, object_type=?,"
-                                                    "is_valid_reason=? WHERE id=?",
-                                                    (
-                                                        prop.get_value('name'),
-                                                        prop.get_value('payment_start').strftime('%Y-%m-%d %H:%M:%S'),
-                                                        prop.get_value('payment_end').strftime('%Y-%m-%d %H:%M:%S'),
-                                                        prop.get_value('payment_amount'),
-                                                        prop.get_value('yes_count'),
-                                                        prop.get_value('absolute_yes_count'),
-                                                        prop.get_value('no_count'),
-                                                        prop.get_value('abstain_count'),
-                                                        prop.get_value('creation_time').strftime('%Y-%m-%d %H:%M:%S'),
-                                                        prop.get_value('url'),
-                                                        prop.get_value('payment_address'),
-                                                        prop.get_value('type'),
-                                                        prop.get_value('hash'),
-                                                        prop.get_value('collateral_hash'),
-                                                        prop.get_value('fBlockchainValidity'),
-                                                        prop.get_value('fCachedValid'),
-                                                        prop.get_value('fCachedDelete'),
-                                                        prop.get_value('fCachedFunding'),
-                                                        prop.get_value('fCachedEndorsed'),
-                                                        prop.get_value('ObjectType'),
-                                                        prop.get_value('IsValidReason'),
-                                                        prop.db_id
-                                                    ))
-
-                        # delete proposals which no longer exists in tha Crown network
-                        rows_removed = False
-                        for prop_idx in reversed(range(len(self.proposals))):
-                            if self.finishing:
-                                raise CloseDialogException
-
-                            prop = self.proposals[prop_idx]
-
-                            if not prop.marker:
-                                log.info('Deactivating proposal in the cache. Hash: %s, DB id: %s' %
-                                              (prop.get_value('hash'), str(prop.db_id)))
-                                cur.execute("UPDATE PROPOSALS set cmt_active=0, cmt_deactivation_time=? WHERE id=?",
-                                            (datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), prop.db_id))
 
-                                self.proposals_by_hash.pop(prop.get_value('hash'), 0)
-                                self.proposals_by_db_id.pop(prop.db_id)
-                                del self.proposals[prop_idx]
-                                rows_removed = True
+                self.save_payment_superblocks(cur)
 
-                        # self.set_cache_value('ProposalsLastReadTime', int(time.time()))  # save when proposals has been
-                        cur.execute("UPDATE LIVE_CONFIG SET value=? WHERE symbol=?",
-                                    (int(time.time()), CFG_PROPOSALS_LAST_READ_TIME))
-                        if cur.rowcount == 0:
-                            cur.execute("INSERT INTO LIVE_CONFIG(symbol, value) VALUES(?, ?)",
-                                        (CFG_PROPOSALS_LAST_READ_TIME, int(time.time())))
+                if result.removed:
+                    removed = set(result.removed)
+                    for prop in [p for p in self.proposals if p.db_id in removed]:
+                        self.proposals_by_hash.pop(prop.get_value('hash'), 0)
+                        self.proposals_by_db_id.pop(prop.db_id)
+                        self.proposals.remove(prop)
 
-                        if rows_added or rows_removed:
-                            WndUtils.call_in_main_thread(self.display_proposals_data)
-
-                    except CloseDialogException:
-                        raise
+                if result.added or result.removed:
+                    WndUtils.call_in_main_thread(self.display_proposals_data)
 
-                    except Exception as e:
-                        log.exception('Exception while saving proposals to db.')
-                        self.db_intf.rollback()
-                        raise
-                    finally:
-                        self.db_intf.commit()
-                        self.db_intf.release_cursor()
-                        self.display_message('')
+            except Exception as e:
+                log.exception('Exception while saving proposals to db.')
+                self.db_intf.rollback()
+                raise
+            finally:
+                self.db_intf.commit()
+                self.db_intf.release_cursor()
+                self.display_message('')
 
-                    if errors > 0:
-                        self.warnMsg('Problems encountered while processing some of the proposals data. '
-                                     'Look into the log file for details.')
-                else:
-                    # error count > 10% of the proposals count
-                    raise Exception('Errors while processing proposals data. Look into the log file for details.')
-            else:
-                # no proposals read from network - skip deactivating records because probably
-                # some network glitch occured
-                log.warning('No proposals returned from crownd.')
+            if result.errors > 0:
+                self.warnMsg('Problems encountered while processing some of the proposals data. '
+                             'Look into the log file for details.')
             log.info('Finished reading proposals data from network.')
 
         except CloseDialogException:
@@ -1166,6 +1098,19 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
                     superblock += self.superblock_cycle
                     sb_ts += (self.superblock_cycle * 2.5 * 60)
 
+    def save_payment_superblocks(self, cur) -> bool:
+        """
+        Saves to the cache the newly determined superblocks of the proposal payments.
+        :return: True if any proposal has been updated
+        """
+        props = [p for p in self.proposals if p.payment_superblocks_modified and p.db_id is not None]
+        if props:
+            cur.executemany('UPDATE PROPOSALS SET cmt_start_superblock=?, cmt_end_superblock=? WHERE id=?',
+                            [(p.payment_start_superblock, p.payment_end_superblock, p.db_id) for p in props])
+            for p in props:
+                p.payment_superblocks_modified = False
+        return len(props) > 0
+
     def refresh_filter(self):
         self.propsModel.invalidateFilter()
 
@@ -1229,8 +1174,6 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
 
                             # read all proposals from DB cache
                             cur = self.db_intf.get_cursor()
-                            cur_fix = self.db_intf.get_cursor()
-                            cur_fix_upd = self.db_intf.get_cursor()
 
                             cur.execute("SELECT value FROM LIVE_CONFIG WHERE symbol=?", (CFG_PROPOSALS_LAST_READ_TIME,))
                             row = cur.fetchone()
@@ -1239,88 +1182,55 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
 
                             log.info("Reading proposals' data from DB")
                             tm_begin = time.time()
+                            # columns of the proposals model receiving the PROPOSALS table values
+                            db_values = [(self.propsModel.col_by_name(name), is_bool)
+                                         for name, _, is_bool in PROPOSAL_DB_VALUES]
+                            vals_count = len(db_values)
                             cur.execute(
-                                "SELECT name, payment_start, payment_end, payment_amount,"
-                                " yes_count, absolute_yes_count, no_count, abstain_count, creation_time,"
-                                " url, payment_address, type, hash, collateral_hash, f_blockchain_validity,"
-                                " f_cached_valid, f_cached_delete, f_cached_funding, f_cached_endorsed, object_type,"
-                                " is_valid_reason, cmt_active, cmt_create_time, cmt_deactivation_time, id,"
-                                " cmt_voting_last_read_time, owner, title, ext_attributes_loaded, "
-                                "ext_attributes_load_time "
-                                "FROM PROPOSALS where cmt_active=1"
-                            )
-
-                            data_modified = False
+                                f"SELECT {', '.join(db_col for _, db_col, _ in PROPOSAL_DB_VALUES)}, id, "
+                                "cmt_voting_last_read_time, ext_attributes_loaded, ext_attributes_load_time, "
+                                "cmt_start_superblock, cmt_end_superblock, cmt_fingerprint FROM PROPOSALS "
+                                "where cmt_active=1")
+
+                            cur_time = time.time()
                             for row in cur.fetchall():
                                 if self.finishing:
                                     raise CloseDialogException
 
-                                # fix the problem of duplicated proposals with the same hash, which could be
-                                # deactivated due to some problems with previuos executions
-                                # select all proposals with the same hash and move their votes to the current one
-                                cur_fix.execute('select id from PROPOSALS where hash=? and id<>?',
-                                                (row[12], row[24]))
-                                for fix_row in cur_fix.fetchall():
-                                    cur_fix_upd.execute('UPDATE VOTING_RESULTS set proposal_id=? where proposal_id=?',
-                                                        (row[24], fix_row[0]))
-                                    cur_fix_upd.execute('DELETE FROM PROPOSALS WHERE id=?', (fix_row[0],))
-                                    data_modified = True
-                                    log.warning('Deleted duplicated proposal from DB. ID: %s, HASH: %s' %
-                                                    (str(fix_row[0]), row[12]))
-
-                                log.debug('Reading proposal: ' + row[0])
-                                prop = Proposal(self.propsModel, self.vote_columns_by_mn_ident,
+                                prop = Proposal(self.propsModel, self.vote_matrix,
                                                 self.next_superblock_time, self.users_masternodes,
                                                 self.get_governance_info,
                                                 self.find_prev_superblock, self.find_next_superblock)
-                                prop.set_value('name', row[0])
-                                prop.set_value('payment_start', datetime.datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S'))
-                                prop.set_value('payment_end',  datetime.datetime.strptime(row[2], '%Y-%m-%d %H:%M:%S'))
-                                prop.set_value('payment_amount', row[3])
-                                prop.set_value('yes_count', row[4])
-                                prop.set_value('absolute_yes_count', row[5])
-                                prop.set_value('no_count', row[6])
-                                prop.set_value('abstain_count', row[7])
-                                prop.set_value('creation_time', datetime.datetime.strptime(row[8], '%Y-%m-%d %H:%M:%S'))
-                                prop.set_value('url', row[9])
-                                prop.set_value('payment_address', row[10])
-                                prop.set_value('type', row[11])
-                                prop.set_value('hash', row[12])
-                                prop.set_value('collateral_hash', row[13])
-                                prop.set_value('fBlockchainValidity', True if row[14] else False)
-                                prop.set_value('fCachedValid', True if row[15] else False)
-                                prop.set_value('fCachedDelete', True if row[16] else False)
-                                prop.set_value('fCachedFunding', True if row[17] else False)
-                                prop.set_value('fCachedEndorsed', True if row[18] else False)
-                                prop.set_value('ObjectType', row[19])
-                                prop.set_value('IsValidReason', row[20])
-                                prop.db_id = row[24]
-                                prop.voting_last_read_time = row[25]
-                                prop.set_value('owner', row[26])
-                                prop.set_value('title', row[27])
-                                prop.ext_attributes_loaded = True if row[28] else False
-
-                                ext_attributes_load_time = 0 if not row[29] else row[29]
+                                prop.values = {col: (bool(value) if is_bool else value)
+                                               for (col, is_bool), value in zip(db_values, row)}
+                                prop.db_id, prop.voting_last_read_time, ext_attributes_loaded, \
+                                    ext_attributes_load_time, prop.payment_start_superblock, \
+                                    prop.payment_end_superblock, prop.fingerprint = row[vals_count:]
+                                prop.ext_attributes_loaded = True if ext_attributes_loaded else False
+
+                                ext_attributes_load_time = 0 if not ext_attributes_load_time else \
+                                    ext_attributes_load_time
                                 if prop.ext_attributes_loaded:
-                                    if not row[26] and not row[27] and time.time() - ext_attributes_load_time > 86400:
+                                    if not prop.get_value('owner') and not prop.get_value('title') and \
+                                            cur_time - ext_attributes_load_time > 86400:
                                         # reload external attributes is the 'owner' and 'title' are ampty
                                         prop.ext_attributes_loaded = False
-                                    elif (time.time() - ext_attributes_load_time > 86400 * 3) and \
-                                        (prop.get_value('payment_end') > datetime.datetime.now()):
+                                    elif (cur_time - ext_attributes_load_time > 86400 * 3) and \
+                                        (prop.get_value('payment_end') > cur_time):
                                         # reload external attributes of the active proposals every x days in case
                                         # the proposal title changed
                                         prop.ext_attributes_loaded = False
 
-                                # todo: optimize; for very old proposals exising in the cache, especially for testnet,
-                                #  apply_values may have to fetch a large number of transactions from the network (to
-                                #  calculate the number of payment cycles that apply to the proposal), which can
-                                #  significantly slowndown the display of the list of proposals
+                                # the superblocks of the payments are cached, so apply_values only has to read
+                                # superblock timestamps from the network for the proposals new in the cache
                                 prop.apply_values(self.masternodes, self.last_superblock_time,
                                                   self.next_superblock_time)
                                 self.proposals.append(prop)
                                 self.proposals_by_hash[prop.get_value('hash')] = prop
                                 self.proposals_by_db_id[prop.db_id] = prop
 
+                            data_modified = self.save_payment_superblocks(cur)
+
                             if data_modified:
                                 self.db_intf.commit()
 
@@ -1342,8 +1252,6 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
                             self.errorMsg('Error while saving proposals data to db. Details: ' + str(e))
                         finally:
                             self.db_intf.release_cursor()
-                            self.db_intf.release_cursor()
-                            self.db_intf.release_cursor()
 
                     # read voting data from DB (only for "voting" columns)
                     self.read_voting_from_db()
@@ -1524,9 +1432,10 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
         return modified_ext_attributes
 
     def read_voting_from_db(self):
-        """ Read voting results for specified voting columns
-        :param columns list of voting columns for which data will be loaded from db; it is used when user adds
-          a new column - wee want read data only for this column
+        """
+        Reads the last votes of the masternodes having vote columns for all the active proposals. The votes of all
+        the masternodes are read by one query (per VOTES_QUERY_MAX_MASTERNODES masternodes), returning only the
+        latest vote per proposal and masternode.
         """
         self.display_message('Reading voting data from DB, please wait...')
         begin_time = time.time()
@@ -1534,22 +1443,22 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
         try:
             cur = self.db_intf.get_cursor()
 
-            for col in self.propsModel.columns():
-                if col.column_for_vote:
-                    mn_ident = col.name
-                    mn = self.masternodes_by_ident.get(mn_ident)
-                    if mn:
-                        cur.execute("SELECT proposal_id, voting_time, voting_result "
-                                    "FROM VOTING_RESULTS vr WHERE masternode_ident=? AND EXISTS "
-                                    "(SELECT 1 FROM PROPOSALS p where p.id=vr.proposal_id and p.cmt_active=1)",
-                                    (mn_ident,))
-                        for row in cur.fetchall():
-                            if self.finishing:
-                                raise CloseDialogException
-                            prop = self.proposals_by_db_id.get(row[0])
-                            if prop:
-                                prop.apply_vote(mn_ident, datetime.datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S'),
-                                                row[2])
+            mn_idents = [col.name for col in self.propsModel.columns()
+                         if col.column_for_vote and col.name in self.masternodes_by_ident]
+            for idx in range(0, len(mn_idents), VOTES_QUERY_MAX_MASTERNODES):
+                idents_chunk = mn_idents[idx: idx + VOTES_QUERY_MAX_MASTERNODES]
+                # SQLite takes the values of the other columns from the row having max(voting_time)
+                cur.execute("SELECT vr.proposal_id, vr.masternode_ident, max(vr.voting_time), vr.voting_result "
+                            "FROM VOTING_RESULTS vr JOIN PROPOSALS p ON p.id=vr.proposal_id "
+                            f"WHERE vr.masternode_ident IN ({','.join('?' * len(idents_chunk))}) "
+                            "AND p.cmt_active=1 GROUP BY vr.masternode_ident, vr.proposal_id", idents_chunk)
+
+                if self.finishing:
+                    raise CloseDialogException
+                for proposal_id, mn_ident, voting_time, voting_result in cur.fetchall():
+                    prop = self.proposals_by_db_id.get(proposal_id)
+                    if prop:
+                        prop.apply_vote(mn_ident, voting_time, voting_result)
             self.votes_loaded = True
         except CloseDialogException:
             log.info('Closing the dialog.')
@@ -1586,31 +1495,20 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
             refresh_preview_votes = False
             log.info('Begin reading voting data from network.')
             try:
-                # read the date/time of the last vote, read from the DB the last time, to initially filter out
-                # of all older votes from finding if it has its record in the DB:
-                if self.db_intf.is_active():
-                    cur = self.db_intf.get_cursor()
-                    cur.execute("SELECT value from LIVE_CONFIG WHERE symbol=?", (CFG_PROPOSALS_VOTES_MAX_DATE,))
-                    row = cur.fetchone()
-                    if row:
-                        last_vote_max_date = int(row[0])
-
-                votes_added = []  # list of tuples (proposal, masternode, voting_time, voting_result, masternode ident),
-                # that has been added (will be saved to the database cache)
+                # read the date/time of the last vote, read from the DB the last time
+                cur = self.db_intf.get_cursor()
+                cur.execute("SELECT value from LIVE_CONFIG WHERE symbol=?", (CFG_PROPOSALS_VOTES_MAX_DATE,))
+                row = cur.fetchone()
+                if row:
+                    last_vote_max_date = int(row[0])
 
                 if not self.crownd_intf.open():
                     self.errorMsg('Crown daemon not connected')
                 else:
                     try:
-                        proposals_updated = []  # list of proposals for which votes were loaded
                         db_oper_duration = 0.0
-                        db_oper_count = 0
                         network_duration = 0.0
-                        node_info = self.crownd_intf.rpc_call(False, False, 'getinfo')
-                        if node_info.get('version', 140000) < 140000:
-                            getvotes_fun_name = 'getvotes'
-                        else:
-                            getvotes_fun_name = 'getcurrentvotes'
+                        getvotes_fun_name = governance_sync.get_getvotes_fun_name(self.crownd_intf)
 
                         for row_idx, prop in enumerate(proposals):
                             try:
@@ -1628,164 +1526,42 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
                                     continue
                                 network_duration += (time.time() - tm_begin)
 
-                                for v_key in votes:
-                                    try:
-                                        if self.finishing:
-                                            raise CloseDialogException
-
-                                        v = votes[v_key]
-                                        match = re.search("CTxIn\(COutPoint\(([A-Fa-f0-9]+)\s*\,\s*(\d+).+\:(\d+)\:(\w+)", v)  # v12.2
-                                        if not match or len(match.groups()) != 4:
-                                            match = re.search("([A-Fa-f0-9]+)\-(\d+)\:(\d+)\:(\w+)", v)  # v12.3
-
-                                        if match and len(match.groups()) == 4:
-                                            mn_ident = match.group(1) + '-' + match.group(2)
-                                            voting_timestamp = int(match.group(3))
-                                            voting_time = datetime.datetime.fromtimestamp(voting_timestamp)
-                                            voting_result = match.group(4)
-                                            if voting_result:
-                                                voting_result = voting_result.upper()
-                                            mn = self.masternodes_by_ident.get(mn_ident)
-
-                                            if voting_timestamp > cur_vote_max_date:
-                                                cur_vote_max_date = voting_timestamp
-
-                                            # check if vote exists in the database
-                                            if cur:
-                                                tm_begin = time.time()
-                                                cur.execute("SELECT id, proposal_id from VOTING_RESULTS "
-                                                            "WHERE hash=?", (v_key,))
-
-                                                found = False
-                                                for row in cur.fetchall():
-                                                    if row[1] == prop.db_id:
-                                                        found = True
-                                                        break
-
-                                                db_oper_duration += (time.time() - tm_begin)
-                                                db_oper_count += 1
-                                                if not found:
-                                                    votes_added.append((prop, mn, voting_time, voting_result, mn_ident, v_key))
-                                            else:
-                                                # no chance to check whether record exists in the DB, so assume it's not
-                                                # to have it displayed on the grid
-                                                votes_added.append((prop, mn, voting_time, voting_result, mn_ident, v_key))
-
-                                        else:
-                                            log.warning('Proposal %s, parsing unsuccessful for voting: %s' %
-                                                            (prop.get_value('hash'), v))
-                                            errors += 1
-                                    except Exception as e:
-                                        log.error('Error while parsing vote data for vote hash: ' + v_key)
-                                        raise
-
-                                log.info('DB calls duration (stage 1): %s, SQL count: %d' % (str(db_oper_duration),
-                                                                                             db_oper_count))
-
-                                # remove all votes from the db cache that no longer exist on the network
-                                try:
-                                    tm_begin = time.time()
-                                    votes_to_remove: List[Tuple[int, str]] = []
-                                    cur.execute("SELECT id, hash, masternode_ident from VOTING_RESULTS "
-                                                "WHERE proposal_id=?", (prop.db_id,))
-
-                                    for vote_id, vote_hash, masternode_ident in cur.fetchall():
-                                        if vote_hash not in votes:
-                                            votes_to_remove.append((vote_id, masternode_ident))
-
-                                    for vote_id, masternode_ident in votes_to_remove:
-                                        cur.execute('DELETE from VOTING_RESULTS where id=?', (vote_id,))
-                                        db_oper_count += 1
-                                        mn = self.masternodes_by_ident.get(masternode_ident)
-                                        if mn:
-                                            prop.remove_vote(masternode_ident)
-
-                                    if votes_to_remove:
-                                        log.info('Removed %s old votes from db cache for proposal %s',
-                                                 len(votes_to_remove), prop.db_id)
-
-                                    db_oper_duration += (time.time() - tm_begin)
-                                    db_oper_count += 1
-                                except Exception:
-                                    log.exception('Couldn\'t remove old votes from db cache')
-
-                                proposals_updated.append(prop)
-                            except Exception:
-                                log.exception('Exception while readoing votes for proposal ' + prop.get_value('hash'))
-                                errors += 1
-
-                        log.info('Network calls duration: %s for %d proposals' %
-                                     (str(network_duration), (len(proposals))))
-
-                        log.info('DB calls duration (stage 2): %s, SQL count: %d' % (str(db_oper_duration),
-                                                                                        db_oper_count))
-
-                        # save voting results to the database cache
-                        for prop, mn, voting_time, voting_result, mn_ident, hash in votes_added:
-                            if self.finishing:
-                                raise CloseDialogException
-
-                            if cur:
                                 tm_begin = time.time()
-                                try:
-                                    cur.execute("INSERT INTO VOTING_RESULTS(proposal_id, masternode_ident,"
-                                                " voting_time, voting_result, hash) VALUES(?,?,?,?,?)",
-                                                (prop.db_id,
-                                                 mn_ident,
-                                                 voting_time,
-                                                 voting_result,
-                                                 hash))
-                                except sqlite3.IntegrityError as e:
-                                    if e.args and e.args[0].find('UNIQUE constraint failed') >= 0:
-                                        # this vote is assigned to the same proposal but inactive one; correct this
-                                        cur.execute("UPDATE VOTING_RESULTS"
-                                            " set proposal_id=?, masternode_ident=?,"
-                                            " voting_time=?, voting_result=? WHERE hash=?",
-                                            (prop.db_id,
-                                             mn_ident,
-                                             voting_time,
-                                             voting_result,
-                                             hash))
-                                db_modified = True
+                                result = governance_sync.sync_votes(cur, prop.db_id, votes)
                                 db_oper_duration += (time.time() - tm_begin)
+                                db_modified = True
+                                errors += result.errors
+                                if result.max_voting_time > cur_vote_max_date:
+                                    cur_vote_max_date = result.max_voting_time
 
-                            if mn_ident in self.vote_columns_by_mn_ident:
-                                prop.apply_vote(mn_ident, voting_time, voting_result)
-
-                            # check if voting masternode has its column in the main grid;
-                            # if so, pass the voting result to a corresponding proposal field
-                            col = self.propsModel.col_by_name(mn_ident)
-                            if col and col.column_for_vote:
-                                if prop.get_value(col.name) != voting_result:
-                                    prop.set_value(col.name, voting_result)
-
-                            # check if currently selected proposal got new votes; if so, update details panel
-                            if prop == self.current_proposal:
-                                refresh_preview_votes = True
+                                for masternode_ident in result.removed:
+                                    if masternode_ident in self.masternodes_by_ident:
+                                        prop.remove_vote(masternode_ident)
 
-                        if cur:
-                            # update proposals' voting_last_read_time
-                            for prop in proposals_updated:
-                                if self.finishing:
-                                    raise CloseDialogException
+                                for mn_ident, voting_time, voting_result in result.added:
+                                    if self.vote_matrix.has_column(mn_ident):
+                                        prop.apply_vote(mn_ident, voting_time, voting_result)
 
+                                # check if currently selected proposal got new votes; if so, update details panel
+                                if result.added and prop == self.current_proposal:
+                                    refresh_preview_votes = True
                                 prop.voting_last_read_time = time.time()
-                                tm_begin = time.time()
-                                cur.execute("UPDATE PROPOSALS set cmt_voting_last_read_time=? where id=?",
-                                            (int(time.time()), prop.db_id))
-                                db_modified = True
-                                db_oper_duration += (time.time() - tm_begin)
 
-                            log.info('DB calls duration (stage 3): %s' % str(db_oper_duration))
+                            except CloseDialogException:
+                                raise
+                            except Exception:
+                                log.exception('Exception while readoing votes for proposal ' + prop.get_value('hash'))
+                                errors += 1
 
-                            if cur_vote_max_date > last_vote_max_date:
-                                # save max vot date to the DB
-                                db_modified = True
-                                cur.execute("UPDATE LIVE_CONFIG SET value=? WHERE symbol=?",
-                                            (cur_vote_max_date, CFG_PROPOSALS_VOTES_MAX_DATE))
-                                if not cur.rowcount:
-                                    cur.execute("INSERT INTO LIVE_CONFIG(symbol, value) VALUES(?, ?)",
-                                                (CFG_PROPOSALS_VOTES_MAX_DATE, cur_vote_max_date))
+                        log.info('Network calls duration: %s for %d proposals' %
+                                     (str(network_duration), (len(proposals))))
+                        log.info('DB calls duration: %s' % str(db_oper_duration))
+
+                        if cur_vote_max_date > last_vote_max_date:
+                            # save max vot date to the DB
+                            db_modified = True
+                            governance_sync.set_live_config_value(cur, CFG_PROPOSALS_VOTES_MAX_DATE,
+                                                                  cur_vote_max_date)
 
                         if errors:
                             self.errorMsg('Errors occurred while reading vote data. Look into the log file for '
@@ -2014,6 +1790,7 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
 
                 def get_date_str(d):
                     if d is not None:
+                        d = datetime.datetime.fromtimestamp(d)
                         if self.budget_cycle_days <= 1:
                             return app_utils.to_string(d)
                         else:
@@ -2206,14 +1983,15 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
             vote_dates = []
 
             for p in proposals:
-                vote = p.votes_by_masternode_ident.get(user_mn.masternode.ident)
+                vote = p.get_last_mn_vote(user_mn.masternode.ident)
                 if vote:
                     if vote[1] not in user_votes:
                         user_votes.append(vote[1])
                     vote_dates.append(vote[0])
 
             if len(vote_dates) == 1:
-                label = 'Last voted ' + user_votes[0] + ' on ' + app_utils.to_string(vote_dates[0])
+                label = 'Last voted ' + user_votes[0] + ' on ' + \
+                        app_utils.to_string(datetime.datetime.fromtimestamp(vote_dates[0]))
             else:
                 if len(proposals) == 0:
                     label = '' # no proposal selected
@@ -2256,43 +2034,9 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
             if self.votesModel:
                 if new_chart_type == 1:
                     # draw chart - incremental votes count by date
-
-                    # key: vote day, type: timestamp, value, type: 3-element tuple of mn voting
-                    votes_aggr = {}
-                    mn_last_votes = {}
-                    vote_mapper = {'YES': 0, 'NO': 1, 'ABSTAIN': 2}
                     dates = []
-                    prev_vd = None
                     max_y = 1
 
-                    for idx in range(len(self.votesModel.votes)-1, -1, -1):
-                        v = self.votesModel.votes[idx]
-                        ts = int(datetime.datetime(v[0].year, v[0].month, v[0].day, 0, 0, 0).timestamp()) * 1000
-                        vd = votes_aggr.get(ts)
-                        mn = v[2]
-                        vote = v[1].upper()
-                        if not vd:
-                            # there is no entry for this date yet - add and copy vote counts from the previous
-                            # one if any
-                            if prev_vd is not None:
-                                vd = [prev_vd[0], prev_vd[1], prev_vd[2]]
-                            else:
-                                vd = [0, 0, 0]  # yes, no, abstain
-                            prev_vd = vd
-                            votes_aggr[ts] = vd
-                            dates.append(ts)
-
-                        last_mn_vote = mn_last_votes.get(mn)
-                        if last_mn_vote != vote:
-                            if last_mn_vote is not None:
-                                last_mn_vote = last_mn_vote.upper()
-                                # subtract votes count for last mn vote type (yes, no, abstain), because
-                                # changing vote by the mn
-                                vd[vote_mapper[last_mn_vote]] -= 1
-                            vd[vote_mapper[vote]] += 1
-                            mn_last_votes[mn] = vote  # save the last mn vote
-                            max_y = max(max_y, vd[vote_mapper[vote]])
-
                     ser_abs_yes = QLineSeries()
                     ser_abs_yes.setName('Absolute Yes')
                     pen = QPen(QColor('#6699ff'))
@@ -2319,11 +2063,14 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
 
                     max_absolute_yes = 1
                     min_absolute_yes = 0
-                    for ts in dates:
-                        vd = votes_aggr[ts]
-                        sum_yes = vd[0]
-                        sum_no = vd[1]
-                        sum_abstain = vd[2]
+                    sum_yes = sum_no = sum_abstain = 0
+                    for day_data in self.vote_chart_data:
+                        ts = day_data[0] * 1000
+                        dates.append(ts)
+                        sum_yes += day_data[1]
+                        sum_no += day_data[2]
+                        sum_abstain += day_data[3]
+                        max_y = max(max_y, sum_yes, sum_no, sum_abstain)
                         ser_yes.append(ts, sum_yes)
                         ser_no.append(ts, sum_no)
                         ser_abstain.append(ts, sum_abstain)
@@ -2437,14 +2184,6 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
 
                     # dict of lists (key: timestamp) of how many vote-changes has been made within a specific date
                     votes_change_by_date = {}
-                    vote_change_mapper = {
-                        'No->Yes': 0,
-                        'Abstain->Yes': 1,
-                        'No->Abstain': 2,
-                        'Yes->Abstain': 3,
-                        'Yes->No': 4,
-                        'Abstain->No': 5
-                    }
                     vote_change_colors = {
                         0: '#47d147',
                         1: '#248f24',
@@ -2454,30 +2193,19 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
                         5: '#cc2900'
                     }
                     change_existence = [False] * 6
-                    mn_last_votes = {}
                     dates = []
                     max_y = 0
 
-                    for idx in range(len(self.votesModel.votes)-1, -1, -1):
-                        v = self.votesModel.votes[idx]
-                        ts = int(datetime.datetime(v[0].year, v[0].month, v[0].day, 0, 0, 0).timestamp()) * 1000
-                        mn = v[2]
-                        vote = v[1]
-
-                        last_mn_vote = mn_last_votes.get(mn)
-                        if last_mn_vote and last_mn_vote != vote:
-                            vd = votes_change_by_date.get(ts)
-                            if not vd:
-                                # there is no entry for this date yet
-                                vd = [0] * 6
-                                votes_change_by_date[ts] = vd
-                                dates.append(ts)
-                            change_type = last_mn_vote.capitalize() + '->' + vote.capitalize()
-                            change_type_idx = vote_change_mapper[change_type]
-                            vd[change_type_idx] += 1
-                            change_existence[change_type_idx] = True
-                            max_y = max(max_y, vd[change_type_idx])
-                        mn_last_votes[mn] = vote  # save the last mn vote
+                    for day_data in self.vote_chart_data:
+                        vd = day_data[4:]
+                        if any(vd):
+                            ts = day_data[0] * 1000
+                            votes_change_by_date[ts] = vd
+                            dates.append(ts)
+                            for change_type_idx, count in enumerate(vd):
+                                if count:
+                                    change_existence[change_type_idx] = True
+                                    max_y = max(max_y, count)
 
                     ser = QBarSeries()
                     ser.setLabelsVisible(True)
@@ -2485,13 +2213,7 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
 
                     for change_type_idx in list(range(6)):
                         if change_existence[change_type_idx]:  # NO->YES
-                            # get the string representation of the mn vote change
-                            change_label = '?'
-                            for key, value in vote_change_mapper.items():
-                                if value == change_type_idx:
-                                    change_label = key
-
-                            bs = QBarSet(change_label)
+                            bs = QBarSet(vote_aggregates.VOTE_CHANGE_TYPES[change_type_idx])
                             bs.setColor(QColor(vote_change_colors[change_type_idx]))
                             bs.setLabelColor(QColor(vote_change_colors[change_type_idx]))
                             for date in dates:
@@ -2532,6 +2254,21 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
         except Exception:
             log.exception('Exception while drawing vote chart.')
 
+    def read_vote_chart_data(self):
+        prop = self.current_proposal
+        chart_data = []
+        if prop and prop.db_id is not None:
+            cur = self.db_intf.get_cursor()
+            try:
+                chart_data, rebuilt = vote_aggregates.read(cur, prop.db_id)
+                if rebuilt:
+                    self.db_intf.commit()
+            except Exception:
+                log.exception('Exception while reading the vote chart data')
+            finally:
+                self.db_intf.release_cursor()
+        self.vote_chart_data = chart_data
+
     def refresh_preview_panel_thread(self, ctrl):
         """Thread reloading additional proposal data after changing current proposal. This is done in the background
         to avoid blocking the UI when user jumps quickly between proposals - the work involves reading voting data
@@ -2548,6 +2285,7 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
             try:
                 if last_proposal_read != self.current_proposal:
                     self.votesModel.read_votes()
+                    self.read_vote_chart_data()
                     last_proposal_read = self.current_proposal
                     last_chart_type = self.current_chart_type
                     WndUtils.call_in_main_thread(apply_grid_data)
@@ -2617,150 +2355,234 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
     def on_btnApplyVotesViewFilter_clicked(self):
         self.apply_votes_filter()
 
+    def get_vote_sig_time(self, prop: Proposal, mn_info: VotingMasternode) -> int:
+        cur_ts = int(time.time())
+        sig_time = cur_ts
+
+        last_result = prop.get_last_mn_vote(mn_info.masternode.ident)
+        if last_result is not None:
+            last_vote_ts = last_result[0]
+        else:
+            last_vote_ts = None
+
+        if self.app_config.add_random_offset_to_vote_time:
+
+            if last_vote_ts is not None: # and cur_ts - last_vote_ts < 1800:
+                # new vote's timestamp cannot be less than the last vote for this proposal-mn pair
+                min_bound = max(int(last_vote_ts), cur_ts + self.app_config.sig_time_offset_min)
+                max_bound = cur_ts + self.app_config.sig_time_offset_max
+                sig_time = random.randint(min_bound, max_bound)
+            else:
+                sig_time += random.randint(self.app_config.sig_time_offset_min,
+                                           self.app_config.sig_time_offset_max)
+
+        if last_vote_ts is not None and sig_time < last_vote_ts:
+            # if the last vote timestamp is still grater than the current vote ts, correct the new one
+            # The current ts can be less than the previus one when:
+            #   - user turned off the vote offset in the configuration and the previous offset was > 0
+            #   - last offset drawn was higher than the current one (it's random) and a user
+            #     is voting a short time after the previus one
+            sig_time = int(last_vote_ts) + 10
+        return sig_time
+
+    def sign_votes(self, votes: List[VoteToSend]):
+        """
+        Signs the vote messages with the masternodes' voting keys. If there are very many of them and the native
+        signer isn't available, the signing is done in parallel processes. The votes are yielded in order as soon
+        as they are signed (or have failed), so they can be sent while the next ones are still being signed.
+        """
+        keys = []
+        for v in votes:
+            try:
+                keys.append(v.mn_info.masternode_config.get_voting_key_material(self.app_config, self.crownd_intf))
+            except Exception as e:
+                keys.append(None)
+                v.error = "Error while signing vote message with masternode's private key: " + str(e)
+
+        executor = None
+        futures = []
+        if len(votes) >= VOTE_SIGN_POOL_MIN_VOTES and \
+                not isinstance(crown_utils.get_ecdsa_signer(), crown_utils.Secp256k1EcdsaSigner):
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=min(VOTE_SIGN_POOL_MAX_WORKERS, os.cpu_count() or 1, len(votes)),
+                    mp_context=multiprocessing.get_context('spawn'))
+                for v, key in zip(votes, keys):
+                    futures.append(executor.submit(crown_utils.ecdsa_sign, v.message, key,
+                                                   self.app_config.crown_network) if key else None)
+            except Exception:
+                log.exception('Couldn\'t start the vote signing processes; signing votes in the current thread.')
+                if executor:
+                    executor.shutdown(wait=False)
+                executor = None
+
+        try:
+            for idx, v in enumerate(votes):
+                if self.finishing:
+                    break
+                if v.error:
+                    yield v
+                    continue
+                try:
+                    if executor:
+                        try:
+                            v.vote_sig = futures[idx].result()
+                            yield v
+                            continue
+                        except BrokenProcessPool:
+                            log.exception('Vote signing processes terminated; signing votes in the current thread.')
+                            executor.shutdown(wait=False)
+                            executor = None
+                    v.vote_sig = crown_utils.ecdsa_sign(v.message, keys[idx], self.app_config.crown_network)
+                except Exception as e:
+                    v.error = "Error while signing vote message with masternode's private key: " + str(e)
+                yield v
+        finally:
+            if executor:
+                for f in futures:
+                    if f:
+                        f.cancel()
+                executor.shutdown(wait=False)
+
+    def log_vote_details(self, v: VoteToSend):
+        """ Writes some info to the log file for analysis in case of problems with broadcasting a vote. """
+        mn_cfg = v.mn_info.masternode_config
+        try:
+            pubkey = mn_cfg.get_voting_key_material(self.app_config, self.crownd_intf).pubkey
+            log.info('masternode_pub_key: %s' % str(pubkey))
+            log.info('masternode_pub_key_hash: %s' %
+                     str(crown_utils.pubkey_to_address(pubkey, self.app_config.crown_network)))
+        except Exception as e:
+            log.info('masternode_pub_key: error: %s' % str(e))
+        log.info('masternode_tx_hash: %s' % str(mn_cfg.collateralTx))
+        log.info('masternode_tx_index: %s' % str(mn_cfg.collateralTxIndex))
+        log.info('governance_hash: %s' % v.proposal.get_value('hash'))
+        log.info('vote_sig: %s' % v.vote_sig)
+        log.info('sig_time: %s' % str(v.sig_time))
+        t = time.time()
+        log.info('cur_time: timestamp: %s, timestr local: %s, timestr UTC: %s' %
+                 (str(t), str(datetime.datetime.fromtimestamp(t)), str(datetime.datetime.utcfromtimestamp(t))))
+        log.info('serialize_for_sig: %s' % str(v.message))
+
     def vote_thread(self, ctrl, proposal_list: List[Proposal], masternodes: List[VotingMasternode],
                     vote_code: str, vote_errors_out: List[Tuple[Proposal, MasternodeConfig, str]]):
-
+        """
+        Votes on the proposals on behalf of the masternodes. The votes are sent to the node in JSON-RPC batches
+        while the following ones are being signed; the results of the unsuccessful votes are appended to
+        vote_errors_out.
+        """
         vote = {VOTE_CODE_YES: 'yes', VOTE_CODE_NO: 'no', VOTE_CODE_ABSTAIN: 'abstain'}[vote_code]
         successful_proposal_list = []
         successful_votes = 0
         unsuccessful_votes = 0
         ctrl.dlg_config_fun(dlg_title="Applying votes to the network...", show_progress_bar=False)
 
+        votes: List[VoteToSend] = []
         for prop in proposal_list:
-            if self.finishing:
-                break
             prop_hash = prop.get_value('hash')
-
-            for vote_idx, mn_info in enumerate(masternodes):
-                if self.finishing:
-                    break
-                ctrl.display_msg_fun(f"Processing <b>{vote.upper()}</b> vote for the proposal <b>'{prop.get_value('name')}"
-                                     f"</b>'<br>on behalf of the masternode: {mn_info.masternode_config.name} "
-                                     f"({mn_info.masternode_config.ip})")
-
-                cur_ts = int(time.time())
-                sig_time = cur_ts
-                step = 1
-                vote_sig = ''
-                serialize_for_sig = ''
-
+            for mn_info in masternodes:
                 try:
-
-                    last_result = prop.get_last_mn_vote(mn_info.masternode.ident)
-                    if last_result is not None:
-                        last_vote_ts = last_result[0].timestamp()
-                    else:
-                        last_vote_ts = None
-
-                    if self.app_config.add_random_offset_to_vote_time:
-
-                        if last_vote_ts is not None: # and cur_ts - last_vote_ts < 1800:
-                            # new vote's timestamp cannot be less than the last vote for this proposal-mn pair
-                            min_bound = max(int(last_vote_ts), cur_ts + self.app_config.sig_time_offset_min)
-                            max_bound = cur_ts + self.app_config.sig_time_offset_max
-                            sig_time = random.randint(min_bound, max_bound)
-                        else:
-                            sig_time += random.randint(self.app_config.sig_time_offset_min,
-                                                       self.app_config.sig_time_offset_max)
-
-                    if last_vote_ts is not None and sig_time < last_vote_ts:
-                        # if the last vote timestamp is still grater than the current vote ts, correct the new one
-                        # The current ts can be less than the previus one when:
-                        #   - user turned off the vote offset in the configuration and the previous offset was > 0
-                        #   - last offset drawn was higher than the current one (it's random) and a user
-                        #     is voting a short time after the previus one
-                        sig_time = last_vote_ts + 10
-
+                    sig_time = self.get_vote_sig_time(prop, mn_info)
                     serialize_for_sig = mn_info.masternode.ident + '|' + \
                                         prop_hash + '|' + \
                                         '1' + '|' + \
                                         vote_code + '|' + \
                                         str(sig_time)
-
                     log.info('Vote message to sign: ' + serialize_for_sig)
-                    step = 2
-                    vote_sig = crown_utils.ecdsa_sign(
-                        serialize_for_sig,
-                        mn_info.masternode_config.get_current_key_for_voting(self.app_config, self.crownd_intf),
-                        self.app_config.crown_network)
-
-                    step = 3
-                    v_res = self.crownd_intf.voteraw(
-                        masternode_tx_hash=mn_info.masternode_config.collateralTx,
-                        masternode_tx_index=int(mn_info.masternode_config.collateralTxIndex),
-                        governance_hash=prop_hash,
-                        vote_signal='funding',
-                        vote=vote,
-                        sig_time=sig_time,
-                        vote_sig=vote_sig)
-
-                    step = 4
-                    if v_res == 'Voted successfully':
-                        prop.apply_vote(mn_ident=mn_info.masternode.ident,
-                                        vote_timestamp=datetime.datetime.fromtimestamp(sig_time),
-                                        vote_result=vote.upper())
-                        successful_votes += 1
-                        if prop not in successful_proposal_list:
-                            successful_proposal_list.append(prop)
-                    else:
-                        vote_errors_out.append((prop, mn_info.masternode_config, v_res))
-                        unsuccessful_votes += 1
+                    votes.append(VoteToSend(prop, mn_info, sig_time, serialize_for_sig))
+                except Exception as e:
+                    vote_errors_out.append((prop, mn_info.masternode_config, 'Error: ' + str(e)))
+                    unsuccessful_votes += 1
+
+        use_batches = True
 
+        def send_votes(batch: List[VoteToSend], processed: int):
+            nonlocal successful_votes, unsuccessful_votes, use_batches
+            ctrl.display_msg_fun(f"Processing <b>{vote.upper()}</b> votes: {processed} of {len(votes)}")
+            vote_args = [(v.mn_info.masternode_config.collateralTx,
+                          int(v.mn_info.masternode_config.collateralTxIndex),
+                          v.proposal.get_value('hash'), 'funding', vote, v.sig_time, v.vote_sig) for v in batch]
+            results = None
+            if use_batches:
+                try:
+                    results = self.crownd_intf.voteraw_batch(vote_args)
+                except JSONRPCException as e:
+                    # the node (or a proxy in front of it) doesn't accept batch requests
+                    log.warning('The JSON-RPC batch of votes has been rejected (%s); sending the votes one by one.',
+                                str(e))
+                    use_batches = False
                 except Exception as e:
-                    if step in (1, 4):
-                        msg = 'Error: ' + str(e)
-                    elif step == 2:
-                        msg = "Error while signing vote message with masternode's private key: " + str(e)
-                    else:
-                        msg = "Error while broadcasting vote message: " + str(e)
-                        # write some info to the log file for analysis in case of problems
-                        log.info('masternode_pub_key: %s' %
-                                     str(crown_utils.wif_privkey_to_pubkey(
-                                         mn_info.masternode_config.get_current_key_for_voting(
-                                             self.app_config, self.crownd_intf))))
-                        log.info('masternode_pub_key_hash: %s' %
-                                     str(crown_utils.pubkey_to_address(crown_utils.wif_privkey_to_pubkey(
-                                         mn_info.masternode_config.get_current_key_for_voting(
-                                             self.app_config, self.crownd_intf)), self.app_config.crown_network)))
-                        log.info('masternode_tx_hash: %s' % str(mn_info.masternode_config.collateralTx))
-                        log.info('masternode_tx_index: %s' % str(mn_info.masternode_config.collateralTxIndex))
-                        log.info('governance_hash: %s' % prop_hash)
-                        log.info('vote_sig: %s' % vote_sig)
-                        log.info('sig_time: %s' % str(sig_time))
-                        t = time.time()
-                        log.info('cur_time: timestamp: %s, timestr local: %s, timestr UTC: %s' %
-                                     (str(t), str(datetime.datetime.fromtimestamp(t)),
-                                      str(datetime.datetime.utcfromtimestamp(t))))
-                        log.info('serialize_for_sig: %s' % str(serialize_for_sig))
-                    vote_errors_out.append((prop, mn_info.masternode_config, msg))
+                    # the result of the votes is unknown, so they aren't sent again
+                    results = [(None, str(e))] * len(batch)
 
-                    unsuccessful_votes += 1
+            if results is None:
+                results = []
+                for args in vote_args:
+                    try:
+                        results.append((self.crownd_intf.voteraw(*args), None))
+                    except Exception as e:
+                        results.append((None, str(e)))
 
-            if successful_proposal_list:
-                cur = self.db_intf.get_cursor()
+            for v, (v_res, error) in zip(batch, results):
                 try:
-                    # move back the 'last read' time to force reading vote data from the network
-                    # next time and save it to the db
-                    for p in successful_proposal_list:
-                        cur.execute("UPDATE PROPOSALS set cmt_voting_last_read_time=? where id=?",
-                                    (int(time.time()) - VOTING_RELOAD_TIME, p.db_id))
-                except Exception:
-                    log.exception('Exception while saving configuration data.')
-                finally:
-                    self.db_intf.commit()
-                    self.db_intf.release_cursor()
+                    if error is None and v_res == 'Voted successfully':
+                        v.proposal.apply_vote(mn_ident=v.mn_info.masternode.ident,
+                                              vote_timestamp=v.sig_time,
+                                              vote_result=vote.upper())
+                        successful_votes += 1
+                        if v.proposal not in successful_proposal_list:
+                            successful_proposal_list.append(v.proposal)
+                        continue
+                    if error is not None:
+                        v.error = "Error while broadcasting vote message: " + error
+                        self.log_vote_details(v)
+                    else:
+                        v.error = v_res
+                except Exception as e:
+                    v.error = 'Error: ' + str(e)
+                vote_errors_out.append((v.proposal, v.mn_info.masternode_config, v.error))
+                unsuccessful_votes += 1
+
+        batch = []
+        processed = 0
+        for v in self.sign_votes(votes):
+            processed += 1
+            if v.error:
+                vote_errors_out.append((v.proposal, v.mn_info.masternode_config, v.error))
+                unsuccessful_votes += 1
+                continue
+            batch.append(v)
+            if len(batch) >= VOTE_SUBMIT_BATCH_SIZE:
+                send_votes(batch, processed)
+                batch = []
+        if batch and not self.finishing:
+            send_votes(batch, processed)
+
+        if successful_proposal_list:
+            cur = self.db_intf.get_cursor()
+            try:
+                # move back the 'last read' time to force reading vote data from the network
+                # next time and save it to the db
+                last_read_time = int(time.time()) - VOTING_RELOAD_TIME
+                cur.executemany("UPDATE PROPOSALS set cmt_voting_last_read_time=? where id=?",
+                                [(last_read_time, p.db_id) for p in successful_proposal_list])
+            except Exception:
+                log.exception('Exception while saving configuration data.')
+            finally:
+                self.db_intf.commit()
+                self.db_intf.release_cursor()
 
-            msg = ''
-            if successful_votes > 0:
-                if unsuccessful_votes > 0:
-                    msg = f'Vote finished, successful votes: {successful_votes}, unsuccessful: {unsuccessful_votes}'
-                else:
-                    msg = f'Vote finished, successful votes: {successful_votes}'
-            elif unsuccessful_votes > 0:
-                msg = f'Vote finished with errors'
-            if msg:
-                msg += ' (<a href="#close">close</a>)'
-            self.display_message(msg)
+        msg = ''
+        if successful_votes > 0:
+            if unsuccessful_votes > 0:
+                msg = f'Vote finished, successful votes: {successful_votes}, unsuccessful: {unsuccessful_votes}'
+            else:
+                msg = f'Vote finished, successful votes: {successful_votes}'
+        elif unsuccessful_votes > 0:
+            msg = f'Vote finished with errors'
+        if msg:
+            msg += ' (<a href="#close">close</a>)'
+        self.display_message(msg)
 
     def vote_on_selected_proposals(self, vote_code, masternodes: Optional[List]):
         vote_errors: List[Tuple[Proposal, MasternodeConfig, str]] = []
@@ -2872,7 +2694,7 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
                         self.write_csv_row(f_ptr, elems)
 
                         for v in self.votesModel.votes:
-                            self.write_csv_row(f_ptr, v)
+                            self.write_csv_row(f_ptr, (datetime.datetime.fromtimestamp(v[0]),) + v[1:])
 
                     self.infoMsg('Votes of the proposal "%s" successfully saved.' %
                                  self.current_proposal.get_value('name'))
@@ -2909,7 +2731,7 @@ class ProposalsDlg(QDialog, ui_proposals.Ui_ProposalsDlg, wnd_utils.WndUtils):
 
 
 class ProposalsModel(ExtSortFilterTableModel):
-    def __init__(self, parent, proposals):
+    def __init__(self, parent, proposals, vote_matrix: VoteMatrix):
         ExtSortFilterTableModel.__init__(self, parent, columns=[
             ProposalColumn('no', 'No', True),
             ProposalColumn('name', 'Name', False),
@@ -2947,6 +2769,7 @@ class ProposalsModel(ExtSortFilterTableModel):
         self.budget_cycle_days = 28.8
         self.parent = parent
         self.proposals = proposals
+        self.vote_matrix = vote_matrix
         self.filter_text = ''
         self.filter_columns = []
         self.filter_only_active = True
@@ -2987,9 +2810,12 @@ class ProposalsModel(ExtSortFilterTableModel):
                 col = self.col_by_index(col_idx)
                 if prop:
                     if role == Qt.DisplayRole:
-                        if col.name in ('payment_start', 'payment_end', 'creation_time'):
+                        if col.column_for_vote:
+                            return self.vote_matrix.get_vote(prop.vote_row, col.vote_matrix_col)
+                        elif col.name in ('payment_start', 'payment_end', 'creation_time'):
                             value = prop.get_value(col.name)
                             if value is not None:
+                                value = datetime.datetime.fromtimestamp(value)
                                 if self.budget_cycle_days < 1:
                                     return app_utils.to_string(value)
                                 else:
@@ -3022,7 +2848,7 @@ class ProposalsModel(ExtSortFilterTableModel):
                             elif prop.voting_status == 4:
                                 return QCOLOR_NO
                         elif col.column_for_vote:
-                            value = prop.get_value(col.name)
+                            value = self.vote_matrix.get_vote(prop.vote_row, col.vote_matrix_col)
                             if value == 'YES':
                                 return QCOLOR_YES
                             elif value == 'ABSTAIN':
@@ -3068,6 +2894,30 @@ class ProposalsModel(ExtSortFilterTableModel):
         if idx >= 0 and idx not in self.filter_columns:
             self.filter_columns.append(idx)
 
+    def sort_key_fun(self, col_index):
+        col = self.col_by_index(col_index)
+        if col:
+            col_name = col.name
+            if col_name in ('name', 'url', 'title'):
+                # compare hyperlink columns
+                def key_fun(row_idx):
+                    value = self.proposals[row_idx].get_value(col_name)
+                    return value.lower() if value else ''
+                return key_fun
+
+            elif col_name == 'voting_status_caption':
+                def key_fun(row_idx):
+                    return sort_key_value(self.proposals[row_idx].get_value('absolute_yes_count'))
+                return key_fun
+
+            elif col_name in ('payment_start', 'payment_end', 'creation_time'):
+                # newest first
+                def key_fun(row_idx):
+                    value = self.proposals[row_idx].get_value(col_name)
+                    return sort_key_value(-value if value else None)
+                return key_fun
+        return None
+
     def lessThan(self, col_index, left_row_index, right_row_index):
         col = self.col_by_index(col_index)
         if col:
@@ -3077,26 +2927,8 @@ class ProposalsModel(ExtSortFilterTableModel):
 
                 if 0 <= right_row_index < len(self.proposals):
                     right_prop = self.proposals[right_row_index]
-                    left_value = left_prop.get_value(col.name)
-                    right_value = right_prop.get_value(col.name)
-
-                    if col.name in ('name', 'url', 'title'):
-                        # compare hyperlink columns
-                        if not left_value:
-                            left_value = ""
-                        if not right_value:
-                            right_value = ""
-                        left_value = left_value.lower()
-                        right_value = right_value.lower()
-                        return left_value < right_value
-
-                    elif col.name == 'voting_status_caption':
-
-                        left_count = left_prop.get_value('absolute_yes_count')
-                        right_count = right_prop.get_value('absolute_yes_count')
-                        return left_count < right_count
-
-                    elif col.name == 'no':
+
+                    if col.name == 'no':
                         left_voting_in_progress = left_prop.voting_in_progress
                         right_voting_in_progress = right_prop.voting_in_progress
 
@@ -3108,10 +2940,6 @@ class ProposalsModel(ExtSortFilterTableModel):
                             diff = left_prop.voting_status < right_prop.voting_status
                         return diff
 
-                    elif col.name in ('payment_start', 'payment_end', 'creation_time'):
-                        diff = right_value < left_value
-                        return diff
-
     def filterAcceptsRow(self, row_index, source_parent):
         will_show = True
         try:
@@ -3196,7 +3024,7 @@ class VotesModel(QAbstractTableModel):
         self.users_masternodes_by_ident = users_masternodes_by_ident
         self.only_my_votes = False
         self.proposal = None
-        self.votes = []  # list of tuples: voting time (datetime), vote, masternode_label, users_masternode_name
+        self.votes = []  # list of tuples: voting time (epoch seconds), vote, masternode_label, users_masternode_name
         self.columns = ['Vote timestamp', 'Vote', 'Masternode', "User's Masternode"]
 
     def columnCount(self, parent=None, *args, **kwargs):
@@ -3228,7 +3056,7 @@ class VotesModel(QAbstractTableModel):
                         if col_idx == 0:    # vote timestamp
                             value = vote[0]
                             if value is not None:
-                                return app_utils.to_string(value)
+                                return app_utils.to_string(datetime.datetime.fromtimestamp(value))
                             else:
                                 return ''
                         elif col_idx == 1:  # YES/NO/ABSTAIN
@@ -3278,8 +3106,7 @@ class VotesModel(QAbstractTableModel):
                     if users_mn:
                         users_mn_name = users_mn.masternode_config.name
 
-                    self.votes.append((datetime.datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S'),
-                                       row[1], mn_label, users_mn_name))
+                    self.votes.append((row[0], row[1], mn_label, users_mn_name))
                 log.debug('Reading votes time from DB: %s' % str(time.time() - tm_begin))
 
         except CloseDialogException:
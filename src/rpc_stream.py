@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+import base64
+import codecs
+import decimal
+import json
+import logging
+import urllib.parse
+from typing import Any, Callable, Dict, Generator, Tuple, List, Optional, Sequence
+from bitcoinrpc.authproxy import JSONRPCException, EncodeDecimal
+
+
+log = logging.getLogger('cmt.rpc_stream')
+
+STREAM_READ_CHUNK_SIZE = 64 * 1024
+USER_AGENT = 'CrownMasternodeTool/RPCStream'
+
+
+def parse_amount_satoshis(value: str) -> int:
+    """ parse_float hook converting JSON amounts (in Crowns) straight to integer satoshis. """
+    return int(decimal.Decimal(value) * 100000000)
+
+
+class JsonResultStream(object):
+    """
+    Incremental decoder of a JSON-RPC response. The members of the top-level array or object of the 'result'
+    field are decoded and returned one by one as soon as their data arrive, so the whole response text is never
+    held in memory and the decoding overlaps with the network transfer.
+    """
+
+    def __init__(self, fp, parse_float: Callable[[str], Any] = decimal.Decimal,
+                 chunk_size: int = STREAM_READ_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder(parse_float=parse_float)
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.envelope: Dict[str, Any] = {}  # the remaining members of the response ('error', 'id')
+        self.result_found = False
+
+    def fill(self):
+        if self.eof:
+            raise ValueError('Unexpected end of JSON data')
+        data = self.fp.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            text = self.text_decoder.decode(b'', final=True)
+        else:
+            text = self.text_decoder.decode(data)
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+
+    def skip_ws(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return
+            self.fill()
+
+    def next_char(self) -> str:
+        self.skip_ws()
+        c = self.buf[self.pos]
+        self.pos += 1
+        return c
+
+    def expect(self, chars: str) -> str:
+        c = self.next_char()
+        if c not in chars:
+            raise ValueError(f'Invalid JSON data: expected one of "{chars}", got "{c}"')
+        return c
+
+    def decode_value(self) -> Any:
+        self.skip_ws()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    # a value ending at the buffer end may be a number truncated by the chunk boundary
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def iter_container(self) -> Generator[Tuple[Any, Any], None, None]:
+        closing = ']' if self.expect('[{') == '[' else '}'
+        self.skip_ws()
+        if self.buf[self.pos] == closing:
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            if closing == '}':
+                key = self.decode_value()
+                self.expect(':')
+            else:
+                key = index
+                index += 1
+            yield key, self.decode_value()
+            if self.expect(',' + closing) == closing:
+                break
+
+    def __iter__(self) -> Generator[Tuple[Any, Any], None, None]:
+        """
+        :return: Generator of tuples (key, value) for object results, (index, value) for array results and
+            (None, value) for scalar results
+        """
+        self.expect('{')
+        self.skip_ws()
+        if self.buf[self.pos] == '}':
+            self.pos += 1
+            return
+        while True:
+            name = self.decode_value()
+            self.expect(':')
+            self.skip_ws()
+            if name == 'result':
+                self.result_found = True
+            if name == 'result' and self.buf[self.pos] in '[{':
+                yield from self.iter_container()
+            else:
+                value = self.decode_value()
+                self.envelope[name] = value
+                if name == 'result' and value is not None:
+                    yield None, value
+            if self.expect(',}') == '}':
+                break
+
+
+class StreamingAuthServiceProxy(object):
+    """
+    Counterpart of bitcoinrpc's AuthServiceProxy (and sharing its HTTP connection object) for calls with large
+    responses, which are decoded incrementally with JsonResultStream.
+    """
+    __id_count = 0
+
+    def __init__(self, service_url: str, connection, timeout: int):
+        self.url = urllib.parse.urlparse(service_url)
+        self.conn = connection
+        self.timeout = timeout
+        auth_pair = (urllib.parse.unquote(self.url.username or '') + ':' +
+                     urllib.parse.unquote(self.url.password or '')).encode('utf8')
+        self.auth_header = b'Basic ' + base64.b64encode(auth_pair)
+        # whether the last request has been sent in full, so the server could have executed it
+        self.request_sent = False
+
+    def post(self, post_data: str):
+        self.request_sent = False
+        self.conn.request('POST', self.url.path or '/', post_data,
+                          {'Host': self.url.hostname,
+                           'User-Agent': USER_AGENT,
+                           'Authorization': self.auth_header,
+                           'Content-type': 'application/json'})
+        self.request_sent = True
+        self.conn.sock.settimeout(self.timeout)
+
+        http_response = self.conn.getresponse()
+        if http_response is None:
+            raise JSONRPCException({'code': -342, 'message': 'missing HTTP response from server'})
+        content_type = http_response.getheader('Content-Type')
+        if content_type != 'application/json':
+            raise JSONRPCException({'code': -342, 'message': 'non-JSON HTTP response with \'%i %s\' from server' %
+                                                             (http_response.status, http_response.reason)})
+        return http_response
+
+    def batch(self, calls: List[Tuple[str, Sequence]]) -> List[Tuple[Any, Optional[str]]]:
+        """
+        Executes many calls in a single JSON-RPC batch request. Unlike with a single call, an error of one call
+        doesn't affect the others.
+        :param calls: list of tuples (method, params)
+        :return: list of tuples (result, None) or (None, error message), in the order of 'calls'
+        """
+        batch_data = []
+        for method, args in calls:
+            StreamingAuthServiceProxy.__id_count += 1
+            batch_data.append({'version': '1.1',
+                               'method': method,
+                               'params': list(args),
+                               'id': StreamingAuthServiceProxy.__id_count})
+        if not batch_data:
+            return []
+        log.debug('-%s-> batch of %d calls', batch_data[0]['id'], len(batch_data))
+        http_response = self.post(json.dumps(batch_data, default=EncodeDecimal))
+        responses = json.loads(http_response.read().decode('utf-8'), parse_float=decimal.Decimal)
+        if not isinstance(responses, list):
+            error = responses.get('error') if isinstance(responses, dict) else None
+            raise JSONRPCException(error if error else {'code': -343, 'message': 'invalid JSON-RPC batch response'})
+
+        responses_by_id = {r.get('id'): r for r in responses if isinstance(r, dict)}
+        ret = []
+        for call_data in batch_data:
+            response = responses_by_id.get(call_data['id'])
+            if response is None:
+                ret.append((None, 'missing JSON-RPC response'))
+            elif response.get('error') is not None:
+                error = response['error']
+                ret.append((None, error.get('message', str(error)) if isinstance(error, dict) else str(error)))
+            else:
+                ret.append((response.get('result'), None))
+        return ret
+
+    def iter_result(self, method: str, *args, parse_float: Callable[[str], Any] = decimal.Decimal) -> \
+            Generator[Tuple[Any, Any], None, None]:
+        StreamingAuthServiceProxy.__id_count += 1
+        log.debug('-%s-> %s (streaming)', StreamingAuthServiceProxy.__id_count, method)
+        post_data = json.dumps({'version': '1.1',
+                                'method': method,
+                                'params': args,
+                                'id': StreamingAuthServiceProxy.__id_count}, default=EncodeDecimal)
+        http_response = self.post(post_data)
+
+        finished = False
+        stream = JsonResultStream(http_response, parse_float=parse_float)
+        try:
+            yield from stream
+            http_response.read()  # consume trailing whitespace to make the connection reusable
+            finished = True
+        finally:
+            if not finished:
+                # the response hasn't been read to the end, so the connection cannot be reused
+                self.conn.close()
+
+        error = stream.envelope.get('error')
+        if error is not None:
+            raise JSONRPCException(error)
+        if not stream.result_found:
+            raise JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'})
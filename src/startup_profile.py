@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Timing of the application startup phases. Each checkpoint closes a phase which began at the previous checkpoint;
+# the work done in the background after the main window is shown is timed separately.
+
+import logging
+import time
+from typing import List, Tuple
+
+
+log = logging.getLogger('cmt.startup')
+
+start_time = time.perf_counter()
+last_checkpoint_time = start_time
+phases: List[Tuple[str, float]] = []  # (phase name, duration) for the phases preceding the first paint
+background_phases: List[Tuple[str, float]] = []
+first_paint_time = None
+
+
+def checkpoint(phase_name: str):
+    """ Marks the end of the startup phase named 'phase_name'. """
+    global last_checkpoint_time
+    now = time.perf_counter()
+    phases.append((phase_name, now - last_checkpoint_time))
+    last_checkpoint_time = now
+
+
+def mark_first_paint():
+    global first_paint_time
+    if first_paint_time is None:
+        checkpoint('first paint')
+        first_paint_time = last_checkpoint_time - start_time
+
+
+def add_background_phase(phase_name: str, duration: float):
+    background_phases.append((phase_name, duration))
+
+
+def get_report() -> str:
+    ret = 'Startup phases: ' + ', '.join(f'{name}: {duration:.3f}s' for name, duration in phases)
+    if first_paint_time is not None:
+        ret += f'; first paint after {first_paint_time:.3f}s'
+    if background_phases:
+        ret += '; background stage: ' + ', '.join(f'{name}: {duration:.3f}s' for name, duration in
+                                                 background_phases)
+    return ret
+
+
+def log_report():
+    log.info(get_report())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Measures the time of decrypting the protected values of a configuration file with 100 masternodes (three private
+# keys each) and 10 RPC connections, the way AppConfig.read_from_file does it. The "per-call key derivation" results
+# correspond to the former behaviour of app_utils.encrypt/decrypt, which stretched the password on every call;
+# the old-format (pre-v3) connection passwords are encrypted with 100,000 PBKDF2 iterations.
+
+import os
+import sys
+import time
+from configparser import ConfigParser
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import app_utils
+from app_defs import APP_NAME_LONG
+
+
+MASTERNODES = 100
+CONNECTIONS = 10
+REPEATS = 3
+
+
+def make_config(conn_psw_iterations: int) -> str:
+    config = ConfigParser()
+    for idx in range(MASTERNODES):
+        section = 'MN' + str(idx + 1)
+        config.add_section(section)
+        config.set(section, 'name', 'MN%d' % (idx + 1))
+        for key_name in ('dmn_owner_private_key', 'dmn_operator_private_key', 'dmn_voting_private_key'):
+            key = os.urandom(32).hex()
+            config.set(section, key_name, app_utils.encrypt(key, APP_NAME_LONG, iterations=5))
+    for idx in range(CONNECTIONS):
+        section = 'CONNECTION' + str(idx + 1)
+        config.add_section(section)
+        config.set(section, 'password', app_utils.encrypt('rpc password %d' % idx, APP_NAME_LONG,
+                                                          iterations=conn_psw_iterations))
+    app_utils.wipe_derived_keys()
+    cfg_str = ''
+    for section in config.sections():
+        cfg_str += '[%s]\n' % section + ''.join('%s = %s\n' % item for item in config.items(section)) + '\n'
+    return cfg_str
+
+
+def read_config(cfg_str: str, conn_psw_iterations: int, per_call_derivation: bool):
+    config = ConfigParser()
+    config.read_string(cfg_str)
+    for section in config.sections():
+        if section.startswith('MN'):
+            items = [(config.get(section, name), 5) for name in
+                     ('dmn_owner_private_key', 'dmn_operator_private_key', 'dmn_voting_private_key')]
+        else:
+            items = [(config.get(section, 'password'), conn_psw_iterations)]
+        for value, iterations in items:
+            if per_call_derivation:
+                app_utils.wipe_derived_keys()
+            app_utils.decrypt(value, APP_NAME_LONG, iterations=iterations)
+
+
+def main():
+    for conn_psw_iterations in (5, 100000):
+        cfg_str = make_config(conn_psw_iterations)
+        for per_call_derivation in (True, False):
+            durations = []
+            for _ in range(REPEATS):
+                app_utils.wipe_derived_keys()
+                time_begin = time.perf_counter()
+                read_config(cfg_str, conn_psw_iterations, per_call_derivation)
+                durations.append(time.perf_counter() - time_begin)
+            print('connection password iterations: %6d  %-26s best of %d: %.3fs' %
+                  (conn_psw_iterations, 'per-call key derivation:' if per_call_derivation else
+                   'session key cache:', REPEATS, min(durations)))
+    app_utils.wipe_derived_keys()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Compares the ECDSA signing backends of crown_utils: checks that the native (libsecp256k1) one creates the same
+# signatures as the pure-Python one and measures the throughput of signing messages (the signing includes
+# verification of the signature created) and of verifying signatures.
+
+import os
+import sys
+import time
+import bitcoin
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import crown_utils
+
+
+CROWN_NETWORK = 'MAINNET'
+KEYS = 20
+MESSAGES_PER_KEY = 10
+
+
+def make_test_data():
+    data = []
+    for key_idx in range(KEYS):
+        wif = crown_utils.generate_wif_privkey(CROWN_NETWORK, compressed=bool(key_idx % 2))
+        if isinstance(wif, bytes):
+            wif = wif.decode('ascii')  # base58 >= 1.0 returns bytes
+        for msg_idx in range(MESSAGES_PER_KEY):
+            data.append((wif, os.urandom(32).hex() + '|' + os.urandom(32).hex() + '|1|1|' + str(int(time.time()))))
+    return data
+
+
+def measure_signing(signer: crown_utils.EcdsaSigner, data):
+    crown_utils.set_ecdsa_signer(signer)
+    sigs = []
+    time_begin = time.perf_counter()
+    for wif, msg in data:
+        sigs.append(crown_utils.ecdsa_sign(msg, wif, CROWN_NETWORK))
+    duration = time.perf_counter() - time_begin
+    crown_utils.set_ecdsa_signer(None)
+    return sigs, len(data) / duration
+
+
+def measure_verification_python(data, sigs):
+    pubkeys = {wif: bitcoin.privkey_to_pubkey(crown_utils.wif_to_privkey(wif, CROWN_NETWORK)) for wif, _ in data}
+    time_begin = time.perf_counter()
+    for (wif, msg), sig in zip(data, sigs):
+        if not bitcoin.ecdsa_raw_verify(crown_utils.electrum_sig_hash(msg), bitcoin.decode_sig(sig), pubkeys[wif]):
+            raise Exception('Signature verification failed')
+    return len(data) / (time.perf_counter() - time_begin)
+
+
+def measure_verification_native(data, sigs):
+    import coincurve
+    pubkeys = {wif: coincurve.PrivateKey(bytes.fromhex(crown_utils.wif_to_privkey(wif, CROWN_NETWORK)[:64])).
+               public_key.format() for wif, _ in data}
+    time_begin = time.perf_counter()
+    for (wif, msg), sig in zip(data, sigs):
+        sig_bin = crown_utils.base64.b64decode(sig)
+        msg32 = bytes.fromhex(crown_utils.electrum_sig_hash(msg))
+        recid = (sig_bin[0] - 27) & 3
+        pubkey = coincurve.PublicKey.from_signature_and_message(sig_bin[1:] + bytes([recid]), msg32, hasher=None)
+        if pubkey.format() != pubkeys[wif]:
+            raise Exception('Signature verification failed')
+    return len(data) / (time.perf_counter() - time_begin)
+
+
+def main():
+    data = make_test_data()
+    sigs_python, rate = measure_signing(crown_utils.PythonEcdsaSigner(), data)
+    print('python:    signing %8.1f/s, verification %8.1f/s' % (rate, measure_verification_python(data, sigs_python)))
+
+    try:
+        native_signer = crown_utils.Secp256k1EcdsaSigner()
+    except ImportError:
+        print('secp256k1: the coincurve package is not installed')
+        return
+    sigs_native, rate = measure_signing(native_signer, data)
+    print('secp256k1: signing %8.1f/s, verification %8.1f/s' % (rate, measure_verification_native(data, sigs_native)))
+
+    differences = sum(1 for s1, s2 in zip(sigs_python, sigs_native) if s1 != s2)
+    print('signatures compared: %d, different: %d' % (len(data), differences))
+
+
+if __name__ == '__main__':
+    main()
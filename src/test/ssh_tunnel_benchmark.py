@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Loopback throughput benchmark of the SSH tunnel port forwarder (crownd_intf.Handler). A local paramiko server
+# stands in for the remote SSH host and a plain TCP server for crownd, so the results reflect the forwarder itself
+# and the SSH transport cost, not the network.
+
+import json
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+import paramiko
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from crownd_intf import ForwardServer, Handler, SSH_TUNNEL_BUFFER_SIZE
+
+
+USERNAME = 'benchmark'
+PASSWORD = 'benchmark'
+PAYLOAD_SIZES = (64 * 1024, 1024 * 1024, 16 * 1024 * 1024)
+REPEATS = 3
+
+
+def make_payload(size: int) -> bytes:
+    """ Build a masternodelist-like JSON text, so the compression results are close to the real ones. """
+    mn = {'address': '1.2.3.4:9340', 'payee': 'CRWFYrVDpLhoN2wQFKrPcnQwPgTmrBWrYBAT', 'status': 'ENABLED',
+          'protocol': 70210, 'lastseen': 1571234567, 'activeseconds': 12345678, 'lastpaidtime': 1571200000,
+          'lastpaidblock': 2400000}
+    items = []
+    total = 0
+    idx = 0
+    while total < size:
+        item = '"%064x-%d": %s' % (idx, idx % 2, json.dumps(mn))
+        items.append(item)
+        total += len(item) + 2
+        idx += 1
+    return ('{' + ', '.join(items) + '}').encode('ascii')[:size]
+
+
+def relay(sock_a, sock_b):
+    sel = selectors.DefaultSelector()
+    sel.register(sock_a, selectors.EVENT_READ, sock_b)
+    sel.register(sock_b, selectors.EVENT_READ, sock_a)
+    try:
+        while True:
+            for key, _ in sel.select():
+                data = key.fileobj.recv(SSH_TUNNEL_BUFFER_SIZE)
+                if not data:
+                    return
+                key.data.sendall(data)
+    except Exception:
+        pass
+    finally:
+        sel.close()
+        sock_a.close()
+        sock_b.close()
+
+
+class CrowndStandIn(threading.Thread):
+    """ Answers each '<size>\\n' request with <size> bytes of the JSON payload. """
+    def __init__(self):
+        threading.Thread.__init__(self, daemon=True)
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+        self.payload = make_payload(max(PAYLOAD_SIZES))
+
+    def serve(self, conn):
+        with conn:
+            fp = conn.makefile('rb')
+            for line in fp:
+                conn.sendall(self.payload[:int(line)])
+
+    def run(self):
+        while True:
+            conn, _ = self.sock.accept()
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+
+class SSHServerStandIn(paramiko.ServerInterface):
+    def __init__(self):
+        self.destinations = {}
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if username == USERNAME and password == PASSWORD:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_direct_tcpip_request(self, chanid, origin, destination):
+        self.destinations[chanid] = destination
+        return paramiko.OPEN_SUCCEEDED
+
+
+class SSHHostStandIn(threading.Thread):
+    def __init__(self):
+        threading.Thread.__init__(self, daemon=True)
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+
+    def serve(self, conn):
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(self.host_key)
+        server = SSHServerStandIn()
+        transport.start_server(server=server)
+        while transport.is_active():
+            chan = transport.accept(1)
+            if chan is not None:
+                dest = socket.create_connection(server.destinations.pop(chan.get_id()))
+                threading.Thread(target=relay, args=(chan, dest), daemon=True).start()
+
+    def run(self):
+        while True:
+            conn, _ = self.sock.accept()
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+
+def open_forwarder(ssh_port: int, crownd_port: int, compress: bool):
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect('127.0.0.1', port=ssh_port, username=USERNAME, password=PASSWORD, look_for_keys=False,
+                allow_agent=False, compress=compress)
+
+    class SubHandler(Handler):
+        chain_host = '127.0.0.1'
+        chain_port = crownd_port
+        ssh_transport = ssh.get_transport()
+        broken_conn_callback = None
+
+    server = ForwardServer(('127.0.0.1', 0), SubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return ssh, server
+
+
+def measure(local_port: int, size: int) -> float:
+    """ :return: throughput in MB/s """
+    buffer = bytearray(SSH_TUNNEL_BUFFER_SIZE)
+    with socket.create_connection(('127.0.0.1', local_port)) as conn:
+        time_begin = time.time()
+        conn.sendall(b'%d\n' % size)
+        received = 0
+        while received < size:
+            chunk = conn.recv_into(buffer)
+            if not chunk:
+                raise Exception('Connection closed after %d of %d bytes' % (received, size))
+            received += chunk
+        return size / (time.time() - time_begin) / (1024 * 1024)
+
+
+def main():
+    crownd = CrowndStandIn()
+    crownd.start()
+    ssh_host = SSHHostStandIn()
+    ssh_host.start()
+
+    for compress in (False, True):
+        ssh, server = open_forwarder(ssh_host.port, crownd.port, compress)
+        try:
+            local_port = server.server_address[1]
+            for size in PAYLOAD_SIZES:
+                results = [measure(local_port, size) for _ in range(REPEATS)]
+                print('compression: %-5s  payload: %8d KB  throughput: %8.2f MB/s (best of %d)' %
+                      (compress, size // 1024, max(results), REPEATS))
+        finally:
+            server.shutdown()
+            ssh.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Measures the application startup time. The first run uses an empty data directory (cold start: the config file
+# and the cache database are created from scratch), the following ones reuse it (warm start). Each run exits
+# by itself after the background stage of the startup has finished.
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+WARM_RUNS = 5
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crown_masternode_tool.py')
+
+
+def run_app(data_dir: str):
+    time_begin = time.time()
+    out = subprocess.run([sys.executable, APP_PATH, '--data-dir', data_dir, '--startup-benchmark'],
+                         stdout=subprocess.PIPE, universal_newlines=True, timeout=300).stdout
+    duration = time.time() - time_begin
+    report = ''
+    for line in out.splitlines():
+        if line.startswith('Startup phases:'):
+            report = line
+    return duration, report
+
+
+def main():
+    with tempfile.TemporaryDirectory() as data_dir:
+        duration, report = run_app(data_dir)
+        print('Cold start: %.3fs (until exit)\n    %s' % (duration, report))
+
+        durations = []
+        for nr in range(WARM_RUNS):
+            duration, report = run_app(data_dir)
+            durations.append(duration)
+            print('Warm start %d: %.3fs (until exit)\n    %s' % (nr + 1, duration, report))
+        print('Warm start average: %.3fs' % (sum(durations) / len(durations)))
+
+
+if __name__ == '__main__':
+    main()
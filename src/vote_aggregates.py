@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2019-10
+
+# Daily aggregates of the proposal votes kept in the cache database (table VOTES_DAILY), used to draw the vote
+# charts. For each proposal and day (local midnight epoch) a row holds the change of the YES/NO/ABSTAIN counts made
+# by the votes of that day (only the last vote of a masternode counts) and the number of vote changes of each type.
+# The rows are updated incrementally when new votes are saved; when the votes of a proposal change in a way that
+# can't be applied incrementally, its aggregates are marked as invalid (PROPOSALS.cmt_votes_daily_valid) and rebuilt
+# from VOTING_RESULTS when read next time.
+
+import datetime
+import logging
+import sqlite3
+from typing import List, Tuple, Optional
+
+
+log = logging.getLogger('cmt.vote_aggregates')
+
+VOTE_RESULTS = ('YES', 'NO', 'ABSTAIN')
+# the order of the vote change columns of VOTES_DAILY
+VOTE_CHANGE_TYPES = ('No->Yes', 'Abstain->Yes', 'No->Abstain', 'Yes->Abstain', 'Yes->No', 'Abstain->No')
+VOTE_CHANGE_COLUMNS = ('changes_no_yes', 'changes_abstain_yes', 'changes_no_abstain', 'changes_yes_abstain',
+                       'changes_yes_no', 'changes_abstain_no')
+
+
+def get_day_timestamp(timestamp: int) -> int:
+    """ Returns the epoch time of the local midnight beginning the day of 'timestamp'. """
+    d = datetime.date.fromtimestamp(timestamp)
+    return int(datetime.datetime(d.year, d.month, d.day, 0, 0, 0).timestamp())
+
+
+def get_vote_deltas(last_vote: Optional[str], vote: str) -> Tuple[List[int], Optional[int]]:
+    """
+    :return: the change of the yes/no/abstain counts caused by a masternode voting 'vote' after 'last_vote' and
+        the index of the vote change type (VOTE_CHANGE_TYPES) or None if the vote has not been changed
+    """
+    deltas = [0, 0, 0]
+    change_idx = None
+    if last_vote != vote:
+        deltas[VOTE_RESULTS.index(vote)] += 1
+        if last_vote is not None:
+            deltas[VOTE_RESULTS.index(last_vote)] -= 1
+            change_idx = VOTE_CHANGE_TYPES.index(last_vote.capitalize() + '->' + vote.capitalize())
+    return deltas, change_idx
+
+
+def apply_day_deltas(cur: sqlite3.Cursor, proposal_id: int, day: int, deltas: List[int], change_idx: Optional[int]):
+    cur.execute('INSERT OR IGNORE INTO VOTES_DAILY(proposal_id, day) VALUES(?,?)', (proposal_id, day))
+    if any(deltas):
+        change_sql = ''
+        if change_idx is not None:
+            col = VOTE_CHANGE_COLUMNS[change_idx]
+            change_sql = f', {col}={col}+1'
+        cur.execute('UPDATE VOTES_DAILY SET yes_delta=yes_delta+?, no_delta=no_delta+?, '
+                    f'abstain_delta=abstain_delta+?{change_sql} WHERE proposal_id=? AND day=?',
+                    (deltas[0], deltas[1], deltas[2], proposal_id, day))
+
+
+def add_vote(cur: sqlite3.Cursor, proposal_id: int, masternode_ident: str, voting_time: int, voting_result: str):
+    """
+    Updates the aggregates of a proposal with a new vote; to be called before the vote is saved to VOTING_RESULTS.
+    """
+    voting_result = voting_result.upper() if voting_result else voting_result
+    cur.execute('SELECT voting_time, voting_result FROM VOTING_RESULTS WHERE masternode_ident=? AND proposal_id=? '
+                'ORDER BY voting_time DESC LIMIT 1', (masternode_ident, proposal_id))
+    row = cur.fetchone()
+    if (row and row[0] >= voting_time) or voting_result not in VOTE_RESULTS:
+        # the vote is older than the last vote of the masternode, so it changes the effect of the votes that
+        # follow it
+        invalidate(cur, proposal_id)
+    else:
+        last_vote = row[1].upper() if row else None
+        if last_vote not in VOTE_RESULTS:
+            last_vote = None
+        deltas, change_idx = get_vote_deltas(last_vote, voting_result)
+        apply_day_deltas(cur, proposal_id, get_day_timestamp(voting_time), deltas, change_idx)
+
+
+def invalidate(cur: sqlite3.Cursor, proposal_id: int):
+    """ Marks the aggregates of a proposal to be rebuilt when read next time. """
+    cur.execute('UPDATE PROPOSALS SET cmt_votes_daily_valid=0 WHERE id=?', (proposal_id,))
+
+
+def clear(cur: sqlite3.Cursor):
+    """ Clears the aggregates of all the proposals; to be called after deleting all the cached votes. """
+    cur.execute('DELETE FROM VOTES_DAILY')
+    cur.execute('UPDATE PROPOSALS SET cmt_votes_daily_valid=0')
+
+
+def rebuild(cur: sqlite3.Cursor, proposal_id: int):
+    """ Computes the aggregates of a proposal from all its votes. """
+    days = {}  # key: day timestamp, value: [yes, no, abstain delta, <vote changes by VOTE_CHANGE_TYPES>]
+    last_votes = {}
+    cur.execute('SELECT masternode_ident, voting_time, voting_result FROM VOTING_RESULTS WHERE proposal_id=? '
+                'ORDER BY voting_time', (proposal_id,))
+    last_day = None
+    day_data = None
+    for masternode_ident, voting_time, voting_result in cur.fetchall():
+        vote = voting_result.upper() if voting_result else voting_result
+        if vote not in VOTE_RESULTS:
+            continue
+        day = get_day_timestamp(voting_time)
+        if day != last_day:
+            day_data = days.get(day)
+            if day_data is None:
+                day_data = [0] * (3 + len(VOTE_CHANGE_TYPES))
+                days[day] = day_data
+            last_day = day
+        deltas, change_idx = get_vote_deltas(last_votes.get(masternode_ident), vote)
+        for idx in range(3):
+            day_data[idx] += deltas[idx]
+        if change_idx is not None:
+            day_data[3 + change_idx] += 1
+        last_votes[masternode_ident] = vote
+
+    cur.execute('DELETE FROM VOTES_DAILY WHERE proposal_id=?', (proposal_id,))
+    cur.executemany(f'INSERT INTO VOTES_DAILY(proposal_id, day, yes_delta, no_delta, abstain_delta, '
+                    f'{", ".join(VOTE_CHANGE_COLUMNS)}) VALUES(?,?,?,?,?,?,?,?,?,?,?)',
+                    [(proposal_id, day) + tuple(data) for day, data in days.items()])
+    cur.execute('UPDATE PROPOSALS SET cmt_votes_daily_valid=1 WHERE id=?', (proposal_id,))
+    log.debug('Rebuilt the daily vote aggregates of proposal %s (%d days)', proposal_id, len(days))
+
+
+def read(cur: sqlite3.Cursor, proposal_id: int) -> Tuple[List[Tuple], bool]:
+    """
+    Reads the aggregates of a proposal, rebuilding them first if they are invalid.
+    :return: tuple: list of (day, yes delta, no delta, abstain delta, <vote changes by VOTE_CHANGE_TYPES>) ordered
+        by day; True if the aggregates have been rebuilt (and the changes need to be committed)
+    """
+    rebuilt = False
+    cur.execute('SELECT cmt_votes_daily_valid FROM PROPOSALS WHERE id=?', (proposal_id,))
+    row = cur.fetchone()
+    if row and not row[0]:
+        rebuild(cur, proposal_id)
+        rebuilt = True
+    cur.execute(f'SELECT day, yes_delta, no_delta, abstain_delta, {", ".join(VOTE_CHANGE_COLUMNS)} '
+                f'FROM VOTES_DAILY WHERE proposal_id=? ORDER BY day', (proposal_id,))
+    return cur.fetchall(), rebuilt
@@ -18,7 +18,7 @@ import wnd_utils
 from app_config import MasternodeConfig
 from app_defs import DEBUG_MODE
 from bip44_wallet import Bip44Wallet, UNCONFIRMED_TX_BLOCK_HEIGHT
-from ext_item_model import TableModelColumn, ExtSortFilterTableModel
+from ext_item_model import TableModelColumn, ExtSortFilterTableModel, sort_key_value
 from wallet_common import Bip44AccountType, Bip44AddressType, UtxoType, TxType
 
 log = logging.getLogger('cmt.wallet_dlg')
@@ -395,6 +395,7 @@ class UtxoTableModel(ExtSortFilterTableModel):
         self.hide_collateral_utxos = True
         self.utxos: List[UtxoType] = []
         self.utxo_by_id: Dict[int, UtxoType] = {}
+        self.row_by_utxo_id: Dict[int, int] = {}  # utxo id -> index of the row in self.utxos
         self.block_height = None
 
         self.mn_by_collateral_tx: Dict[str, MasternodeConfig] = {}
@@ -475,99 +476,101 @@ class UtxoTableModel(ExtSortFilterTableModel):
 
         return QVariant()
 
+    def _register_utxo(self, utxo: UtxoType):
+        self.utxo_by_id[utxo.id] = utxo
+        ident = utxo.txid + '-' + str(utxo.output_index)
+        if ident in self.mn_by_collateral_tx:
+            utxo.is_collateral = True
+        mn = self.mn_by_collateral_address.get(utxo.address, None)
+        if mn:
+            utxo.masternode = mn
+
+    def _rebuild_row_index(self, start_row: int = 0):
+        for row_idx in range(start_row, len(self.utxos)):
+            self.row_by_utxo_id[self.utxos[row_idx].id] = row_idx
+
     def add_utxo(self, utxo: UtxoType, insert_pos = None):
         if not utxo.id in self.utxo_by_id:
             if insert_pos is None:
                 self.utxos.append(utxo)
+                self.row_by_utxo_id[utxo.id] = len(self.utxos) - 1
             else:
                 self.utxos.insert(insert_pos, utxo)
-            self.utxo_by_id[utxo.id] = utxo
-            ident = utxo.txid + '-' + str(utxo.output_index)
-            if ident in self.mn_by_collateral_tx:
-                utxo.is_collateral = True
-            mn = self.mn_by_collateral_address.get(utxo.address, None)
-            if mn:
-                utxo.masternode = mn
+                self._rebuild_row_index(insert_pos)
+            self._register_utxo(utxo)
 
     def clear_utxos(self):
         self.utxos.clear()
         self.utxo_by_id.clear()
+        self.row_by_utxo_id.clear()
 
     def update_utxos(self, utxos_to_add: List[UtxoType], utxos_to_update: List[UtxoType], utxos_to_delete: List[Tuple[int, int]]):
         if utxos_to_delete:
-            row_indexes_to_remove = []
+            row_indexes_to_remove = set()
             for utxo_id in utxos_to_delete:
-                utxo = self.utxo_by_id.get(utxo_id)
-                if utxo:
-                    utxo_index = self.utxos.index(utxo)
-                    if utxo_index not in row_indexes_to_remove:
-                        row_indexes_to_remove.append(utxo_index)
+                if utxo_id in self.utxo_by_id:
+                    row_indexes_to_remove.add(self.row_by_utxo_id.pop(utxo_id))
                     del self.utxo_by_id[utxo_id]
-            row_indexes_to_remove.sort(reverse=True)
 
-            for group in consecutive_groups(row_indexes_to_remove, ordering=lambda x: -x):
-                l = list(group)
-                self.beginRemoveRows(QModelIndex(), l[-1], l[0]) # items are sorted in reversed order
-                del self.utxos[l[-1]: l[0]+1]
-                self.endRemoveRows()
+            if row_indexes_to_remove:
+                # remove rows in consecutive ranges, starting from the end of the list, so that the indexes of
+                # the ranges remaining to be removed stay valid
+                for group in consecutive_groups(sorted(row_indexes_to_remove, reverse=True), ordering=lambda x: -x):
+                    l = list(group)
+                    self.beginRemoveRows(QModelIndex(), l[-1], l[0]) # items are sorted in reversed order
+                    del self.utxos[l[-1]: l[0]+1]
+                    self.endRemoveRows()
+                self._rebuild_row_index(min(row_indexes_to_remove))
 
         if utxos_to_add:
             # in the model, the rows are sorted by the number of confirmations in the descending order, so put
             # the new ones in the right place
 
             # filter out the already existing utxos
-            utxos_to_add_verified = []
+            utxos_to_add_verified = {}
             for utxo in utxos_to_add:
                 if utxo.id not in self.utxo_by_id:
-                    utxos_to_add_verified.append(utxo)
-
-            utxos_to_add_verified.sort(key=lambda x: x.block_height, reverse=True)
-            row_idx = 0
-            self.beginInsertRows(QModelIndex(), row_idx, row_idx + len(utxos_to_add_verified) - 1)
-            try:
-                for index, utxo in enumerate(utxos_to_add_verified):
-                    if utxo.id not in self.utxo_by_id:
-                        self.add_utxo(utxo, index)
-            finally:
-                self.endInsertRows()
+                    utxos_to_add_verified[utxo.id] = utxo
+
+            if utxos_to_add_verified:
+                new_utxos = sorted(utxos_to_add_verified.values(), key=lambda x: x.block_height, reverse=True)
+                self.beginInsertRows(QModelIndex(), 0, len(new_utxos) - 1)
+                try:
+                    self.utxos[0:0] = new_utxos
+                    for utxo in new_utxos:
+                        self._register_utxo(utxo)
+                    self._rebuild_row_index()
+                finally:
+                    self.endInsertRows()
 
         if utxos_to_update:
+            rows_updated = []
             for utxo_new in utxos_to_update:
                 utxo = self.utxo_by_id.get(utxo_new.id)
                 if utxo:
                     utxo.block_height = utxo_new.block_height  # block_height is the only field that can be updated
-                    utxo_index = self.utxos.index(utxo)
-                    ui_index = self.index(utxo_index, 0)
-                    self.dataChanged.emit(ui_index, ui_index)
+                    rows_updated.append(self.row_by_utxo_id[utxo.id])
 
-    def lessThan(self, col_index, left_row_index, right_row_index):
+            # signal changes in consecutive row ranges
+            for group in consecutive_groups(sorted(set(rows_updated))):
+                l = list(group)
+                self.dataChanged.emit(self.index(l[0], 0), self.index(l[-1], self.col_count() - 1))
+
+    def sort_key_fun(self, col_index):
         col = self.col_by_index(col_index)
         if col:
             col_name = col.name
-            reverse = False
+
             if col_name == 'time_str':
-                col_name = 'confirmations'
-                reverse = True
-
-            if 0 <= left_row_index < len(self.utxos) and \
-               0 <= right_row_index < len(self.utxos):
-                left_utxo = self.utxos[left_row_index]
-                right_utxo = self.utxos[right_row_index]
-                left_value = left_utxo.__getattribute__(col_name)
-                right_value = right_utxo.__getattribute__(col_name)
-                if isinstance(left_value, (int, float)) and isinstance(right_value, (int, float)):
-                    if not reverse:
-                        return left_value < right_value
-                    else:
-                        return right_value < left_value
-                elif isinstance(left_value, str) and isinstance(right_value, str):
-                    left_value = left_value.lower()
-                    right_value = right_value.lower()
-                    if not reverse:
-                        return left_value < right_value
-                    else:
-                        return right_value < left_value
-        return False
+                # the date/time column is sorted by the number of confirmations in the reversed order
+                def key_fun(row_idx):
+                    confirmations = self.utxos[row_idx].confirmations
+                    return sort_key_value(-confirmations if confirmations is not None else None)
+            else:
+                def key_fun(row_idx):
+                    return sort_key_value(self.utxos[row_idx].__getattribute__(col_name))
+            return key_fun
+        return None
 
     def filterAcceptsRow(self, source_row, source_parent):
         will_show = True
@@ -734,6 +737,8 @@ class TransactionTableModel(ExtSortFilterTableModel):
 
     def set_blockheight(self, cur_blockheight):
         if self.__current_block_height != cur_blockheight:
+            if self.__current_block_height is None:
+                self.invalidate_sort_ranks()  # the confirmations column becomes sortable
             self.__current_block_height = cur_blockheight
 
     def add_tx(self, tx: TxType, insert_pos = None):
@@ -748,45 +753,28 @@ class TransactionTableModel(ExtSortFilterTableModel):
         self.txes_by_id.clear()
         self.txes.clear()
 
-    def lessThan(self, col_index, left_row_index, right_row_index):
+    def sort_key_fun(self, col_index):
         col = self.col_by_index(col_index)
         if col:
             col_name = col.name
-            reverse = False
-
-            if 0 <= left_row_index < len(self.txes) and \
-               0 <= right_row_index < len(self.txes):
-                left_tx = self.txes[left_row_index]
-                right_tx = self.txes[right_row_index]
-                if col_name == 'block_time_str':
-                    col_name = 'block_timestamp'
-                    left_value = left_tx.__getattribute__(col_name)
-                    right_value = right_tx.__getattribute__(col_name)
-                elif col_name in ('senders', 'recipient'):
-                    return False
-                elif col_name == 'confirmations':
-                    if self.__current_block_height is not None:
-                        left_value = self.__current_block_height - left_tx.block_height + 1
-                        right_value = self.__current_block_height - right_tx.block_height + 1
-                    else:
-                        return False
-                else:
-                    left_value = left_tx.__getattribute__(col_name)
-                    right_value = right_tx.__getattribute__(col_name)
 
-                if isinstance(left_value, (int, float)) and isinstance(right_value, (int, float)):
-                    if not reverse:
-                        return left_value < right_value
-                    else:
-                        return right_value < left_value
-                elif isinstance(left_value, str) and isinstance(right_value, str):
-                    left_value = left_value.lower()
-                    right_value = right_value.lower()
-                    if not reverse:
-                        return left_value < right_value
-                    else:
-                        return right_value < left_value
-        return False
+            if col_name == 'block_time_str':
+                def key_fun(row_idx):
+                    return sort_key_value(self.txes[row_idx].block_timestamp)
+            elif col_name in ('senders', 'recipient'):
+                def key_fun(row_idx):
+                    return sort_key_value(None)
+            elif col_name == 'confirmations':
+                # the number of confirmations decreases with the block height
+                def key_fun(row_idx):
+                    if self.__current_block_height is not None:
+                        return sort_key_value(-self.txes[row_idx].block_height)
+                    return sort_key_value(None)
+            else:
+                def key_fun(row_idx):
+                    return sort_key_value(self.txes[row_idx].__getattribute__(col_name))
+            return key_fun
+        return None
 
     def filterAcceptsRow(self, source_row, source_parent):
         any_cond_met = False
@@ -101,6 +101,7 @@ class WalletDlg(QDialog, ui_wallet_dlg.Ui_WalletDlg, WndUtils):
         self.bip44_wallet.on_account_data_changed_callback = self.on_bip44_account_changed
         self.bip44_wallet.on_account_address_added_callback = self.on_bip44_account_address_added
         self.bip44_wallet.on_address_data_changed_callback = self.on_bip44_account_address_changed
+        self.bip44_wallet.on_mempool_event_callback = self.on_bip44_mempool_event
 
         self.utxo_table_model = UtxoTableModel(self, self.masternodes, main_ui.app_config.get_block_explorer_tx())
         self.mn_model = MnAddressTableModel(self, self.masternodes, self.bip44_wallet)
@@ -433,6 +434,7 @@ class WalletDlg(QDialog, ui_wallet_dlg.Ui_WalletDlg, WndUtils):
 
     def stop_threads(self):
         self.finishing = True
+        self.bip44_wallet.stop_mempool_watching()
         self.data_thread_event.set()
         self.display_thread_event.set()
         if self.data_thread_ref:
@@ -442,6 +444,7 @@ class WalletDlg(QDialog, ui_wallet_dlg.Ui_WalletDlg, WndUtils):
 
     def start_threads(self):
         self.finishing = False
+        self.bip44_wallet.start_mempool_watching()
         self.update_hw_info()
         if not self.display_thread_ref:
             self.display_thread_ref = self.run_thread(self, self.display_thread, ())
@@ -1389,6 +1392,13 @@ class WalletDlg(QDialog, ui_wallet_dlg.Ui_WalletDlg, WndUtils):
                                     self.hide_loading_tx_animation()
                                     self.set_message('')
 
+                    elif self.allow_fetch_transactions and self.bip44_wallet.mempool_events_pending():
+                        try:
+                            self.call_fun_monitor_txs(self.bip44_wallet.process_mempool_events,
+                                                      check_break_fetch_process)
+                        except BreakFetchTransactionsException:
+                            pass
+
                 self.data_thread_event.wait(1)
                 if self.data_thread_event.is_set():
                     self.data_thread_event.clear()
@@ -1505,6 +1515,11 @@ class WalletDlg(QDialog, ui_wallet_dlg.Ui_WalletDlg, WndUtils):
             else:
                 fun()
 
+    def on_bip44_mempool_event(self):
+        if not self.finishing:
+            # wake up the data thread to apply mempool changes
+            self.data_thread_event.set()
+
     def on_bip44_account_address_changed(self, account: Bip44AccountType, address: Bip44AddressType):
         if not self.finishing:
             def fun():